@@ -0,0 +1,217 @@
+import bisect
+import sys
+
+from course_dataset import COUNT_FIELDS, METRIC_FIELDS, STRING_FIELDS, composite_scores
+from complete_workflow import DEFAULT_WEIGHTS, calculate_course_score, get_course_bucket
+from ranking_query import ranking_key
+
+FLMBE_BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
+
+# Target block size; blocks split once they reach twice this
+DEFAULT_LOAD = 64
+
+class RankedSet:
+    """Keyed rows kept in sort order under insert, update and delete
+
+    Entries live in a list of short sorted blocks, with the last entry of
+    each block kept in a separate list. Finding a block is a bisect over
+    those maxima and the insert or delete touches one block, so updates
+    cost O(log n + load). top(k) walks the blocks from the front in O(k),
+    and rank() turns a row key into its position.
+    """
+
+    def __init__(self, sort_key, rows=(), load=DEFAULT_LOAD):
+        self.sort_key = sort_key
+        self.load = load
+        self._rows = dict(rows)
+        self._entries = {row_key: (sort_key(row), row_key) for row_key, row in self._rows.items()}
+
+        ordered = sorted(self._entries.values())
+        self._blocks = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+        self._maxes = [block[-1] for block in self._blocks]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, row_key):
+        return row_key in self._rows
+
+    def get(self, row_key):
+        return self._rows.get(row_key)
+
+    def insert(self, row_key, row):
+        """Add a row, replacing any existing row with the same key"""
+        if row_key in self._rows:
+            self.remove(row_key)
+        entry = (self.sort_key(row), row_key)
+        self._rows[row_key] = row
+        self._entries[row_key] = entry
+
+        if not self._blocks:
+            self._blocks.append([entry])
+            self._maxes.append(entry)
+            return
+        i = min(bisect.bisect_left(self._maxes, entry), len(self._blocks) - 1)
+        block = self._blocks[i]
+        bisect.insort(block, entry)
+        self._maxes[i] = block[-1]
+        if len(block) >= 2 * self.load:
+            self._blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            self._maxes[i:i + 1] = [block[self.load - 1], block[-1]]
+
+    def remove(self, row_key):
+        """Delete a row by key; missing keys are ignored"""
+        entry = self._entries.pop(row_key, None)
+        if entry is None:
+            return
+        del self._rows[row_key]
+        i = bisect.bisect_left(self._maxes, entry)
+        block = self._blocks[i]
+        del block[bisect.bisect_left(block, entry)]
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+
+    def top(self, k):
+        """The first k rows in sort order"""
+        results = []
+        for block in self._blocks:
+            for _, row_key in block:
+                if len(results) == k:
+                    return results
+                results.append(self._rows[row_key])
+        return results
+
+    def rank(self, row_key):
+        """Zero-based position of a row in sort order"""
+        entry = self._entries[row_key]
+        i = bisect.bisect_left(self._maxes, entry)
+        return sum(len(block) for block in self._blocks[:i]) + bisect.bisect_left(self._blocks[i], entry)
+
+    def copy(self):
+        """Independent copy that shares the (unchanged) row dicts"""
+        clone = RankedSet.__new__(RankedSet)
+        clone.sort_key = self.sort_key
+        clone.load = self.load
+        clone._rows = dict(self._rows)
+        clone._entries = dict(self._entries)
+        clone._blocks = [list(block) for block in self._blocks]
+        clone._maxes = list(self._maxes)
+        return clone
+
+class BucketRankings:
+    """Composite-score rankings per FLMBE bucket plus a global one, maintained row by row
+
+    Rows are keyed by whatever identifies a section to the caller (a
+    course_db row key, or a row index); rows outside the FLMBE buckets are
+    ignored.
+    """
+
+    def __init__(self, keyed_courses=(), weights=None):
+        self.weights = weights
+        self.decode_row = None
+        self.buckets = {}
+        scoped = {scope: [] for scope in FLMBE_BUCKETS + ['global']}
+        for row_key, course in keyed_courses:
+            row = self._ranked_row(course)
+            if row is None:
+                continue
+            self.buckets[row_key] = row['bucket']
+            scoped[row['bucket']].append((row_key, row))
+            scoped['global'].append((row_key, row))
+        self.rankings = {scope: RankedSet(ranking_key, rows) for scope, rows in scoped.items()}
+
+    @classmethod
+    def from_dataset(cls, dataset, decode_row, weights=None):
+        """Read-only rankings of a columnar dataset, keyed by row index
+
+        Only each row's ranking key is kept; top() decodes the rows it
+        returns with decode_row(index), so building the rankings does not
+        turn every row into a dict.
+        """
+        columns = dataset['columns']
+        dictionaries = dataset['dictionaries']
+        scores = composite_scores(dataset, weights or DEFAULT_WEIGHTS)
+        buckets_by_code = [get_course_bucket(title) for title in dictionaries['title']]
+
+        def sort_key(index):
+            # ranking_key, read straight from the columns
+            return (-scores[index], dictionaries['id'][columns['id'][index]],
+                    dictionaries['term'][columns['term'][index]],
+                    dictionaries['instructor'][columns['instructor'][index]])
+
+        rankings = cls.__new__(cls)
+        rankings.weights = weights
+        rankings.decode_row = decode_row
+        rankings.buckets = {}
+        scoped = {scope: [] for scope in FLMBE_BUCKETS + ['global']}
+        for index, code in enumerate(columns['title']):
+            bucket = buckets_by_code[code]
+            if bucket not in FLMBE_BUCKETS:
+                continue
+            rankings.buckets[index] = bucket
+            scoped[bucket].append((index, index))
+            scoped['global'].append((index, index))
+        rankings.rankings = {scope: RankedSet(sort_key, rows) for scope, rows in scoped.items()}
+        return rankings
+
+    def _ranked_row(self, course):
+        """The row as ranking results present it, or None outside the FLMBE buckets"""
+        bucket = get_course_bucket(course['title'])
+        if bucket not in FLMBE_BUCKETS:
+            return None
+        row = {field: course.get(field) for field in STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS}
+        row['bucket'] = bucket
+        row['composite_score'] = calculate_course_score(course, self.weights)
+        return row
+
+    def upsert(self, row_key, course):
+        """Insert a new row or replace an existing one (it may change bucket)"""
+        if self.decode_row is not None:
+            # Rows here are dataset indexes, decoded on demand; a course dict cannot join them
+            raise ValueError("Rankings built from a dataset are read-only")
+        self.remove(row_key)
+        row = self._ranked_row(course)
+        if row is None:
+            return
+        self.buckets[row_key] = row['bucket']
+        self.rankings[row['bucket']].insert(row_key, row)
+        self.rankings['global'].insert(row_key, row)
+
+    def remove(self, row_key):
+        """Drop a row from its bucket and from the global ranking"""
+        bucket = self.buckets.pop(row_key, None)
+        if bucket is not None:
+            self.rankings[bucket].remove(row_key)
+            self.rankings['global'].remove(row_key)
+
+    def top(self, scope, k=15):
+        """Top-k rows of a bucket, or of every FLMBE bucket for 'global'"""
+        rows = self.rankings[scope].top(k)
+        if self.decode_row is not None:
+            rows = [self._ranked_row(self.decode_row(index)) for index in rows]
+        return rows
+
+    def copy(self):
+        """Independent copy, so a new snapshot can be updated while the old one serves"""
+        clone = BucketRankings.__new__(BucketRankings)
+        clone.weights = self.weights
+        clone.decode_row = self.decode_row
+        clone.buckets = dict(self.buckets)
+        clone.rankings = {scope: ranking.copy() for scope, ranking in self.rankings.items()}
+        return clone
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    courses = load_course_data_from_js(sys.argv[1] if len(sys.argv) > 1 else 'course_data.js')
+    rankings = BucketRankings(enumerate(courses))
+    for scope in FLMBE_BUCKETS + ['global']:
+        print(f"\n{scope} ({len(rankings.rankings[scope])} sections):")
+        for i, row in enumerate(rankings.top(scope, 5), 1):
+            print(f"  {i}. {row['title']} - {row['instructor']}, {row['term']} ({row['composite_score']:.2f})")
+
+if __name__ == "__main__":
+    main()
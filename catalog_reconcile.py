@@ -0,0 +1,164 @@
+import argparse
+import json
+import re
+
+from complete_workflow import CATALOG_ALIASES_FILE, FLMBE_CATALOG, load_catalog_aliases
+
+# Minimum trigram Jaccard similarity for a title to be a candidate
+DEFAULT_THRESHOLD = 0.5
+
+# Candidates at least this similar become aliases without review
+DEFAULT_ACCEPT = 0.85
+
+# Candidates within this much of the best score make a match ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+def normalize_title(title):
+    """Lowercase a title and collapse punctuation and whitespace to single spaces"""
+    return re.sub(r'[^a-z0-9]+', ' ', title.lower()).strip()
+
+def numerals(title):
+    """Sequence numbers in a title ('Asset Pricing II' -> {'ii'}), which must agree for titles to match"""
+    return set(re.findall(r'\b(?:[ivx]+|\d+)\b', normalize_title(title)))
+
+def trigrams(title):
+    """Character trigrams of a normalized title, padded so word edges count"""
+    padded = f"  {normalize_title(title)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """Inverted index from character trigrams to the titles containing them
+
+    A query only visits the postings of its own trigrams, so its cost
+    follows the number of titles that share something with it rather
+    than the size of the whole title list.
+    """
+
+    def __init__(self, titles):
+        self.titles = list(titles)
+        self.sizes = []
+        self.postings = {}
+        for title_id, title in enumerate(self.titles):
+            grams = trigrams(title)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(title_id)
+
+    def search(self, query, threshold=DEFAULT_THRESHOLD):
+        """Titles with trigram Jaccard similarity >= threshold, best first, as (score, title)"""
+        grams = trigrams(query)
+        shared = {}
+        for gram in grams:
+            for title_id in self.postings.get(gram, ()):
+                shared[title_id] = shared.get(title_id, 0) + 1
+
+        matches = []
+        for title_id, overlap in shared.items():
+            score = overlap / (len(grams) + self.sizes[title_id] - overlap)
+            if score >= threshold:
+                matches.append((score, self.titles[title_id]))
+        matches.sort(key=lambda x: (-x[0], x[1]))
+        return matches
+
+def reconcile(catalog, titles, threshold=DEFAULT_THRESHOLD, accept=DEFAULT_ACCEPT):
+    """Match every catalog entry to the dataset titles it most likely refers to
+
+    Exact title matches need no alias. Otherwise each candidate dataset
+    title goes to the catalog entry it is most similar to. It becomes an
+    alias when the score reaches accept, its sequence numbers agree (so
+    'Asset Pricing III' is not taken for 'Asset Pricing II') and no other
+    entry comes within AMBIGUITY_MARGIN; close calls are ambiguous and
+    weaker candidates are left for review. Catalog titles with neither an
+    exact match nor an alias are missing.
+    """
+    index = TrigramIndex(sorted(set(titles)))
+    catalog_titles = {title for entries in catalog.values() for title in entries}
+    present = set(index.titles)
+
+    # For each dataset title, every catalog entry it is a candidate for
+    claims = {}
+    exact = []
+    for bucket, entries in catalog.items():
+        for catalog_title in entries:
+            if catalog_title in present:
+                exact.append(catalog_title)
+            for score, title in index.search(catalog_title, threshold):
+                if title not in catalog_titles:
+                    claims.setdefault(title, []).append((score, catalog_title, bucket))
+
+    def candidate(entry):
+        return {'catalog_title': entry[1], 'bucket': entry[2], 'score': round(entry[0], 3)}
+
+    aliases = {}
+    ambiguous = []
+    review = []
+    for title, candidates in sorted(claims.items()):
+        candidates.sort(key=lambda x: (-x[0], x[1]))
+        best = candidates[0]
+        rivals = [c for c in candidates[1:] if best[0] - c[0] <= AMBIGUITY_MARGIN]
+        if rivals:
+            ambiguous.append({'title': title, 'candidates': [candidate(c) for c in [best] + rivals]})
+        elif best[0] >= accept and numerals(title) == numerals(best[1]):
+            aliases[title] = best[1]
+        else:
+            review.append(dict(candidate(best), title=title))
+
+    matched = set(exact) | set(aliases.values())
+    missing = [{'catalog_title': title, 'bucket': bucket}
+               for bucket, entries in catalog.items() for title in entries if title not in matched]
+
+    return {
+        'exact': len(exact),
+        'aliases': aliases,
+        'ambiguous': ambiguous,
+        'review': review,
+        'missing': missing
+    }
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    parser = argparse.ArgumentParser(description='Reconcile FLMBE catalog titles with the titles in the evaluations')
+    parser.add_argument('source', nargs='?', default='course_data.js')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--accept', type=float, default=DEFAULT_ACCEPT)
+    parser.add_argument('--output', default=CATALOG_ALIASES_FILE, help='alias table to write')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing the alias table')
+    args = parser.parse_args()
+
+    titles = {course['title'] for course in load_course_data_from_js(args.source)}
+    result = reconcile(FLMBE_CATALOG, titles, args.threshold, args.accept)
+
+    print(f"{result['exact']} catalog titles matched exactly, {len(result['aliases'])} aliases found")
+    for alias, title in sorted(result['aliases'].items()):
+        print(f"  alias: {alias!r} -> {title!r}")
+    for entry in result['ambiguous']:
+        options = '; '.join(f"{c['catalog_title']} ({c['bucket']}, {c['score']})" for c in entry['candidates'])
+        print(f"  ambiguous: {entry['title']!r} could be {options}")
+    for entry in result['review']:
+        print(f"  review: {entry['title']!r} resembles {entry['catalog_title']!r} ({entry['bucket']}, {entry['score']})")
+    for entry in result['missing']:
+        print(f"  missing: {entry['catalog_title']!r} ({entry['bucket']}) has no titles in the evaluations")
+
+    if args.dry_run:
+        return
+    # Aliases already in the table may have been added by hand after review, so they are kept
+    aliases = load_catalog_aliases(args.output)
+    added = 0
+    for alias, title in result['aliases'].items():
+        if alias not in aliases:
+            aliases[alias] = title
+            added += 1
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({
+            'threshold': args.threshold,
+            'accept': args.accept,
+            'aliases': dict(sorted(aliases.items())),
+            'ambiguous': result['ambiguous'],
+            'review': result['review'],
+            'missing': result['missing']
+        }, file, indent=2)
+    print(f"Wrote {len(aliases)} aliases ({added} new) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,38 +2,71 @@ import json
 import csv
 import os
 import re
+import sys
 from datetime import datetime
 
-def csv_to_js(csv_file, js_file):
-    """Convert CSV to JavaScript file"""
-    courses = []
+import course_db
+from course_dataset import build_columnar_dataset, dataset_to_courses, dataset_to_json
+from dataset_file import DEFAULT_DATASET_FILE, write_dataset_file
+from pareto_frontier import pareto_layers
+from quantile_sketch import percentile_rank
+
+# Number of score-vs-hours frontier layers rendered under each bucket table
+FRONTIER_LAYERS = 2
+
+# Dictionary-encoded copy of course_data.js, which itself stays a plain array of course objects
+ENCODED_COURSE_DATA_FILE = 'course_data.encoded.js'
+
+def iter_course_csv(csv_file):
+    """Parse the evaluation CSV one row at a time, yielding course dicts"""
     with open(csv_file, 'r', encoding='utf-8') as file:
         reader = csv.reader(file)
         next(reader)  # Skip header row
         for row in reader:
             if len(row) >= 14 and row[0].strip():
                 try:
+                    # Strings are interned so rows share one copy of each repeated value;
+                    # a blank metric is None, since 0 would read as a real rating
                     course = {
-                        'id': row[0].strip(),
-                        'title': row[1].strip(),
-                        'instructor': f"{row[2].strip()} {row[3].strip()}",
-                        'term': row[4].strip(),
-                        'hoursPerWeek': float(row[8]) if row[8] and row[8] != '' else 0,
-                        'clarity': float(row[9]) if row[9] and row[9] != '' else 0,
-                        'interest': float(row[10]) if row[10] and row[10] != '' else 0,
-                        'usefulness': float(row[11]) if row[11] and row[11] != '' else 0,
-                        'overall': float(row[12]) if row[12] and row[12] != '' else 0,
-                        'recommendation': float(row[13]) if row[13] and row[13] != '' else 0
+                        'id': sys.intern(row[0].strip()),
+                        'title': sys.intern(row[1].strip()),
+                        'instructor': sys.intern(f"{row[2].strip()} {row[3].strip()}"),
+                        'term': sys.intern(row[4].strip()),
+                        'respondentCount': int(row[6]) if row[6] and row[6] != '' else 0,
+                        'hoursPerWeek': float(row[8]) if row[8] else None,
+                        'clarity': float(row[9]) if row[9] else None,
+                        'interest': float(row[10]) if row[10] else None,
+                        'usefulness': float(row[11]) if row[11] else None,
+                        'overall': float(row[12]) if row[12] else None,
+                        'recommendation': float(row[13]) if row[13] else None
                     }
-                    courses.append(course)
                 except (ValueError, IndexError) as e:
                     print(f"Skipping row due to error: {e}")
                     continue
-    
+                yield course
+
+def read_course_csv(csv_file):
+    """Parse the evaluation CSV into course dicts"""
+    return list(iter_course_csv(csv_file))
+
+def write_course_data_js(courses, js_file, encoded=False):
+    """Write course dicts to a JavaScript data file
+
+    With encoded=True the file holds each title, instructor and term once
+    plus integer code columns; load_course_data_from_js reads both forms.
+    """
     with open(js_file, 'w') as file:
         file.write('const courseData = ')
-        file.write(json.dumps(courses, indent=2))
+        if encoded:
+            file.write(json.dumps(dataset_to_json(build_columnar_dataset(courses)), separators=(',', ':')))
+        else:
+            file.write(json.dumps(courses, indent=2))
         file.write(';')
+
+def csv_to_js(csv_file, js_file):
+    """Convert CSV to JavaScript file"""
+    courses = read_course_csv(csv_file)
+    write_course_data_js(courses, js_file)
     
     print(f"Converted {len(courses)} courses to {js_file}")
     return courses
@@ -63,95 +96,124 @@ def filter_recent_courses(courses):
     
     return recent_courses
 
+# FLMBE catalog: the course titles that count towards each bucket
+FLMBE_CATALOG = {
+    'Society': [
+        'Social Entrepreneurship and Innovation',
+        'Culture (And Why It Matters)',
+        'The Legal Infrastructure of Business',
+        'Business with Purpose',
+        'Business, Politics, and Ethics',
+        'Designing a Good Life',
+        'Perspectives on Capitalism',
+        'The Firm and the Non-Market Environment',
+        'Impact Investing'
+    ],
+    'Economy': [
+        'Macroeconomics and the Business Environment',
+        'Money and Banking',
+        'Business in Historical Perspective',
+        'International Commercial Policy',
+        'International Financial Policy',
+        'The Wealth of Nations'
+    ],
+    'Strategy': [
+        'Platforms and Market Design',
+        'Competitive Strategy',
+        'Technology Strategy',
+        'Strategy Simulation: Creating Value in Complex and Ambiguous Settings',
+        'Strategy and Structure: Markets and Organizations',
+        'Game Theory'
+    ],
+    'People': [
+        'Leadership Studio',
+        'Managing in Organizations',
+        'Managing the Workplace',
+        'Power and Influence in Organizations',
+        'Diversity in Organizations'
+    ],
+    'Decisions': [
+        'Managerial Decision Modeling',
+        'The Study of Behavioral Economics',
+        'Internal Information for Strategic Decisions',
+        'Advanced Decision Models with Python',
+        'Managerial Decision Making'
+    ],
+    'Operations': [
+        'Supply Chain Strategy and Practice',
+        'Managing Service Operations',
+        'Operations Management: Business Process Fundamentals',
+        'Revenue Management'
+    ],
+    'Finance': [
+        'Entrepreneurial Finance and Private Equity',
+        'Asset Pricing I',
+        'Investments',
+        'Corporate Finance I',
+        'Corporation Finance',
+        'Cases in Financial Management',
+        'Corporate Finance II',
+        'Asset Pricing II',
+        'Portfolio Management',
+        'Advanced Investments',
+        'Fixed Income Asset Pricing',
+        'Debt, Distress, and Restructuring',
+        'International Corporate Finance'
+    ],
+    'Marketing': [
+        'Marketing Strategy',
+        'Marketing Strategy (with Sustainability Simulation)',
+        'Digital Marketing',
+        'Data Science for Marketing Decision Making',
+        'Consumer Behavior',
+        'Digital Marketing Lab',
+        'Lab in Developing New Products and Services',
+        'New Products and Services',
+        'Pricing Strategies',
+        'Brand Management in a Digital Age',
+        'Data-Driven Marketing',
+        'Experimental Marketing'
+    ]
+}
+
+# Reviewed mapping from title variants in the evaluations to catalog titles,
+# written by catalog_reconcile.py
+# Next to this module, so lookups do not depend on the working directory
+CATALOG_ALIASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog_aliases.json')
+
+# Flattened title -> bucket table and the alias file state it was built from
+_title_buckets = None
+_aliases_signature = None
+
+def load_catalog_aliases(path=None):
+    """Load the {dataset title: catalog title} alias table, or {} if there is none"""
+    path = path or CATALOG_ALIASES_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)['aliases']
+
 def get_course_bucket(course_title):
     """Determine which bucket a course belongs to"""
-    flmbe_categories = {
-        'Society': [
-            'Social Entrepreneurship and Innovation',
-            'Culture (And Why It Matters)',
-            'The Legal Infrastructure of Business',
-            'Business with Purpose',
-            'Business, Politics, and Ethics',
-            'Designing a Good Life',
-            'Perspectives on Capitalism',
-            'The Firm and the Non-Market Environment',
-            'Impact Investing'
-        ],
-        'Economy': [
-            'Macroeconomics and the Business Environment',
-            'Money and Banking',
-            'Business in Historical Perspective',
-            'International Commercial Policy',
-            'International Financial Policy',
-            'The Wealth of Nations'
-        ],
-        'Strategy': [
-            'Platforms and Market Design',
-            'Competitive Strategy',
-            'Technology Strategy',
-            'Strategy Simulation: Creating Value in Complex and Ambiguous Settings',
-            'Strategy and Structure: Markets and Organizations',
-            'Game Theory'
-        ],
-        'People': [
-            'Leadership Studio',
-            'Managing in Organizations',
-            'Managing the Workplace',
-            'Power and Influence in Organizations',
-            'Diversity in Organizations'
-        ],
-        'Decisions': [
-            'Managerial Decision Modeling',
-            'The Study of Behavioral Economics',
-            'Internal Information for Strategic Decisions',
-            'Advanced Decision Models with Python',
-            'Managerial Decision Making'
-        ],
-        'Operations': [
-            'Supply Chain Strategy and Practice',
-            'Managing Service Operations',
-            'Operations Management: Business Process Fundamentals',
-            'Revenue Management'
-        ],
-        'Finance': [
-            'Entrepreneurial Finance and Private Equity',
-            'Asset Pricing I',
-            'Investments',
-            'Corporate Finance I',
-            'Corporation Finance',
-            'Cases in Financial Management',
-            'Corporate Finance II',
-            'Asset Pricing II',
-            'Portfolio Management',
-            'Advanced Investments',
-            'Fixed Income Asset Pricing',
-            'Debt, Distress, and Restructuring',
-            'International Corporate Finance'
-        ],
-        'Marketing': [
-            'Marketing Strategy',
-            'Marketing Strategy (with Sustainability Simulation)',
-            'Digital Marketing',
-            'Data Science for Marketing Decision Making',
-            'Consumer Behavior',
-            'Digital Marketing Lab',
-            'Lab in Developing New Products and Services',
-            'New Products and Services',
-            'Pricing Strategies',
-            'Brand Management in a Digital Age',
-            'Data-Driven Marketing',
-            'Experimental Marketing'
-        ]
-    }
-    
-    for bucket, titles in flmbe_categories.items():
-        if course_title in titles:
-            return bucket
-    
-    return 'Other'
-
-def bucket_courses(courses, output_dir):
-    """Bucket courses by FLMBE categories"""
+    global _title_buckets, _aliases_signature
+    try:
+        stat = os.stat(CATALOG_ALIASES_FILE)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        signature = None
+    # Rebuilt when the alias file changes, so a long-running server picks up reviewed aliases
+    if _title_buckets is None or signature != _aliases_signature:
+        # Catalog titles and their reviewed aliases, flattened for exact lookups
+        title_buckets = {title: bucket for bucket, titles in FLMBE_CATALOG.items() for title in titles}
+        for alias, title in load_catalog_aliases(CATALOG_ALIASES_FILE).items():
+            if title in title_buckets:
+                title_buckets.setdefault(alias, title_buckets[title])
+        _title_buckets = title_buckets
+        _aliases_signature = signature
+    return _title_buckets.get(course_title, 'Other')
+
+def bucket_courses(courses, output_dir, write_categories=None):
+    """Bucket courses by FLMBE categories, writing only write_categories if given"""
     buckets = {}
     categories = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
     
@@ -170,7 +232,7 @@ def bucket_courses(courses, output_dir):
         os.makedirs(output_dir)
     
     for category, courses_list in buckets.items():
-        if courses_list:
+        if courses_list and (write_categories is None or category in write_categories):
             filename = f"{category.lower().replace(' ', '_')}_courses.js"
             filepath = os.path.join(output_dir, filename)
             
@@ -183,15 +245,19 @@ def bucket_courses(courses, output_dir):
     
     return buckets
 
-def calculate_course_score(course):
+# Default metric weights for the composite score
+DEFAULT_WEIGHTS = {
+    'overall': 0.3,
+    'recommendation': 0.25,
+    'clarity': 0.2,
+    'interest': 0.15,
+    'usefulness': 0.1
+}
+
+def calculate_course_score(course, weights=None):
     """Calculate a composite score for ranking courses"""
-    weights = {
-        'overall': 0.3,
-        'recommendation': 0.25,
-        'clarity': 0.2,
-        'interest': 0.15,
-        'usefulness': 0.1
-    }
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
     
     score = 0
     for metric, weight in weights.items():
@@ -201,24 +267,53 @@ def calculate_course_score(course):
     
     return score
 
-def generate_html_rankings(buckets, output_file, title, subtitle):
+def format_metric(value, suffix=''):
+    """Render a metric cell, showing a dash for a missing value"""
+    return '—' if value is None else f"{value}{suffix}"
+
+def format_percentile(course):
+    """Render a row's bucket and global percentiles, e.g. '97 / 99'"""
+    return f"{course['bucket_percentile']:.0f} / {course['global_percentile']:.0f}"
+
+def generate_html_rankings(buckets, output_file, title, subtitle, similar_courses=None, weights=None):
     """Generate HTML rankings from bucketed data"""
+    html_content = render_html_rankings(buckets, title, subtitle, similar_courses, weights)
+
+    # Write the HTML file
+    with open(output_file, 'w', encoding='utf-8') as file:
+        file.write(html_content)
+
+def render_html_rankings(buckets, title, subtitle, similar_courses=None, weights=None):
+    """Render HTML rankings from bucketed data"""
     
     # Calculate scores for all courses
     all_courses = []
     for category, courses in buckets.items():
         if category != 'Other':
             for course in courses:
-                course['composite_score'] = calculate_course_score(course)
+                course['composite_score'] = calculate_course_score(course, weights)
                 course['bucket'] = category
                 all_courses.append(course)
     
-    # Get top 15 from each bucket
+    # Imported here because bucket_rankings depends on calculate_course_score from this module
+    from bucket_rankings import RankedSet
+    from ranking_query import ranking_key
+
+    # Get top 15 and the score-vs-hours frontier layers from each bucket
     bucket_rankings = {}
+    bucket_frontiers = {}
+    global_scores = sorted(c['composite_score'] for c in all_courses)
     for bucket in ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']:
         bucket_courses = [c for c in all_courses if c['bucket'] == bucket]
-        bucket_ranked = sorted(bucket_courses, key=lambda x: x['composite_score'], reverse=True)
-        bucket_rankings[bucket] = bucket_ranked[:15]
+        bucket_rankings[bucket] = RankedSet(ranking_key, enumerate(bucket_courses)).top(15)
+        bucket_frontiers[bucket] = pareto_layers(bucket_courses)[:FRONTIER_LAYERS]
+
+        # Exact percentiles here; the streaming build estimates them with sketches
+        bucket_scores = sorted(c['composite_score'] for c in bucket_courses)
+        for course in bucket_rankings[bucket]:
+            course['bucket_percentile'] = percentile_rank(bucket_scores, course['composite_score'])
+            course['global_percentile'] = percentile_rank(global_scores, course['composite_score'])
+    global_frontier = pareto_layers(all_courses)[:FRONTIER_LAYERS]
     
     # Get all FLMBE course titles for the overview
     flmbe_course_titles = {
@@ -475,6 +570,12 @@ def generate_html_rankings(buckets, output_file, title, subtitle):
             font-weight: 500;
         }}
 
+        .course-similar {{
+            color: #2F4F4F;
+            font-size: 0.75rem;
+            font-style: italic;
+        }}
+
         .course-instructor {{
             color: #2F4F4F;
             font-size: 0.9rem;
@@ -520,6 +621,24 @@ def generate_html_rankings(buckets, output_file, title, subtitle):
             border-radius: 5px;
         }}
 
+        .subsection-title {{
+            font-size: 1.2rem;
+            font-weight: bold;
+            margin-top: 25px;
+            text-transform: uppercase;
+            color: #8B4513;
+        }}
+
+        .frontier-note {{
+            font-size: 0.9rem;
+            font-style: italic;
+            color: #2F4F4F;
+        }}
+
+        .frontier-table {{
+            min-width: 600px;
+        }}
+
         .love-header {{
             background: linear-gradient(135deg, #D4AF37 0%, #FFD700 50%, #B8860B 100%);
             border: 4px solid #8B4513;
@@ -750,28 +869,31 @@ def generate_html_rankings(buckets, output_file, title, subtitle):
                         <th>Useful</th>
                         <th>Hours</th>
                         <th>Score</th>
+                        <th>Percentile<br>(Bucket / All)</th>
                     </tr>
                 </thead>
                 <tbody>
 """
             
             for i, course in enumerate(bucket_rankings[bucket], 1):
+                similar_html = render_similar_courses(similar_courses, course['title'])
                 html_content += f"""
                     <tr>
                         <td class="rank">{i}</td>
                         <td>
-                            <div class="course-title">{course['title']}</div>
+                            <div class="course-title">{course['title']}</div>{similar_html}
                         </td>
                         <td class="course-id">{course['id']}</td>
                         <td class="course-instructor">{course['instructor']}</td>
                         <td class="course-term">{course['term']}</td>
-                        <td class="metric-value">{course['overall']}/5</td>
-                        <td class="metric-value">{course['recommendation']}/5</td>
-                        <td class="metric-value">{course['clarity']}/5</td>
-                        <td class="metric-value">{course['interest']}/5</td>
-                        <td class="metric-value">{course['usefulness']}/5</td>
-                        <td class="metric-value">{course['hoursPerWeek']}</td>
+                        <td class="metric-value">{format_metric(course['overall'], '/5')}</td>
+                        <td class="metric-value">{format_metric(course['recommendation'], '/5')}</td>
+                        <td class="metric-value">{format_metric(course['clarity'], '/5')}</td>
+                        <td class="metric-value">{format_metric(course['interest'], '/5')}</td>
+                        <td class="metric-value">{format_metric(course['usefulness'], '/5')}</td>
+                        <td class="metric-value">{format_metric(course['hoursPerWeek'])}</td>
                         <td class="composite-score">{course['composite_score']:.2f}</td>
+                        <td class="metric-value">{format_percentile(course)}</td>
                     </tr>
 """
             
@@ -779,6 +901,20 @@ def generate_html_rankings(buckets, output_file, title, subtitle):
                 </tbody>
             </table>
             </div>
+"""
+            html_content += render_frontier_table(bucket_frontiers[bucket], f"{bucket} Score vs Workload Frontier")
+            html_content += """
+        </div>
+"""
+
+    # Add global frontier across all FLMBE buckets
+    if global_frontier:
+        html_content += """
+        <div class="section">
+            <h2 class="section-title">⚖️ All FLMBE Score vs Workload Frontier</h2>
+"""
+        html_content += render_frontier_table(global_frontier, "Across All Buckets", show_bucket=True)
+        html_content += """
         </div>
 """
 
@@ -793,12 +929,79 @@ def generate_html_rankings(buckets, output_file, title, subtitle):
 </html>
 """
 
-    # Write the HTML file
-    with open(output_file, 'w', encoding='utf-8') as file:
-        file.write(html_content)
+    return html_content
+
+def render_similar_courses(similar_courses, course_title):
+    """Render the precomputed similar-course hints for a ranking row"""
+    if not similar_courses or course_title not in similar_courses:
+        return ""
+
+    entry = similar_courses[course_title]
+    html_content = ""
+    if entry['similar']:
+        html_content += f"""
+                            <div class="course-similar">Similar: {', '.join(entry['similar'])}</div>"""
+    if entry['fewer_hours']:
+        html_content += f"""
+                            <div class="course-similar">Lighter: {', '.join(entry['fewer_hours'])}</div>"""
+    return html_content
+
+def render_frontier_table(layers, heading, show_bucket=False):
+    """Render score-vs-hours frontier layers as an HTML table"""
+    if not layers:
+        return ""
+
+    bucket_header = "\n                        <th>Bucket</th>" if show_bucket else ""
+    html_content = f"""
+            <h3 class="subsection-title">{heading}</h3>
+            <p class="frontier-note">Tier 1 courses have no other course with a higher score for fewer hours; tier 2 is the frontier once tier 1 is set aside.</p>
+            <div class="table-wrapper">
+                <table class="rankings-table frontier-table">
+                <thead>
+                    <tr>
+                        <th>Tier</th>
+                        <th>Course Title</th>{bucket_header}
+                        <th>Instructor</th>
+                        <th>Term</th>
+                        <th>Hours</th>
+                        <th>Score</th>
+                    </tr>
+                </thead>
+                <tbody>
+"""
+    for tier, layer in enumerate(layers, 1):
+        for course in layer:
+            bucket_cell = f"\n                        <td class=\"course-id\">{course['bucket']}</td>" if show_bucket else ""
+            html_content += f"""
+                    <tr>
+                        <td class="rank">{tier}</td>
+                        <td>
+                            <div class="course-title">{course['title']}</div>
+                        </td>{bucket_cell}
+                        <td class="course-instructor">{course['instructor']}</td>
+                        <td class="course-term">{course['term']}</td>
+                        <td class="metric-value">{format_metric(course['hoursPerWeek'])}</td>
+                        <td class="composite-score">{course['composite_score']:.2f}</td>
+                    </tr>
+"""
+
+    html_content += """
+                </tbody>
+            </table>
+            </div>
+"""
+    return html_content
 
 def generate_index_page():
     """Generate the main index page with navigation to both data sets"""
+    html_content = render_index_page()
+
+    # Write the index HTML file
+    with open('docs/index.html', 'w', encoding='utf-8') as file:
+        file.write(html_content)
+
+def render_index_page():
+    """Render the main index page with navigation to both data sets"""
     html_content = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -1038,25 +1241,35 @@ def generate_index_page():
 </body>
 </html>"""
 
-    # Write the index HTML file
-    with open('docs/index.html', 'w', encoding='utf-8') as file:
-        file.write(html_content)
+    return html_content
 
 def main():
     print("🚀 Starting complete FLMBE workflow...")
     
-    # Step 1: Convert CSV to course_data.js
-    print("\n📊 Step 1: Converting CSV to course_data.js...")
-    all_courses = csv_to_js('booth_course_evals.csv', 'course_data.js')
+    # Step 1: Load the CSV exports into the course database and export course_data.js
+    sources = sys.argv[1:] or ['booth_course_evals.csv']
+    print(f"\n📊 Step 1: Loading {', '.join(sources)} into course_rankings.db...")
+    # Imported here because multi_source depends on read_course_csv from this module
+    from multi_source import read_sources
+    conn = course_db.connect(course_db.DEFAULT_DB)
+    course_db.load_courses(conn, dataset_to_courses(read_sources(sources)))
+    all_courses = course_db.fetch_courses(conn)
+    write_course_data_js(all_courses, 'course_data.js')
+    write_course_data_js(all_courses, ENCODED_COURSE_DATA_FILE, encoded=True)
+    print(f"Exported {len(all_courses)} courses to course_data.js and {ENCODED_COURSE_DATA_FILE}")
+    dataset = build_columnar_dataset(all_courses)
+    version = write_dataset_file(dataset, DEFAULT_DATASET_FILE)
+    print(f"Wrote {DEFAULT_DATASET_FILE} for the ranking server (version {version[:12]})")
+    # Imported here because term_aggregates depends on calculate_course_score from this module
+    from term_aggregates import DEFAULT_AGGREGATES_FILE, build_prefix_aggregates, save_prefix_aggregates
+    save_prefix_aggregates(build_prefix_aggregates(dataset, 'title'), DEFAULT_AGGREGATES_FILE)
+    print(f"Wrote term prefix aggregates to {DEFAULT_AGGREGATES_FILE}")
     
-    # Step 2: Create cleaned_course_data.js (recent data)
-    print("\n📊 Step 2: Creating cleaned_course_data.js (recent data)...")
-    recent_courses = filter_recent_courses(all_courses)
-    
-    with open('cleaned_course_data.js', 'w') as file:
-        file.write('const courseData = ')
-        file.write(json.dumps(recent_courses, indent=2))
-        file.write(';')
+    # Step 2: Export cleaned_course_data.js (recent data)
+    print("\n📊 Step 2: Exporting cleaned_course_data.js (recent data)...")
+    recent_courses = course_db.fetch_recent_courses(conn)
+    write_course_data_js(recent_courses, 'cleaned_course_data.js')
+    conn.close()
     
     print(f"Created cleaned_course_data.js with {len(recent_courses)} recent courses")
     
@@ -1068,28 +1281,48 @@ def main():
     print("\n📊 Step 4: Bucketing recent data...")
     recent_buckets = bucket_courses(recent_courses, 'buckets_recent')
     
-    # Step 5: Generate HTML for all data
-    print("\n📊 Step 5: Generating HTML for all data...")
+    # Step 5: Materialize the default ranking views next to the bucket files
+    print("\n📊 Step 5: Materializing ranking views...")
+    # Imported here because materialized_views depends on calculate_course_score from this module
+    from materialized_views import build_materialized_views
+    build_materialized_views(all_buckets, 'buckets_all')
+    build_materialized_views(recent_buckets, 'buckets_recent')
+    
+    # Step 6: Precompute similar courses for the ranking pages
+    print("\n📊 Step 6: Precomputing similar courses...")
+    # Imported here because similar_courses depends on get_course_bucket from this module
+    from similar_courses import precompute_similar_courses
+    similar_courses = precompute_similar_courses(all_courses, k=3)
+    print(f"Found neighbours for {len(similar_courses)} courses")
+    
+    # Step 7: Generate HTML for all data
+    print("\n📊 Step 7: Generating HTML for all data...")
     generate_html_rankings(all_buckets, 'docs/all.html', 
                           'FLMBE Course Rankings - All Data', 
-                          'Based on ALL student evaluations from the complete dataset')
+                          'Based on ALL student evaluations from the complete dataset',
+                          similar_courses)
     
-    # Step 6: Generate HTML for recent data
-    print("\n📊 Step 6: Generating HTML for recent data...")
+    # Step 8: Generate HTML for recent data
+    print("\n📊 Step 8: Generating HTML for recent data...")
     generate_html_rankings(recent_buckets, 'docs/recent.html', 
                           'FLMBE Course Rankings - Recent Data', 
-                          'Based on student evaluations from the most recent 2 years')
+                          'Based on student evaluations from the most recent 2 years',
+                          similar_courses)
     
-    # Step 7: Generate index page with navigation
-    print("\n📊 Step 7: Generating index page with navigation...")
+    # Step 9: Generate index page with navigation
+    print("\n📊 Step 9: Generating index page with navigation...")
     generate_index_page()
     
     print("\n✅ Complete workflow finished!")
     print("\n📁 Generated files:")
+    print("  - course_rankings.db (course database)")
     print("  - course_data.js (all data)")
+    print(f"  - {ENCODED_COURSE_DATA_FILE} (all data, dictionary-encoded)")
     print("  - cleaned_course_data.js (recent data)")
+    print("  - term_aggregates.json (per-course term prefix sums)")
     print("  - buckets_all/ (all data buckets)")
     print("  - buckets_recent/ (recent data buckets)")
+    print("  - buckets_all/views.json, buckets_recent/views.json (materialized ranking views)")
     print("  - docs/index.html (navigation page)")
     print("  - docs/all.html (all data rankings)")
     print("  - docs/recent.html (recent data rankings)")
@@ -0,0 +1,213 @@
+import re
+from array import array
+
+# Numeric metric columns, in the same order csv_to_js writes them
+METRIC_FIELDS = ['hoursPerWeek', 'clarity', 'interest', 'usefulness', 'overall', 'recommendation']
+
+# Integer count columns
+COUNT_FIELDS = ['respondentCount']
+
+# String columns stored as integer codes into a shared dictionary
+STRING_FIELDS = ['id', 'title', 'instructor', 'term']
+
+# Integer columns parsed from the id: '33501 02' is department 33, course
+# number 33501, section 2. An id that does not parse gets MISSING_CODE.
+CODE_FIELDS = ['department', 'courseNumber', 'section']
+CODE_TYPECODES = {'department': 'H', 'courseNumber': 'I', 'section': 'H'}
+MISSING_CODE = 0
+
+# Float metric columns store a missing (unanswered) metric as NaN
+MISSING_METRIC = float('nan')
+
+# Quantized datasets store metrics as integer tenths: ratings (0-5) fit a
+# byte, hours need two. The largest value of each type marks a missing metric.
+QUANTIZED_TYPECODES = {field: 'B' for field in METRIC_FIELDS}
+QUANTIZED_TYPECODES['hoursPerWeek'] = 'H'
+MISSING_TENTHS = {'B': 0xFF, 'H': 0xFFFF}
+
+# Chronological order of seasons within a calendar year
+SEASON_ORDER = {'Winter': 0, 'Spring': 1, 'Summer': 2, 'Autumn': 3}
+
+def term_ordinal(term):
+    """Map a term like 'Autumn 2024' to a sortable integer (None if unparseable)"""
+    match = re.match(r'\s*(Winter|Spring|Summer|Autumn)\s+(\d{4})\s*$', term or '')
+    if not match:
+        return None
+    return int(match.group(2)) * 4 + SEASON_ORDER[match.group(1)]
+
+def parse_course_code(code):
+    """Split an id like '33501 02' into integers (33, 33501, 2), or None if it does not parse"""
+    # Sections are capped at four digits so they fit the 16-bit section column
+    match = re.match(r'\s*(\d{2})(\d{3})\s+(\d{1,4})\s*$', code or '', re.ASCII)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(1) + match.group(2)), int(match.group(3))
+
+def quantize(value, typecode):
+    """Convert a metric to integer tenths, or the missing sentinel"""
+    if not isinstance(value, (int, float)) or value != value:
+        return MISSING_TENTHS[typecode]
+    return min(max(round(value * 10), 0), MISSING_TENTHS[typecode] - 1)
+
+def column_typecode(values):
+    """Element type of a column, whether an array or a memoryview"""
+    return getattr(values, 'typecode', None) or values.format
+
+def is_quantized(values):
+    """True if a metric column holds integer tenths"""
+    return column_typecode(values) in MISSING_TENTHS
+
+def column_values(dataset, field, missing=None):
+    """Decode a whole numeric column into a list, mapping missing metrics to missing"""
+    values = dataset['columns'][field]
+    if field not in METRIC_FIELDS:
+        return list(values)
+    if not is_quantized(values):
+        return [missing if value != value else value for value in values]
+    sentinel = MISSING_TENTHS[column_typecode(values)]
+    table = [tenths / 10 for tenths in range(sentinel)] + [missing]
+    return [table[tenths] for tenths in values]
+
+def encode_strings(values):
+    """Dictionary-encode a sequence of strings into (dictionary, codes)"""
+    dictionary = []
+    lookup = {}
+    codes = array('I')
+    for value in values:
+        code = lookup.get(value)
+        if code is None:
+            code = len(dictionary)
+            lookup[value] = code
+            dictionary.append(value)
+        codes.append(code)
+    return dictionary, codes
+
+def build_columnar_dataset(courses, quantized=False):
+    """Build a columnar dataset from a list of course dicts
+
+    Metrics are floats with a missing metric stored as NaN, or with
+    quantized=True integer tenths (see QUANTIZED_TYPECODES); either way a
+    missing metric stays distinguishable from 0.
+    """
+    columns = {}
+    dictionaries = {}
+
+    for field in METRIC_FIELDS:
+        if quantized:
+            typecode = QUANTIZED_TYPECODES[field]
+            values = array(typecode, (quantize(course.get(field), typecode) for course in courses))
+        else:
+            values = array('d')
+            for course in courses:
+                value = course.get(field)
+                values.append(float(value) if isinstance(value, (int, float)) else MISSING_METRIC)
+        columns[field] = values
+
+    for field in COUNT_FIELDS:
+        values = array('I')
+        for course in courses:
+            value = course.get(field, 0)
+            values.append(int(value) if isinstance(value, (int, float)) and value > 0 else 0)
+        columns[field] = values
+
+    for field in STRING_FIELDS:
+        dictionary, codes = encode_strings(course.get(field, '') for course in courses)
+        dictionaries[field] = dictionary
+        columns[field] = codes
+
+    dataset = {
+        'size': len(courses),
+        'columns': columns,
+        'dictionaries': dictionaries
+    }
+    add_code_columns(dataset)
+    return dataset
+
+def add_code_columns(dataset):
+    """Add the CODE_FIELDS columns, parsing each distinct id once and expanding through the id codes"""
+    parsed = [parse_course_code(code) or (MISSING_CODE,) * len(CODE_FIELDS) for code in dataset['dictionaries']['id']]
+    for i, field in enumerate(CODE_FIELDS):
+        dataset['columns'][field] = array(CODE_TYPECODES[field], (parsed[code][i] for code in dataset['columns']['id']))
+
+def dataset_to_json(dataset):
+    """JSON-ready form of a dataset: each dictionary once, columns as plain lists
+
+    Missing float metrics become null, since JSON has no NaN.
+    """
+    return {
+        'size': dataset['size'],
+        'dictionaries': {field: list(values) for field, values in dataset['dictionaries'].items()},
+        'typecodes': {field: column_typecode(values) for field, values in dataset['columns'].items()},
+        'columns': {field: [None if value != value else value for value in values]
+                    for field, values in dataset['columns'].items()}
+    }
+
+def dataset_from_json(payload):
+    """Rebuild a dataset from dataset_to_json output"""
+    typecodes = payload.get('typecodes', {})
+    columns = {}
+    for field, values in payload['columns'].items():
+        typecode = typecodes.get(field, 'd' if field in METRIC_FIELDS else 'I')
+        if typecode == 'd':
+            values = [MISSING_METRIC if value is None else value for value in values]
+        columns[field] = array(typecode, values)
+    return {
+        'size': payload['size'],
+        'columns': columns,
+        'dictionaries': payload['dictionaries']
+    }
+
+def get_value(dataset, field, index):
+    """Read one decoded value from the dataset (None for a missing metric)"""
+    values = dataset['columns'][field]
+    value = values[index]
+    if field in dataset['dictionaries']:
+        return dataset['dictionaries'][field][value]
+    if field in METRIC_FIELDS:
+        if is_quantized(values):
+            return None if value == MISSING_TENTHS[column_typecode(values)] else value / 10
+        return None if value != value else value
+    return value
+
+def composite_scores(dataset, weights, rows=None):
+    """Composite score per row, computed on the stored columns
+
+    Matches calculate_course_score: missing (NaN) and non-positive metrics
+    add nothing. Quantized columns are scored through a per-metric lookup table
+    indexed by tenths, so no per-row decoding is needed.
+    """
+    if rows is None:
+        rows = range(dataset['size'])
+    terms = []
+    for field, weight in weights.items():
+        values = dataset['columns'].get(field)
+        if values is None or field in dataset['dictionaries']:
+            continue
+        if field in METRIC_FIELDS and is_quantized(values):
+            sentinel = MISSING_TENTHS[column_typecode(values)]
+            table = [(tenths / 10) * weight if tenths > 0 else 0 for tenths in range(sentinel)] + [0]
+            terms.append((values, table))
+        else:
+            terms.append((values, weight))
+
+    scores = []
+    for row in rows:
+        score = 0
+        for values, factor in terms:
+            if isinstance(factor, list):
+                score += factor[values[row]]
+            elif values[row] > 0:
+                score += values[row] * factor
+        scores.append(score)
+    return scores
+
+def dataset_to_courses(dataset):
+    """Convert a columnar dataset back into a list of course dicts"""
+    fields = STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS
+    # Datasets merged by multi_source also name the export each row came from
+    if 'source' in dataset['columns']:
+        fields = fields + ['source']
+    courses = []
+    for index in range(dataset['size']):
+        courses.append({field: get_value(dataset, field, index) for field in fields})
+    return courses
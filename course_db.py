@@ -0,0 +1,270 @@
+import hashlib
+import json
+import sqlite3
+import sys
+
+from course_dataset import COUNT_FIELDS, METRIC_FIELDS, MISSING_CODE, STRING_FIELDS, parse_course_code, term_ordinal
+
+DEFAULT_DB = 'course_rankings.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    ordinal INTEGER
+);
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS instructors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    row_order INTEGER NOT NULL,
+    row_key TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    code TEXT NOT NULL,
+    department INTEGER NOT NULL,
+    course_number INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    course_id INTEGER NOT NULL REFERENCES courses(id),
+    instructor_id INTEGER NOT NULL REFERENCES instructors(id),
+    term_id INTEGER NOT NULL REFERENCES terms(id),
+    respondent_count INTEGER NOT NULL,
+    hours_per_week REAL,
+    clarity REAL,
+    interest REAL,
+    usefulness REAL,
+    overall REAL,
+    recommendation REAL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_terms_ordinal ON terms(ordinal);
+CREATE INDEX IF NOT EXISTS idx_sections_course ON sections(course_id);
+CREATE INDEX IF NOT EXISTS idx_sections_department ON sections(department, course_number);
+CREATE INDEX IF NOT EXISTS idx_sections_course_number ON sections(course_number);
+CREATE INDEX IF NOT EXISTS idx_sections_instructor ON sections(instructor_id);
+CREATE INDEX IF NOT EXISTS idx_sections_term ON sections(term_id);
+CREATE INDEX IF NOT EXISTS idx_sections_row_order ON sections(row_order);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sections_row_key ON sections(row_key);
+"""
+
+# Section columns in the order csv_to_js writes the matching course fields
+METRIC_COLUMNS = [
+    ('hoursPerWeek', 'hours_per_week'),
+    ('clarity', 'clarity'),
+    ('interest', 'interest'),
+    ('usefulness', 'usefulness'),
+    ('overall', 'overall'),
+    ('recommendation', 'recommendation')
+]
+
+COURSE_QUERY = f"""
+SELECT s.code, c.title, i.name, t.name, s.respondent_count,
+       {', '.join('s.' + column for _, column in METRIC_COLUMNS)}
+FROM sections s
+JOIN courses c ON c.id = s.course_id
+JOIN instructors i ON i.id = s.instructor_id
+JOIN terms t ON t.id = s.term_id
+"""
+
+def connect(db_file=DEFAULT_DB):
+    """Open the course database, creating the schema if needed"""
+    conn = sqlite3.connect(db_file)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+def row_keys(courses):
+    """Identity of each row: section id, term and instructor
+
+    The evaluation export repeats a handful of rows verbatim, so each key
+    also carries its occurrence number to stay unique.
+    """
+    seen = {}
+    keys = []
+    for course in courses:
+        base = f"{course['id']}|{course['term']}|{course['instructor']}"
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        keys.append(f"{base}|{occurrence}")
+    return keys
+
+def row_hash(course):
+    """Content hash of every source field of a row"""
+    row = [course.get(field) for field in STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS]
+    return hashlib.sha1(json.dumps(row).encode('utf-8')).hexdigest()
+
+def split_course_code(code):
+    """Split an id like '33501 02' into integers (33, 33501, 2), with MISSING_CODE if it does not parse"""
+    return parse_course_code(code) or (MISSING_CODE, MISSING_CODE, MISSING_CODE)
+
+INSERT_SECTION = f"""
+INSERT INTO sections (row_order, row_key, row_hash, code, department, course_number, section, course_id,
+                      instructor_id, term_id, respondent_count, {', '.join(column for _, column in METRIC_COLUMNS)},
+                      source)
+VALUES ({', '.join('?' * (12 + len(METRIC_COLUMNS)))})
+"""
+
+def _section_values(order, key, course, term_ids, course_ids, instructor_ids):
+    """Parameters for INSERT_SECTION, in column order
+
+    source is the export a row was read from (see multi_source), or None
+    for rows that did not come through it.
+    """
+    return (order, key, row_hash(course), course['id'], *split_course_code(course['id']),
+            course_ids[course['title']], instructor_ids[course['instructor']], term_ids[course['term']],
+            course.get('respondentCount', 0), *(course.get(field, 0) for field, _ in METRIC_COLUMNS),
+            course.get('source'))
+
+def _drop_orphan_dimensions(conn):
+    """Drop dimension rows no longer referenced by any section"""
+    conn.execute("DELETE FROM courses WHERE id NOT IN (SELECT course_id FROM sections)")
+    conn.execute("DELETE FROM instructors WHERE id NOT IN (SELECT instructor_id FROM sections)")
+    conn.execute("DELETE FROM terms WHERE id NOT IN (SELECT term_id FROM sections)")
+
+def _dimension_ids(conn, table, column, values, extra=None):
+    """Insert any new dimension values and return a value -> id map"""
+    if extra:
+        conn.executemany(f"INSERT OR IGNORE INTO {table} ({column}, {extra[0]}) VALUES (?, ?)",
+                         [(value, extra[1](value)) for value in values])
+    else:
+        conn.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(value,) for value in values])
+    return {value: row_id for row_id, value in conn.execute(f"SELECT id, {column} FROM {table}")}
+
+def load_courses(conn, courses):
+    """Replace all sections with the given course rows in one transaction"""
+    with conn:
+        term_ids = _dimension_ids(conn, 'terms', 'name', {c['term'] for c in courses}, ('ordinal', term_ordinal))
+        course_ids = _dimension_ids(conn, 'courses', 'title', {c['title'] for c in courses})
+        instructor_ids = _dimension_ids(conn, 'instructors', 'name', {c['instructor'] for c in courses})
+
+        conn.execute("DELETE FROM sections")
+        conn.executemany(INSERT_SECTION, [
+            _section_values(order, key, c, term_ids, course_ids, instructor_ids)
+            for order, (key, c) in enumerate(zip(row_keys(courses), courses))
+        ])
+        _drop_orphan_dimensions(conn)
+
+    print(f"Loaded {len(courses)} sections into the course database")
+
+def fetch_row_hashes(conn):
+    """Return {row_key: (term, source, row_hash)} for every stored section, in ingest order"""
+    return {key: (term, source, digest) for key, term, source, digest in conn.execute(
+        "SELECT s.row_key, t.name, s.source, s.row_hash FROM sections s JOIN terms t ON t.id = s.term_id"
+        " ORDER BY s.row_order")}
+
+def apply_delta(conn, delta):
+    """Apply a delta from incremental_ingest.diff_courses in one transaction
+
+    Changed rows are updated in place and keep their position; added rows
+    go after every existing row. A row's source only moves to a new export
+    when its content changes. Returns the stored versions of the
+    changed and deleted rows as they were before the update.
+    """
+    added, changed, deleted = delta['added'], delta['changed'], delta['deleted']
+    with conn:
+        previous = fetch_courses_by_key(conn, [key for key, _ in changed] + deleted)
+
+        incoming = [course for _, course in added + changed]
+        term_ids = _dimension_ids(conn, 'terms', 'name', {c['term'] for c in incoming}, ('ordinal', term_ordinal))
+        course_ids = _dimension_ids(conn, 'courses', 'title', {c['title'] for c in incoming})
+        instructor_ids = _dimension_ids(conn, 'instructors', 'name', {c['instructor'] for c in incoming})
+
+        conn.executemany("DELETE FROM sections WHERE row_key = ?", [(key,) for key in deleted])
+        conn.executemany(
+            f"""UPDATE sections SET row_hash = ?, code = ?, department = ?, course_number = ?, section = ?, course_id = ?,
+                                    instructor_id = ?, term_id = ?, respondent_count = ?,
+                                    {', '.join(f'{column} = ?' for _, column in METRIC_COLUMNS)}, source = ?
+                WHERE row_key = ?""",
+            [(*_section_values(None, key, c, term_ids, course_ids, instructor_ids)[2:], key)
+             for key, c in changed]
+        )
+        next_order = conn.execute("SELECT COALESCE(MAX(row_order) + 1, 0) FROM sections").fetchone()[0]
+        conn.executemany(INSERT_SECTION, [
+            _section_values(next_order + i, key, c, term_ids, course_ids, instructor_ids)
+            for i, (key, c) in enumerate(added)
+        ])
+        _drop_orphan_dimensions(conn)
+
+    print(f"Applied delta: {len(added)} added, {len(changed)} changed, {len(deleted)} deleted")
+    return previous
+
+def _row_to_course(row):
+    """Convert a COURSE_QUERY row into the course dict csv_to_js produces"""
+    # SQLite returns a fresh string per row; intern the repeated ones
+    course = {
+        'id': sys.intern(row[0]),
+        'title': sys.intern(row[1]),
+        'instructor': sys.intern(row[2]),
+        'term': sys.intern(row[3]),
+        'respondentCount': row[4]
+    }
+    for (field, _), value in zip(METRIC_COLUMNS, row[5:]):
+        course[field] = value
+    return course
+
+def fetch_courses(conn, where='', params=()):
+    """Return course dicts in ingest order, optionally filtered by a WHERE clause"""
+    query = COURSE_QUERY + (f" WHERE {where}" if where else "") + " ORDER BY s.row_order"
+    return [_row_to_course(row) for row in conn.execute(query, params)]
+
+def fetch_courses_by_key(conn, keys=None):
+    """Return {row_key: course} in ingest order, for the given row keys or for every section"""
+    query = COURSE_QUERY.replace('SELECT ', 'SELECT s.row_key, ', 1)
+    if keys is None:
+        rows = conn.execute(query + " ORDER BY s.row_order").fetchall()
+    else:
+        keys = list(keys)
+        rows = []
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows.extend(conn.execute(query + f" WHERE s.row_key IN ({', '.join('?' * len(chunk))})"
+                                     " ORDER BY s.row_order", chunk))
+    return {row[0]: _row_to_course(row[1:]) for row in rows}
+
+def fetch_terms(conn):
+    """Return the names of every term that has sections"""
+    return [row[0] for row in conn.execute("SELECT name FROM terms")]
+
+def fetch_recent_courses(conn, years=2):
+    """Return the sections from the most recent calendar years, using the term ordinal index"""
+    recent_years = [row[0] for row in conn.execute(
+        "SELECT DISTINCT ordinal / 4 FROM terms WHERE ordinal IS NOT NULL ORDER BY 1 DESC LIMIT ?", (years,))]
+    if not recent_years:
+        return []
+    print(f"Most recent years found: {recent_years}")
+    return fetch_courses(conn, "t.ordinal >= ?", (min(recent_years) * 4,))
+
+def fetch_courses_by_instructor(conn, instructor):
+    """Return every section taught by an instructor"""
+    return fetch_courses(conn, "i.name = ?", (instructor,))
+
+def fetch_courses_by_number(conn, course_number):
+    """Return every section of a course number such as 35200"""
+    return fetch_courses(conn, "s.course_number = ?", (int(course_number),))
+
+def fetch_courses_by_department(conn, department):
+    """Return every section of a department such as 35, using the department index"""
+    return fetch_courses(conn, "s.department = ?", (department,))
+
+def fetch_department_summary(conn):
+    """Sections, distinct course numbers and respondents per department, from integer group-bys"""
+    query = """
+        SELECT department, COUNT(*), COUNT(DISTINCT course_number), SUM(respondent_count)
+        FROM sections GROUP BY department ORDER BY department
+    """
+    return [{'department': row[0], 'sections': row[1], 'courseNumbers': row[2], 'respondentCount': row[3]}
+            for row in conn.execute(query)]
+
+def fetch_source_summary(conn):
+    """Sections per source export, in the order the exports were first loaded"""
+    query = """
+        SELECT source, COUNT(*) FROM sections GROUP BY source ORDER BY MIN(row_order)
+    """
+    return [{'source': row[0], 'sections': row[1]} for row in conn.execute(query)]
@@ -0,0 +1,105 @@
+from course_dataset import build_columnar_dataset, composite_scores, term_ordinal
+from complete_workflow import DEFAULT_WEIGHTS, get_course_bucket
+
+BUCKETS = ['Finance', 'Marketing', 'Operations', 'Decisions', 'People', 'Strategy', 'Economy', 'Society']
+
+# Term ordinals advance by 4 per calendar year
+TERMS_PER_YEAR = 4
+
+def fit_group_trends(dataset, key_fields, min_sections=3):
+    """Fit a respondent-weighted score-vs-term slope for every group in one pass
+
+    Each group keeps the five running sums of weighted least squares
+    (sum w, wx, wy, wxx, wxy); the slope then has a closed form, so no
+    per-group regression loop is needed.
+    """
+    columns = dataset['columns']
+    dictionaries = dataset['dictionaries']
+    term_ordinals = [term_ordinal(term) for term in dictionaries['term']]
+    buckets = [get_course_bucket(title) for title in dictionaries['title']]
+
+    scores = composite_scores(dataset, DEFAULT_WEIGHTS)
+    sums = {}
+    for index in range(dataset['size']):
+        x = term_ordinals[columns['term'][index]]
+        if x is None:
+            continue
+
+        y = scores[index]
+        respondents = columns['respondentCount'][index]
+        w = respondents if respondents > 0 else 1
+
+        values = {
+            'title': dictionaries['title'][columns['title'][index]],
+            'instructor': dictionaries['instructor'][columns['instructor'][index]],
+            'bucket': buckets[columns['title'][index]]
+        }
+        key = tuple(values[field] for field in key_fields)
+        group = sums.get(key)
+        if group is None:
+            group = sums[key] = [0, 0.0, 0.0, 0.0, 0.0, 0.0, set()]
+        group[0] += 1
+        group[1] += w
+        group[2] += w * x
+        group[3] += w * y
+        group[4] += w * x * x
+        group[5] += w * x * y
+        group[6].add(x)
+
+    trends = []
+    for key, (count, sw, swx, swy, swxx, swxy, terms) in sums.items():
+        denominator = sw * swxx - swx * swx
+        if count < min_sections or len(terms) < 2 or denominator <= 0:
+            continue
+        slope = (sw * swxy - swx * swy) / denominator
+        trend = dict(zip(key_fields, key))
+        trend.update({
+            'sections': count,
+            'terms': len(terms),
+            'mean_score': swy / sw,
+            'slope_per_year': slope * TERMS_PER_YEAR
+        })
+        trends.append(trend)
+
+    return trends
+
+def rising_and_declining(trends, limit=5):
+    """Split trends into per-bucket rising and declining lists"""
+    report = {bucket: {'rising': [], 'declining': []} for bucket in BUCKETS}
+    for trend in trends:
+        bucket = trend.get('bucket')
+        if bucket not in report:
+            continue
+        if trend['slope_per_year'] > 0:
+            report[bucket]['rising'].append(trend)
+        elif trend['slope_per_year'] < 0:
+            report[bucket]['declining'].append(trend)
+
+    for lists in report.values():
+        lists['rising'] = sorted(lists['rising'], key=lambda x: x['slope_per_year'], reverse=True)[:limit]
+        lists['declining'] = sorted(lists['declining'], key=lambda x: x['slope_per_year'])[:limit]
+    return report
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    courses = load_course_data_from_js('course_data.js')
+    dataset = build_columnar_dataset(courses)
+
+    course_trends = fit_group_trends(dataset, ('bucket', 'title'))
+    instructor_trends = fit_group_trends(dataset, ('bucket', 'instructor'))
+    print(f"Fitted {len(course_trends)} course trends and {len(instructor_trends)} instructor trends")
+
+    for label, trends, name_field in [('Courses', course_trends, 'title'),
+                                      ('Instructors', instructor_trends, 'instructor')]:
+        report = rising_and_declining(trends)
+        print(f"\n{label}:")
+        for bucket in BUCKETS:
+            print(f"  {bucket}")
+            for direction in ['rising', 'declining']:
+                for trend in report[bucket][direction]:
+                    print(f"    {direction:9} {trend[name_field]}: "
+                          f"{trend['slope_per_year']:+.2f}/yr over {trend['terms']} terms")
+
+if __name__ == "__main__":
+    main()
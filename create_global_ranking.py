@@ -2,121 +2,23 @@ import json
 import os
 from datetime import datetime
 
+from course_dataset import dataset_from_json, dataset_to_courses
+from complete_workflow import calculate_course_score, format_metric, get_course_bucket
+
 def load_course_data_from_js(file_path):
     """Load course data from JavaScript file"""
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
     
-    # Extract the JSON array from the JavaScript file
-    start = content.find('[')
-    end = content.rfind(']') + 1
-    json_str = content[start:end]
-    
-    return json.loads(json_str)
-
-def calculate_course_score(course):
-    """Calculate a composite score for ranking courses"""
-    # Weight different metrics
-    weights = {
-        'overall': 0.3,
-        'recommendation': 0.25,
-        'clarity': 0.2,
-        'interest': 0.15,
-        'usefulness': 0.1
-    }
-    
-    score = 0
-    for metric, weight in weights.items():
-        value = course.get(metric, 0)
-        if isinstance(value, (int, float)) and value > 0:
-            score += value * weight
-    
-    return score
+    # Extract the JSON payload from the JavaScript file
+    start = min(i for i in (content.find('['), content.find('{'), len(content)) if i != -1)
+    end = max(content.rfind(']'), content.rfind('}')) + 1
+    data = json.loads(content[start:end])
 
-def get_course_bucket(course_title):
-    """Determine which bucket a course belongs to"""
-    # Define FLMBE categories with their course titles
-    flmbe_categories = {
-        'Society': [
-            'Social Entrepreneurship and Innovation',
-            'Culture (And Why It Matters)',
-            'The Legal Infrastructure of Business',
-            'Business with Purpose',
-            'Business, Politics, and Ethics',
-            'Designing a Good Life',
-            'Perspectives on Capitalism',
-            'The Firm and the Non-Market Environment',
-            'Impact Investing'
-        ],
-        'Economy': [
-            'Macroeconomics and the Business Environment',
-            'Money and Banking',
-            'Business in Historical Perspective',
-            'International Commercial Policy',
-            'International Financial Policy',
-            'The Wealth of Nations'
-        ],
-        'Strategy': [
-            'Platforms and Market Design',
-            'Competitive Strategy',
-            'Technology Strategy',
-            'Strategy Simulation: Creating Value in Complex and Ambiguous Settings',
-            'Strategy and Structure: Markets and Organizations',
-            'Game Theory'
-        ],
-        'People': [
-            'Leadership Studio',
-            'Managing in Organizations',
-            'Managing the Workplace',
-            'Power and Influence in Organizations',
-            'Diversity in Organizations'
-        ],
-        'Decisions': [
-            'Managerial Decision Modeling',
-            'The Study of Behavioral Economics',
-            'Internal Information for Strategic Decisions',
-            'Advanced Decision Models with Python',
-            'Managerial Decision Making'
-        ],
-        'Operations': [
-            'Supply Chain Strategy and Practice',
-            'Managing Service Operations',
-            'Operations Management: Business Process Fundamentals',
-            'Revenue Management'
-        ],
-        'Finance': [
-            'Entrepreneurial Finance and Private Equity',
-            'Asset Pricing I',
-            'Investments',
-            'Corporate Finance I',
-            'Corporation Finance',
-            'Cases in Financial Management',
-            'Corporate Finance II',
-            'Asset Pricing II',
-            'Portfolio Management',
-            'Advanced Investments',
-            'Fixed Income Asset Pricing',
-            'Debt, Distress, and Restructuring',
-            'International Corporate Finance'
-        ],
-        'Marketing': [
-            'Marketing Strategy',
-            'Digital Marketing',
-            'Data Science for Marketing Decision Making',
-            'Consumer Behavior',
-            'Digital Marketing Lab',
-            'Lab in Developing New Products and Services',
-            'Pricing Strategies',
-            'Brand Management in a Digital Age'
-        ]
-    }
-    
-    # Check which bucket the course belongs to
-    for bucket, titles in flmbe_categories.items():
-        if course_title in titles:
-            return bucket
-    
-    return 'Other'
+    # Dictionary-encoded exports carry each string once plus integer code columns
+    if isinstance(data, dict):
+        return dataset_to_courses(dataset_from_json(data))
+    return data
 
 def generate_global_ranking_html(courses, output_file):
     """Generate HTML with both bucket-specific and global rankings"""
@@ -477,27 +379,27 @@ def generate_global_ranking_html(courses, output_file):
                         <div class="metrics-grid">
                             <div class="metric">
                                 <span class="metric-label">Overall</span>
-                                <span class="metric-value">{course['overall']}/5</span>
+                                <span class="metric-value">{format_metric(course['overall'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Recommend</span>
-                                <span class="metric-value">{course['recommendation']}/5</span>
+                                <span class="metric-value">{format_metric(course['recommendation'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Clarity</span>
-                                <span class="metric-value">{course['clarity']}/5</span>
+                                <span class="metric-value">{format_metric(course['clarity'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Interest</span>
-                                <span class="metric-value">{course['interest']}/5</span>
+                                <span class="metric-value">{format_metric(course['interest'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Usefulness</span>
-                                <span class="metric-value">{course['usefulness']}/5</span>
+                                <span class="metric-value">{format_metric(course['usefulness'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Hours/Week</span>
-                                <span class="metric-value">{course['hoursPerWeek']}</span>
+                                <span class="metric-value">{format_metric(course['hoursPerWeek'])}</span>
                             </div>
                         </div>
                         
@@ -533,27 +435,27 @@ def generate_global_ranking_html(courses, output_file):
                         <div class="metrics-grid">
                             <div class="metric">
                                 <span class="metric-label">Overall</span>
-                                <span class="metric-value">{course['overall']}/5</span>
+                                <span class="metric-value">{format_metric(course['overall'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Recommend</span>
-                                <span class="metric-value">{course['recommendation']}/5</span>
+                                <span class="metric-value">{format_metric(course['recommendation'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Clarity</span>
-                                <span class="metric-value">{course['clarity']}/5</span>
+                                <span class="metric-value">{format_metric(course['clarity'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Interest</span>
-                                <span class="metric-value">{course['interest']}/5</span>
+                                <span class="metric-value">{format_metric(course['interest'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Usefulness</span>
-                                <span class="metric-value">{course['usefulness']}/5</span>
+                                <span class="metric-value">{format_metric(course['usefulness'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Hours/Week</span>
-                                <span class="metric-value">{course['hoursPerWeek']}</span>
+                                <span class="metric-value">{format_metric(course['hoursPerWeek'])}</span>
                             </div>
                         </div>
                         
@@ -592,27 +494,27 @@ def generate_global_ranking_html(courses, output_file):
                         <div class="metrics-grid">
                             <div class="metric">
                                 <span class="metric-label">Overall</span>
-                                <span class="metric-value">{course['overall']}/5</span>
+                                <span class="metric-value">{format_metric(course['overall'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Recommend</span>
-                                <span class="metric-value">{course['recommendation']}/5</span>
+                                <span class="metric-value">{format_metric(course['recommendation'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Clarity</span>
-                                <span class="metric-value">{course['clarity']}/5</span>
+                                <span class="metric-value">{format_metric(course['clarity'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Interest</span>
-                                <span class="metric-value">{course['interest']}/5</span>
+                                <span class="metric-value">{format_metric(course['interest'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Usefulness</span>
-                                <span class="metric-value">{course['usefulness']}/5</span>
+                                <span class="metric-value">{format_metric(course['usefulness'], '/5')}</span>
                             </div>
                             <div class="metric">
                                 <span class="metric-label">Hours/Week</span>
-                                <span class="metric-value">{course['hoursPerWeek']}</span>
+                                <span class="metric-value">{format_metric(course['hoursPerWeek'])}</span>
                             </div>
                         </div>
                         
@@ -0,0 +1,175 @@
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from course_dataset import build_columnar_dataset, term_ordinal
+from shared_dataset import ALIGNMENT, map_dataset, plan_layout
+
+DEFAULT_DATASET_FILE = 'course_data.bin'
+
+MAGIC = b'FLMBEDS\0'
+FORMAT_VERSION = 2
+
+# Magic, format version, header length
+PREAMBLE = struct.Struct('<8sII')
+
+def _group_rows(values, order):
+    """Row indices grouped by value, groups in the given order, as (offsets, rows)"""
+    position = {value: i for i, value in enumerate(order)}
+    buckets = [[] for _ in order]
+    for row, value in enumerate(values):
+        buckets[position[value]].append(row)
+
+    grouped = array('I')
+    offsets = array('Q', [0])
+    for rows in buckets:
+        grouped.extend(rows)
+        offsets.append(len(grouped))
+    return offsets, grouped
+
+def build_term_index(dataset):
+    """Group row indices by term in chronological order
+
+    Returns (term_codes, term_offsets, term_rows): rows of the i-th term are
+    term_rows[term_offsets[i]:term_offsets[i + 1]], and term_codes[i] is that
+    term's code in the term dictionary. Unparseable terms sort last.
+    """
+    dictionary = dataset['dictionaries']['term']
+    order = sorted(range(len(dictionary)),
+                   key=lambda code: (term_ordinal(dictionary[code]) is None, term_ordinal(dictionary[code]) or 0))
+    return (array('I', order), *_group_rows(dataset['columns']['term'], order))
+
+def build_department_index(dataset):
+    """Group row indices by department number, in the same layout as build_term_index"""
+    departments = sorted(set(dataset['columns']['department']))
+    return (array('H', departments), *_group_rows(dataset['columns']['department'], departments))
+
+def write_dataset_file(dataset, path=DEFAULT_DATASET_FILE):
+    """Write a dataset file and atomically swap it into place
+
+    Readers that already mapped the previous file keep their (now unlinked)
+    copy until they reopen; new readers see the new version.
+    """
+    term_codes, term_offsets, term_rows = build_term_index(dataset)
+    departments, department_offsets, department_rows = build_department_index(dataset)
+    indexes = {'term_codes': term_codes, 'term_offsets': term_offsets, 'term_rows': term_rows,
+               'departments': departments, 'department_offsets': department_offsets,
+               'department_rows': department_rows}
+    layout, payloads, total_size = plan_layout(dataset, indexes)
+
+    digest = hashlib.sha1()
+    for data in payloads:
+        digest.update(data)
+
+    header = json.dumps({
+        'dataset_version': digest.hexdigest(),
+        'size': dataset['size'],
+        'layout': layout
+    }).encode('utf-8')
+    data_start = PREAMBLE.size + len(header)
+    data_start = (data_start + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    temp_path = f"{path}.tmp.{os.getpid()}"
+    with open(temp_path, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        file.write(header)
+        file.write(b'\0' * (data_start - PREAMBLE.size - len(header)))
+        position = 0
+        for entry, data in zip(layout, payloads):
+            file.write(b'\0' * (entry['offset'] - position))
+            file.write(data)
+            position = entry['offset'] + entry['nbytes']
+        file.write(b'\0' * (total_size - position))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    return digest.hexdigest()
+
+class MappedDataset:
+    """Read-only, memory-mapped view of a dataset file
+
+    Columns and string tables are memoryviews into the mapping, so every
+    process that opens the same file shares the same page-cache pages.
+    """
+
+    def __init__(self, path=DEFAULT_DATASET_FILE):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.stat = os.fstat(file.fileno())
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_length = PREAMBLE.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a dataset file")
+        if version != FORMAT_VERSION:
+            self.map.close()
+            raise ValueError(f"{path} has unsupported format version {version}")
+
+        header = json.loads(self.map[PREAMBLE.size:PREAMBLE.size + header_length].decode('utf-8'))
+        data_start = (PREAMBLE.size + header_length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        self.version = header['dataset_version']
+
+        self._views = []
+        buffer = memoryview(self.map)[data_start:]
+        self._views.append(buffer)
+        self.dataset = map_dataset(buffer, header['size'], header['layout'], self._views)
+
+    def rows_for_terms(self, start, end):
+        """Return row indices for chronological term positions start..end"""
+        indexes = self.dataset['indexes']
+        return indexes['term_rows'][indexes['term_offsets'][start]:indexes['term_offsets'][end + 1]].tolist()
+
+    def rows_for_department(self, department):
+        """Return row indices of one department, such as 35"""
+        indexes = self.dataset['indexes']
+        i = bisect.bisect_left(indexes['departments'], department)
+        if i == len(indexes['departments']) or indexes['departments'][i] != department:
+            return []
+        return indexes['department_rows'][indexes['department_offsets'][i]:indexes['department_offsets'][i + 1]].tolist()
+
+    def is_stale(self):
+        """True once a newer file has been swapped in at the same path"""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (current.st_ino, current.st_mtime_ns) != (self.stat.st_ino, self.stat.st_mtime_ns)
+
+    def close(self):
+        """Release the mapping; the dataset must not be used afterwards"""
+        if self.map is None:
+            return
+        self.dataset = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.map.close()
+        self.map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    parser = argparse.ArgumentParser(description='Write a memory-mappable dataset file')
+    parser.add_argument('source', nargs='?', default='course_data.js')
+    parser.add_argument('target', nargs='?', default=DEFAULT_DATASET_FILE)
+    parser.add_argument('--quantized', action='store_true', help='store metrics as integer tenths')
+    args = parser.parse_args()
+
+    dataset = build_columnar_dataset(load_course_data_from_js(args.source), quantized=args.quantized)
+    version = write_dataset_file(dataset, args.target)
+    print(f"Wrote {dataset['size']} rows to {args.target} ({os.path.getsize(args.target)} bytes, version {version[:12]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+from collections import Counter
+
+from course_dataset import MISSING_CODE, build_columnar_dataset, composite_scores
+from complete_workflow import DEFAULT_WEIGHTS, get_course_bucket
+
+def department_aggregates(dataset, weights=None):
+    """Sections, course numbers, respondents and weighted mean score per department
+
+    Groups on the integer department column, so rows are tallied into a
+    list indexed by department number rather than a dict of strings.
+    """
+    columns = dataset['columns']
+    scores = composite_scores(dataset, weights or DEFAULT_WEIGHTS)
+    width = max(columns['department'], default=0) + 1
+    sections = [0] * width
+    respondents = [0] * width
+    weight = [0] * width
+    weighted_score = [0.0] * width
+    numbers = [set() for _ in range(width)]
+
+    for index in range(dataset['size']):
+        department = columns['department'][index]
+        count = columns['respondentCount'][index]
+        w = count if count > 0 else 1
+        sections[department] += 1
+        respondents[department] += count
+        weight[department] += w
+        weighted_score[department] += w * scores[index]
+        numbers[department].add(columns['courseNumber'][index])
+
+    return [{
+        'department': department,
+        'sections': sections[department],
+        'courseNumbers': len(numbers[department]),
+        'respondentCount': respondents[department],
+        'composite_score': weighted_score[department] / weight[department]
+    } for department in range(width) if sections[department] and department != MISSING_CODE]
+
+def course_number_rollups(dataset, weights=None):
+    """Roll sections up by course number rather than by title
+
+    A course keeps its number when its title is reworded, so every
+    variant lands in one group. The most common title names the group and
+    decides its bucket.
+    """
+    columns = dataset['columns']
+    titles = dataset['dictionaries']['title']
+    scores = composite_scores(dataset, weights or DEFAULT_WEIGHTS)
+    groups = {}
+    for index in range(dataset['size']):
+        number = columns['courseNumber'][index]
+        if number == MISSING_CODE:
+            continue
+        group = groups.get(number)
+        if group is None:
+            group = groups[number] = [0, 0, 0.0, Counter(), set()]
+        count = columns['respondentCount'][index]
+        w = count if count > 0 else 1
+        group[0] += 1
+        group[1] += w
+        group[2] += w * scores[index]
+        group[3][columns['title'][index]] += 1
+        group[4].add(columns['section'][index])
+
+    rollups = []
+    for number, (sections, weight, weighted_score, title_counts, section_numbers) in sorted(groups.items()):
+        title = titles[title_counts.most_common(1)[0][0]]
+        rollups.append({
+            'courseNumber': number,
+            'title': title,
+            'bucket': get_course_bucket(title),
+            'titles': [titles[code] for code in title_counts],
+            'sections': sections,
+            'sectionNumbers': len(section_numbers),
+            'composite_score': weighted_score / weight
+        })
+    return rollups
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    dataset = build_columnar_dataset(load_course_data_from_js(sys.argv[1] if len(sys.argv) > 1 else 'course_data.js'))
+
+    print(f"{'Dept':>4} {'Sections':>9} {'Courses':>8} {'Respondents':>12} {'Score':>6}")
+    for result in department_aggregates(dataset):
+        print(f"{result['department']:>4} {result['sections']:>9} {result['courseNumbers']:>8} "
+              f"{result['respondentCount']:>12} {result['composite_score']:>6.2f}")
+
+    variants = [rollup for rollup in course_number_rollups(dataset) if len(rollup['titles']) > 1]
+    print(f"\n{len(variants)} course numbers appear under more than one title:")
+    for rollup in variants:
+        print(f"  {rollup['courseNumber']} ({rollup['bucket']}): {' | '.join(rollup['titles'])}")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,10 @@
 import json
-import re
+
+from create_global_ranking import load_course_data_from_js
 
 def extract_course_data_from_js(file_path):
-    """Extract course data from the JavaScript file"""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-    
-    # Find the courseData array in the JavaScript file
-    match = re.search(r'const courseData = (\[.*?\]);', content, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-        return json.loads(json_str)
-    else:
-        raise ValueError("Could not find courseData array in the JavaScript file")
+    """Extract course data from the JavaScript file (plain or dictionary-encoded)"""
+    return load_course_data_from_js(file_path)
 
 def filter_courses_by_term(courses, target_terms):
     """Filter courses by specific terms"""
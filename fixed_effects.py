@@ -0,0 +1,124 @@
+from course_dataset import build_columnar_dataset, composite_scores
+from complete_workflow import DEFAULT_WEIGHTS, get_course_bucket
+
+BUCKETS = ['Finance', 'Marketing', 'Operations', 'Decisions', 'People', 'Strategy', 'Economy', 'Society']
+
+def fit_fixed_effects(dataset, shrinkage=0.5, max_iterations=2000, tolerance=1e-7):
+    """Fit score = mean + instructor effect + course effect over all sections
+
+    The design matrix is kept sparse as one (instructor code, course code)
+    pair per section, and the effects are solved by alternating projections:
+    each sweep sets every instructor effect to the weighted mean residual of
+    its sections given the course effects, then does the same for courses.
+    Memory is O(sections + instructors + courses).
+
+    shrinkage adds that many average sections' worth of weight at zero
+    effect, which pins down effects in weakly connected instructor/course
+    components and keeps a single-section instructor from absorbing a
+    course's score. Sweeps stop once the weighted mean change of the
+    effects falls below tolerance; 'converged' is False if max_iterations
+    ran out first.
+    """
+    columns = dataset['columns']
+    instructors = columns['instructor']
+    courses = columns['title']
+    num_instructors = len(dataset['dictionaries']['instructor'])
+    num_courses = len(dataset['dictionaries']['title'])
+
+    scores = composite_scores(dataset, DEFAULT_WEIGHTS)
+    weights = []
+    for index in range(dataset['size']):
+        respondents = columns['respondentCount'][index]
+        weights.append(respondents if respondents > 0 else 1)
+
+    total_weight = sum(weights)
+    mean = sum(w * y for w, y in zip(weights, scores)) / total_weight
+    # Expressed per average section, so the prior keeps its strength whatever the respondent counts
+    prior = shrinkage * total_weight / dataset['size']
+
+    instructor_weight = [0.0] * num_instructors
+    course_weight = [0.0] * num_courses
+    for i, c, w in zip(instructors, courses, weights):
+        instructor_weight[i] += w
+        course_weight[c] += w
+
+    instructor_effect = [0.0] * num_instructors
+    course_effect = [0.0] * num_courses
+    iterations = 0
+    converged = False
+    for iterations in range(1, max_iterations + 1):
+        residual = [0.0] * num_instructors
+        for i, c, w, y in zip(instructors, courses, weights, scores):
+            residual[i] += w * (y - mean - course_effect[c])
+        change = 0.0
+        for i in range(num_instructors):
+            if instructor_weight[i]:
+                value = residual[i] / (instructor_weight[i] + prior)
+                change += instructor_weight[i] * abs(value - instructor_effect[i])
+                instructor_effect[i] = value
+
+        residual = [0.0] * num_courses
+        for i, c, w, y in zip(instructors, courses, weights, scores):
+            residual[c] += w * (y - mean - instructor_effect[i])
+        for c in range(num_courses):
+            if course_weight[c]:
+                value = residual[c] / (course_weight[c] + prior)
+                change += course_weight[c] * abs(value - course_effect[c])
+                course_effect[c] = value
+
+        # Every section is counted once through its instructor and once through its course
+        if change / (2 * total_weight) < tolerance:
+            converged = True
+            break
+
+    # Only sums of effects are identified; centre instructors on zero
+    shift = sum(w * e for w, e in zip(instructor_weight, instructor_effect)) / total_weight
+    instructor_effect = [e - shift for e in instructor_effect]
+    course_effect = [e + shift for e in course_effect]
+
+    return {
+        'mean': mean,
+        'iterations': iterations,
+        'converged': converged,
+        'instructor_effects': dict(zip(dataset['dictionaries']['instructor'], instructor_effect)),
+        'course_effects': dict(zip(dataset['dictionaries']['title'], course_effect)),
+        'course_weights': dict(zip(dataset['dictionaries']['title'], course_weight))
+    }
+
+def adjusted_course_rankings(model, top_n=15):
+    """Rank each bucket's courses by their instructor-adjusted score"""
+    rankings = {bucket: [] for bucket in BUCKETS}
+    for title, effect in model['course_effects'].items():
+        bucket = get_course_bucket(title)
+        if bucket in rankings:
+            rankings[bucket].append({
+                'title': title,
+                'bucket': bucket,
+                'adjusted_score': model['mean'] + effect
+            })
+
+    for bucket in BUCKETS:
+        ranked = sorted(rankings[bucket], key=lambda x: x['adjusted_score'], reverse=True)
+        rankings[bucket] = ranked[:top_n]
+    return rankings
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    courses = load_course_data_from_js('course_data.js')
+    dataset = build_columnar_dataset(courses)
+    model = fit_fixed_effects(dataset)
+    print(f"Fitted {len(model['instructor_effects'])} instructor and "
+          f"{len(model['course_effects'])} course effects in {model['iterations']} iterations")
+    if not model['converged']:
+        print(f"Warning: effects did not converge within {model['iterations']} iterations; "
+              "rankings below are approximate")
+
+    rankings = adjusted_course_rankings(model)
+    for bucket in BUCKETS:
+        print(f"\n{bucket} (instructor-adjusted):")
+        for i, course in enumerate(rankings[bucket], 1):
+            print(f"  {i}. {course['title']}: {course['adjusted_score']:.2f}")
+
+if __name__ == "__main__":
+    main()
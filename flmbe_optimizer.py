@@ -0,0 +1,170 @@
+import argparse
+import heapq
+import time
+
+from complete_workflow import calculate_course_score, get_course_bucket
+from pareto_frontier import pareto_layers
+
+BUCKETS = ['Finance', 'Marketing', 'Operations', 'Decisions', 'People', 'Strategy', 'Economy', 'Society']
+
+def build_candidates(courses):
+    """Group section rows into per-bucket (title, instructor) candidates
+
+    Each candidate keeps respondent-weighted totals per term, so term
+    exclusions can be applied later without rescanning the rows.
+    """
+    buckets = {bucket: {} for bucket in BUCKETS}
+    bucket_cache = {}
+    for course in courses:
+        title = course['title']
+        if title not in bucket_cache:
+            bucket_cache[title] = get_course_bucket(title)
+        bucket = bucket_cache[title]
+        if bucket not in buckets:
+            continue
+
+        key = (title, course['instructor'])
+        candidate = buckets[bucket].get(key)
+        if candidate is None:
+            candidate = buckets[bucket][key] = {
+                'title': title,
+                'instructor': course['instructor'],
+                'bucket': bucket,
+                'ids': set(),
+                'term_totals': {}
+            }
+        candidate['ids'].add(course['id'].split()[0])
+
+        respondents = course.get('respondentCount', 0)
+        weight = respondents if respondents > 0 else 1
+        # [weight, weighted score, weighted hours, weight of sections that reported hours]
+        totals = candidate['term_totals'].setdefault(course['term'], [0, 0.0, 0.0, 0])
+        totals[0] += weight
+        totals[1] += weight * calculate_course_score(course)
+        if course.get('hoursPerWeek') is not None:
+            totals[2] += weight * course['hoursPerWeek']
+            totals[3] += weight
+
+    return {bucket: list(candidates.values()) for bucket, candidates in buckets.items()}
+
+def _resolve_candidates(candidates, excluded_courses, excluded_terms):
+    """Apply exclusions and compute each candidate's mean score and hours"""
+    resolved = []
+    for candidate in candidates:
+        if candidate['title'] in excluded_courses or candidate['ids'] & excluded_courses:
+            continue
+        weight = score = hours = hours_weight = 0
+        for term, (w, s, h, hw) in candidate['term_totals'].items():
+            if term not in excluded_terms:
+                weight += w
+                score += s
+                hours += h
+                hours_weight += hw
+        # Courses with no reported hours cannot be fitted to the budget
+        if weight and hours > 0:
+            resolved.append({
+                'title': candidate['title'],
+                'instructor': candidate['instructor'],
+                'bucket': candidate['bucket'],
+                'composite_score': score / weight,
+                'hoursPerWeek': round(hours / hours_weight, 1)
+            })
+    return resolved
+
+def optimize_plan(candidates, buckets, max_hours, k=5, excluded_courses=(), excluded_terms=()):
+    """Return the k best one-course-per-bucket plans within an hours budget
+
+    A course that sits below the k-th score-vs-hours frontier layer of its
+    bucket is beaten on both axes by k other courses, so it can never be in
+    the k best plans; only the first k layers are searched. The search is
+    branch and bound: buckets with the fewest options go first, and a branch
+    is cut when even the best remaining scores cannot beat the current k-th
+    plan or the lightest remaining courses already break the budget.
+    """
+    excluded_courses = set(excluded_courses)
+    excluded_terms = set(excluded_terms)
+
+    options = []
+    for bucket in buckets:
+        resolved = _resolve_candidates(candidates.get(bucket, []), excluded_courses, excluded_terms)
+        pruned = [course for layer in pareto_layers(resolved)[:k] for course in layer]
+        if not pruned:
+            return []
+        pruned.sort(key=lambda x: x['composite_score'], reverse=True)
+        options.append(pruned)
+    options.sort(key=len)
+
+    # Bounds over the buckets still to be chosen
+    best_remaining = [0.0] * (len(options) + 1)
+    lightest_remaining = [0.0] * (len(options) + 1)
+    for depth in range(len(options) - 1, -1, -1):
+        best_remaining[depth] = best_remaining[depth + 1] + options[depth][0]['composite_score']
+        lightest_remaining[depth] = lightest_remaining[depth + 1] + min(c['hoursPerWeek'] for c in options[depth])
+
+    best_plans = []
+    chosen = []
+    counter = 0
+
+    def search(depth, score, hours):
+        nonlocal counter
+        if depth == len(options):
+            counter += 1
+            entry = (score, counter, list(chosen))
+            if len(best_plans) < k:
+                heapq.heappush(best_plans, entry)
+            else:
+                heapq.heappushpop(best_plans, entry)
+            return
+
+        for course in options[depth]:
+            new_score = score + course['composite_score']
+            if len(best_plans) == k and new_score + best_remaining[depth + 1] <= best_plans[0][0]:
+                # Options are sorted by score, so the rest of this bucket is worse
+                break
+            new_hours = hours + course['hoursPerWeek']
+            if new_hours + lightest_remaining[depth + 1] > max_hours + 1e-9:
+                continue
+            chosen.append(course)
+            search(depth + 1, new_score, new_hours)
+            chosen.pop()
+
+    search(0, 0.0, 0.0)
+
+    plans = []
+    for score, _, courses in sorted(best_plans, reverse=True):
+        courses = sorted(courses, key=lambda x: buckets.index(x['bucket']))
+        plans.append({
+            'total_score': score,
+            'total_hours': round(sum(c['hoursPerWeek'] for c in courses), 1),
+            'courses': courses
+        })
+    return plans
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    parser = argparse.ArgumentParser(description='Find the best FLMBE plans under a weekly-hours budget')
+    parser.add_argument('--buckets', nargs='+', default=BUCKETS, choices=BUCKETS)
+    parser.add_argument('--max-hours', type=float, default=40.0)
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--exclude-course', action='append', default=[], help='title or course number')
+    parser.add_argument('--exclude-term', action='append', default=[])
+    parser.add_argument('--data', default='course_data.js')
+    args = parser.parse_args()
+
+    candidates = build_candidates(load_course_data_from_js(args.data))
+
+    start = time.perf_counter()
+    plans = optimize_plan(candidates, args.buckets, args.max_hours, args.k,
+                          args.exclude_course, args.exclude_term)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"Found {len(plans)} plans in {elapsed:.1f} ms")
+    for i, plan in enumerate(plans, 1):
+        print(f"\n{i}. Score {plan['total_score']:.2f}, {plan['total_hours']} hours/week")
+        for course in plan['courses']:
+            print(f"   {course['bucket']:10} {course['title']} ({course['instructor']}) "
+                  f"{course['composite_score']:.2f}, {course['hoursPerWeek']}h")
+
+if __name__ == "__main__":
+    main()
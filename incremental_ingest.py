@@ -0,0 +1,136 @@
+import argparse
+import os
+
+import course_db
+from course_dataset import build_columnar_dataset, dataset_to_courses, term_ordinal
+from course_db import row_hash, row_keys
+from complete_workflow import (ENCODED_COURSE_DATA_FILE, bucket_courses, generate_html_rankings, generate_index_page,
+                               get_course_bucket, write_course_data_js)
+from dataset_file import DEFAULT_DATASET_FILE, write_dataset_file
+from materialized_views import build_materialized_views
+from multi_source import read_sources
+from similar_courses import precompute_similar_courses
+from term_aggregates import (DEFAULT_AGGREGATES_FILE, build_prefix_aggregates, load_prefix_aggregates,
+                             save_prefix_aggregates, update_prefix_aggregates)
+
+def diff_courses(stored, courses, mode='append'):
+    """Split incoming rows into added, changed and deleted against stored row hashes
+
+    stored is {row_key: (term, source, row_hash)} as returned by
+    course_db.fetch_row_hashes. In append mode the input is one or more
+    term exports. A stored row can only be deleted by a new version of the
+    export it came from, so it must share both term and source with an
+    incoming row; exports of other programs for the same term are left
+    alone. In full mode the input is the whole master CSV and any stored
+    row missing from it is deleted.
+    """
+    if mode not in ('append', 'full'):
+        raise ValueError(f"Unknown ingest mode: {mode}")
+
+    keys = row_keys(courses)
+    added = []
+    changed = []
+    for key, course in zip(keys, courses):
+        entry = stored.get(key)
+        if entry is None:
+            added.append((key, course))
+        elif entry[2] != row_hash(course):
+            changed.append((key, course))
+
+    incoming = set(keys)
+    exports = {(course['term'], course.get('source')) for course in courses}
+    deleted = [key for key, (term, source, _) in stored.items()
+               if key not in incoming and (mode == 'full' or (term, source) in exports)]
+
+    return {
+        'added': added,
+        'changed': changed,
+        'deleted': deleted,
+        'unchanged': len(courses) - len(added) - len(changed)
+    }
+
+def recent_years(terms, years=2):
+    """The most recent calendar years present in a set of terms"""
+    return sorted({term_ordinal(term) // 4 for term in terms if term_ordinal(term) is not None},
+                  reverse=True)[:years]
+
+def ingest(conn, courses, mode='append'):
+    """Apply the rows that differ from the database and return (delta, touched buckets)"""
+    stored = course_db.fetch_row_hashes(conn)
+    delta = diff_courses(stored, courses, mode)
+    if not (delta['added'] or delta['changed'] or delta['deleted']):
+        return delta, set()
+
+    previous = course_db.apply_delta(conn, delta)
+    titles = {course['title'] for _, course in delta['added'] + delta['changed']}
+    titles.update(course['title'] for course in previous.values())
+    delta['previous'] = previous
+    delta['recent_shifted'] = (recent_years(term for term, _, _ in stored.values())
+                               != recent_years(course_db.fetch_terms(conn)))
+    return delta, {get_course_bucket(title) for title in titles}
+
+def update_aggregates(delta, path=DEFAULT_AGGREGATES_FILE, all_courses=None):
+    """Patch the stored term prefix aggregates with an applied delta
+
+    The stored versions of changed and deleted rows are taken out and the
+    incoming versions of added and changed rows put in. Without a stored
+    file (a build older than the file) the aggregates are built from
+    all_courses instead.
+    """
+    if os.path.exists(path):
+        aggregates = update_prefix_aggregates(load_prefix_aggregates(path),
+                                              removed=delta['previous'].values(),
+                                              added=[course for _, course in delta['added'] + delta['changed']])
+    else:
+        aggregates = build_prefix_aggregates(build_columnar_dataset(all_courses), 'title')
+    save_prefix_aggregates(aggregates, path)
+    return aggregates
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply new or updated evaluation CSVs to the course database')
+    parser.add_argument('csv_files', nargs='+',
+                        help='term exports, directories or globs of them (or the master CSV with --full)')
+    parser.add_argument('--full', action='store_true', help='treat the input as the complete master CSV')
+    parser.add_argument('--db', default=course_db.DEFAULT_DB)
+    args = parser.parse_args()
+
+    courses = dataset_to_courses(read_sources(args.csv_files))
+
+    conn = course_db.connect(args.db)
+    delta, touched = ingest(conn, courses, 'full' if args.full else 'append')
+    if not touched:
+        conn.close()
+        print(f"No changes in {len(courses)} rows; nothing to rebuild")
+        return
+
+    print(f"Buckets affected: {', '.join(sorted(touched))}")
+    all_courses = course_db.fetch_courses(conn)
+    recent_courses = course_db.fetch_recent_courses(conn)
+    conn.close()
+
+    write_course_data_js(all_courses, 'course_data.js')
+    write_course_data_js(all_courses, ENCODED_COURSE_DATA_FILE, encoded=True)
+    write_course_data_js(recent_courses, 'cleaned_course_data.js')
+    write_dataset_file(build_columnar_dataset(all_courses), DEFAULT_DATASET_FILE)
+    update_aggregates(delta, DEFAULT_AGGREGATES_FILE, all_courses)
+
+    # Only affected bucket files are rewritten; a shifted recent window moves every bucket
+    all_buckets = bucket_courses(all_courses, 'buckets_all', touched)
+    recent_buckets = bucket_courses(recent_courses, 'buckets_recent', None if delta['recent_shifted'] else touched)
+
+    build_materialized_views(all_buckets, 'buckets_all')
+    build_materialized_views(recent_buckets, 'buckets_recent')
+
+    similar_courses = precompute_similar_courses(all_courses, k=3)
+    generate_html_rankings(all_buckets, 'docs/all.html',
+                           'FLMBE Course Rankings - All Data',
+                           'Based on ALL student evaluations from the complete dataset',
+                           similar_courses)
+    generate_html_rankings(recent_buckets, 'docs/recent.html',
+                           'FLMBE Course Rankings - Recent Data',
+                           'Based on student evaluations from the most recent 2 years',
+                           similar_courses)
+    generate_index_page()
+
+if __name__ == "__main__":
+    main()
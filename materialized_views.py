@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+from course_dataset import COUNT_FIELDS, METRIC_FIELDS, STRING_FIELDS
+from complete_workflow import DEFAULT_WEIGHTS, calculate_course_score
+from ranking_query import ranking_key
+
+FLMBE_BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
+
+# Views are stored at this depth; smaller top-k requests are served from a prefix
+VIEW_TOP_K = 15
+
+VIEWS_FILE = 'views.json'
+VIEWS_VERSION = 1
+
+def fingerprint_rows(courses):
+    """Hash the source fields of a list of rows, independent of derived fields"""
+    digest = hashlib.sha1()
+    for course in courses:
+        row = [course.get(field) for field in STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS]
+        digest.update(json.dumps(row).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+def rank_view(courses, scope, top_k=VIEW_TOP_K):
+    """Rank rows by the default composite score, as the HTML pages do"""
+    ranked = []
+    for course in courses:
+        result = {field: course.get(field) for field in STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS}
+        result['bucket'] = course.get('bucket', scope)
+        result['composite_score'] = calculate_course_score(course)
+        ranked.append(result)
+    ranked.sort(key=ranking_key)
+    return ranked[:top_k]
+
+def load_materialized_views(output_dir):
+    """Load persisted views for one window, or {} if missing or stale"""
+    path = os.path.join(output_dir, VIEWS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        payload = json.load(file)
+    if payload.get('version') != VIEWS_VERSION:
+        return {}
+    return payload['views']
+
+def view_fingerprints(buckets):
+    """Fingerprint the input rows of every view: one per bucket plus global"""
+    fingerprints = {bucket: fingerprint_rows(buckets.get(bucket, [])) for bucket in FLMBE_BUCKETS}
+    combined = ''.join(fingerprints[bucket] for bucket in FLMBE_BUCKETS)
+    fingerprints['global'] = hashlib.sha1(combined.encode('utf-8')).hexdigest()
+    return fingerprints
+
+def build_materialized_views(buckets, output_dir):
+    """Refresh the per-bucket and global top-k views for one window
+
+    Each view records a fingerprint of its input rows; a view is recomputed
+    only when that fingerprint changes, otherwise the persisted result is
+    kept as is.
+    """
+    previous = load_materialized_views(output_dir)
+    fingerprints = view_fingerprints(buckets)
+    views = {}
+    refreshed = []
+
+    for scope in FLMBE_BUCKETS + ['global']:
+        if previous.get(scope, {}).get('fingerprint') == fingerprints[scope]:
+            views[scope] = previous[scope]
+            continue
+        if scope == 'global':
+            courses = [dict(course, bucket=bucket) for bucket in FLMBE_BUCKETS for course in buckets.get(bucket, [])]
+        else:
+            courses = buckets.get(scope, [])
+        views[scope] = {'fingerprint': fingerprints[scope], 'results': rank_view(courses, scope)}
+        refreshed.append(scope)
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    with open(os.path.join(output_dir, VIEWS_FILE), 'w', encoding='utf-8') as file:
+        json.dump({'version': VIEWS_VERSION, 'top_k': VIEW_TOP_K, 'views': views}, file, indent=2)
+
+    print(f"  {VIEWS_FILE}: refreshed {len(refreshed)} of {len(views)} views"
+          + (f" ({', '.join(refreshed)})" if refreshed else ""))
+    return views
+
+def validate_views(views, buckets):
+    """Keep only the views whose fingerprints match the given rows"""
+    fingerprints = view_fingerprints(buckets)
+    return {scope: view for scope, view in views.items() if fingerprints.get(scope) == view.get('fingerprint')}
+
+def lookup_view(views, scope, top_k=VIEW_TOP_K, weights=None):
+    """Return a precomputed ranking if the request is covered by a view, else None"""
+    if (weights is not None and weights != DEFAULT_WEIGHTS) or top_k > VIEW_TOP_K:
+        return None
+    view = views.get(scope)
+    if view is None:
+        return None
+    return view['results'][:top_k]
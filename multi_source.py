@@ -0,0 +1,124 @@
+import glob
+import os
+import sys
+from array import array
+from multiprocessing import Pool
+
+from course_dataset import COUNT_FIELDS, METRIC_FIELDS, STRING_FIELDS, add_code_columns, build_columnar_dataset
+from course_db import row_hash, row_keys
+from complete_workflow import read_course_csv
+
+def expand_sources(patterns):
+    """Resolve CSV paths, directories (every *.csv inside) and glob patterns, in a stable order"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f"No CSV files match {pattern}")
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def parse_source(path):
+    """Parse one export into a columnar dataset plus per-row keys and content hashes
+
+    Runs in a worker process, so hashing and dictionary encoding happen in
+    parallel and only compact arrays are sent back to the parent.
+    """
+    courses = read_course_csv(path)
+    return {
+        # The full path, since per-program folders reuse file names (booth/2024.csv, harris/2024.csv)
+        'source': os.path.abspath(path),
+        'dataset': build_columnar_dataset(courses),
+        'keys': row_keys(courses),
+        'hashes': [row_hash(course) for course in courses]
+    }
+
+def merge_sources(parsed):
+    """Merge per-source datasets into one with shared string dictionaries
+
+    Rows are identified by their course_db row key. A row whose key and hash
+    were already seen in an earlier source is an overlapping export and is
+    dropped; a row whose key was seen with a different hash replaces the
+    earlier one in place, so later exports correct earlier ones. Each row's
+    source file is kept, as a full path, in a 'source' string column.
+    """
+    string_fields = STRING_FIELDS + ['source']
+    dictionaries = {field: [] for field in string_fields}
+    lookups = {field: {} for field in string_fields}
+    columns = {field: array('I') for field in string_fields + COUNT_FIELDS}
+    columns.update({field: array('d') for field in METRIC_FIELDS})
+
+    def encode(field, value):
+        code = lookups[field].get(value)
+        if code is None:
+            code = lookups[field][value] = len(dictionaries[field])
+            dictionaries[field].append(value)
+        return code
+
+    seen = {}
+    duplicates = 0
+    replaced = 0
+    for part in parsed:
+        dataset = part['dataset']
+        # Translate this source's dictionary codes into the merged dictionaries
+        remap = {field: [encode(field, value) for value in dataset['dictionaries'][field]] for field in STRING_FIELDS}
+        source_code = encode('source', part['source'])
+
+        for row, (key, digest) in enumerate(zip(part['keys'], part['hashes'])):
+            values = {field: remap[field][dataset['columns'][field][row]] for field in STRING_FIELDS}
+            values.update({field: dataset['columns'][field][row] for field in COUNT_FIELDS + METRIC_FIELDS})
+            values['source'] = source_code
+
+            previous = seen.get(key)
+            if previous is None:
+                seen[key] = (len(columns['id']), digest)
+                for field, value in values.items():
+                    columns[field].append(value)
+            elif previous[1] == digest:
+                duplicates += 1
+            else:
+                seen[key] = (previous[0], digest)
+                for field, value in values.items():
+                    columns[field][previous[0]] = value
+                replaced += 1
+
+    print(f"Merged {len(columns['id'])} rows from {len(parsed)} sources "
+          f"({duplicates} duplicates dropped, {replaced} replaced by later exports)")
+    dataset = {
+        'size': len(columns['id']),
+        'columns': columns,
+        'dictionaries': dictionaries
+    }
+    add_code_columns(dataset)
+    return dataset
+
+def read_sources(patterns, processes=None):
+    """Parse every matching CSV in parallel and merge them into one columnar dataset"""
+    paths = expand_sources(patterns)
+    if len(paths) == 1:
+        parsed = [parse_source(paths[0])]
+    else:
+        with Pool(min(processes or os.cpu_count() or 1, len(paths))) as pool:
+            parsed = pool.map(parse_source, paths)
+    return merge_sources(parsed)
+
+def main():
+    if len(sys.argv) < 2:
+        print('Usage: python multi_source.py <csv, directory or glob>...')
+        return
+
+    dataset = read_sources(sys.argv[1:])
+    counts = [0] * len(dataset['dictionaries']['source'])
+    for code in dataset['columns']['source']:
+        counts[code] += 1
+    for source, count in zip(dataset['dictionaries']['source'], counts):
+        print(f"  {source}: {count} rows")
+    print(f"{dataset['size']} courses over {len(dataset['dictionaries']['term'])} terms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from bisect import bisect_left
+
+def pareto_layers(courses, score_key='composite_score', hours_key='hoursPerWeek'):
+    """Split courses into successive non-dominated layers (max score, min hours)
+
+    Layer 1 is the Pareto frontier, layer 2 the frontier once layer 1 is
+    removed, and so on. Courses are swept once in order of increasing hours;
+    each layer remembers its best point so far, and those bests stay sorted,
+    so each course finds its layer by binary search: O(n log n) overall.
+    Courses without an hours estimate are left out.
+    """
+    candidates = [c for c in courses if (c.get(hours_key) or 0) > 0]
+    candidates.sort(key=lambda c: (c[hours_key], -c[score_key]))
+
+    layers = []
+    bests = []
+    for course in candidates:
+        key = (-course[score_key], course[hours_key])
+        layer = bisect_left(bests, key)
+        if layer == len(layers):
+            layers.append([])
+            bests.append(key)
+        else:
+            bests[layer] = key
+        layers[layer].append(course)
+
+    return layers
+
+def pareto_frontier(courses, score_key='composite_score', hours_key='hoursPerWeek'):
+    """Return the non-dominated courses, ordered by increasing hours"""
+    layers = pareto_layers(courses, score_key, hours_key)
+    return layers[0] if layers else []
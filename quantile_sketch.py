@@ -0,0 +1,124 @@
+import bisect
+import math
+import random
+import sys
+
+# Accuracy parameter: rank error is roughly 1.7 / DEFAULT_K of the stream length
+DEFAULT_K = 200
+
+def percentile_rank(sorted_values, value):
+    """Exact share of values at or below value, as a percentage"""
+    if not sorted_values:
+        return 0.0
+    return 100.0 * bisect.bisect_right(sorted_values, value) / len(sorted_values)
+
+class KLLSketch:
+    """Mergeable quantile sketch in O(k) memory (Karnin, Lang and Liberty)
+
+    Values enter level 0. When the sketch is over capacity, the lowest full
+    level is sorted and every other value (starting at a random offset) is
+    promoted to the next level, where it stands for twice as many values.
+    Lower levels get geometrically smaller capacities, so the sketch holds
+    about 3k values however long the stream is.
+
+    Two sketches merge by concatenating levels and compacting again, so
+    sketches built by separate workers combine into one that is as
+    accurate as a sketch of the whole stream. The compaction coin uses a
+    seeded generator, making builds reproducible.
+    """
+
+    def __init__(self, k=DEFAULT_K, c=2 / 3, seed=0):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.levels = [[]]
+        self.random = random.Random(seed)
+        self.retained = 0
+        self.max_retained = self._capacity(0)
+
+    def __len__(self):
+        return self.n
+
+    def _capacity(self, height):
+        depth = len(self.levels) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _compress(self):
+        while self.retained >= self.max_retained:
+            for height, level in enumerate(self.levels):
+                if len(level) >= self._capacity(height):
+                    break
+            if height + 1 == len(self.levels):
+                self.levels.append([])
+                self.max_retained = sum(self._capacity(h) for h in range(len(self.levels)))
+            level.sort()
+            # An odd value out stays behind so the promoted ones pair up exactly
+            leftover = [level.pop()] if len(level) % 2 else []
+            self.levels[height + 1].extend(level[self.random.randrange(2)::2])
+            level[:] = leftover
+            self.retained = sum(len(items) for items in self.levels)
+
+    def update(self, value):
+        """Add one value to the sketch"""
+        self.levels[0].append(value)
+        self.n += 1
+        self.retained += 1
+        if self.retained >= self.max_retained:
+            self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for height, level in enumerate(other.levels):
+            self.levels[height].extend(level)
+        self.n += other.n
+        self.retained += other.retained
+        self.max_retained = sum(self._capacity(h) for h in range(len(self.levels)))
+        self._compress()
+        return self
+
+    def rank(self, value):
+        """Estimated number of values at or below value"""
+        total = 0
+        for height, level in enumerate(self.levels):
+            total += sum(1 for item in level if item <= value) << height
+        return total
+
+    def percentile(self, value):
+        """Estimated share of values at or below value, as a percentage"""
+        if not self.n:
+            return 0.0
+        return min(100.0, 100.0 * self.rank(value) / self.n)
+
+    def quantile(self, q):
+        """Estimated value at fraction q (0..1) of the way through the sorted stream"""
+        weighted = sorted((item, 1 << height) for height, level in enumerate(self.levels) for item in level)
+        if not weighted:
+            return None
+        target = q * sum(weight for _, weight in weighted)
+        seen = 0
+        for item, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return item
+        return weighted[-1][0]
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+    from complete_workflow import calculate_course_score
+
+    courses = load_course_data_from_js(sys.argv[1] if len(sys.argv) > 1 else 'course_data.js')
+    scores = [calculate_course_score(course) for course in courses]
+    sketch = KLLSketch()
+    for score in scores:
+        sketch.update(score)
+    scores.sort()
+
+    print(f"{len(scores)} scores, {sketch.retained} retained in {len(sketch.levels)} levels")
+    for q in [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]:
+        exact = scores[min(len(scores) - 1, int(q * len(scores)))]
+        print(f"  p{q * 100:g}: sketch {sketch.quantile(q):.3f}, exact {exact:.3f}")
+
+if __name__ == "__main__":
+    main()
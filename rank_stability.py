@@ -0,0 +1,206 @@
+import argparse
+import json
+import math
+
+from course_dataset import build_columnar_dataset, composite_scores, term_ordinal
+from complete_workflow import DEFAULT_WEIGHTS, get_course_bucket
+
+BUCKETS = ['Finance', 'Marketing', 'Operations', 'Decisions', 'People', 'Strategy', 'Economy', 'Society']
+
+# Term ordinals advance by 4 per calendar year
+TERMS_PER_YEAR = 4
+
+# Calendar years in the recent window, as in course_db.fetch_recent_courses
+RECENT_YEARS = 2
+
+# Fewer shared titles than this say nothing about agreement
+MIN_COMMON = 3
+
+def _tied_pairs(sorted_values):
+    """Number of pairs with equal values in an already sorted sequence"""
+    pairs = 0
+    run = 1
+    for i in range(1, len(sorted_values) + 1):
+        if i < len(sorted_values) and sorted_values[i] == sorted_values[i - 1]:
+            run += 1
+        else:
+            pairs += run * (run - 1) // 2
+            run = 1
+    return pairs
+
+def _sort_counting_swaps(values):
+    """Bottom-up merge sort returning (number of inversions, sorted copy)"""
+    n = len(values)
+    values = list(values)
+    buffer = values[:]
+    swaps = 0
+    width = 1
+    while width < n:
+        for start in range(0, n, 2 * width):
+            middle = min(start + width, n)
+            end = min(start + 2 * width, n)
+            i, j, k = start, middle, start
+            while i < middle and j < end:
+                if values[j] < values[i]:
+                    buffer[k] = values[j]
+                    swaps += middle - i
+                    j += 1
+                else:
+                    buffer[k] = values[i]
+                    i += 1
+                k += 1
+            buffer[k:end] = values[i:middle] if i < middle else values[j:end]
+        values, buffer = buffer, values
+        width *= 2
+    return swaps, values
+
+def kendall_tau(x, y):
+    """Kendall's tau-b of two paired sequences in O(n log n) (Knight's algorithm)
+
+    Pairs are sorted by (x, y); discordant pairs are then the inversions
+    left in y, counted while merge-sorting it. Ties in x, in y and in both
+    are counted from runs in the sorted sequences. Returns None when
+    either side is constant.
+    """
+    n = len(x)
+    pairs = sorted(zip(x, y))
+    total = n * (n - 1) // 2
+    x_ties = _tied_pairs([a for a, _ in pairs])
+    joint_ties = _tied_pairs(pairs)
+
+    swaps, ys = _sort_counting_swaps([b for _, b in pairs])
+    y_ties = _tied_pairs(ys)
+
+    denominator = math.sqrt((total - x_ties) * (total - y_ties))
+    if denominator == 0:
+        return None
+    return (total - x_ties - y_ties + joint_ties - 2 * swaps) / denominator
+
+def average_ranks(values):
+    """1-based ranks of values, with tied values sharing their average rank"""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        rank = (start + end) / 2 + 1
+        for i in range(start, end + 1):
+            ranks[order[i]] = rank
+        start = end + 1
+    return ranks
+
+def spearman_rho(x, y):
+    """Spearman's rho: the Pearson correlation of average ranks, or None if either side is constant"""
+    rx = average_ranks(x)
+    ry = average_ranks(y)
+    mean = (len(rx) + 1) / 2
+    sxy = sum((a - mean) * (b - mean) for a, b in zip(rx, ry))
+    sxx = sum((a - mean) ** 2 for a in rx)
+    syy = sum((b - mean) ** 2 for b in ry)
+    if sxx == 0 or syy == 0:
+        return None
+    return sxy / math.sqrt(sxx * syy)
+
+def title_score_tables(dataset, weights=None):
+    """Respondent-weighted mean score per title, per scope, for every term and window
+
+    Returns {scope: {window: {title: score}}}, where scope is a bucket or
+    'global' and window is a term ordinal, 'all' or 'recent'. Built from
+    running sums in one pass over the rows.
+    """
+    columns = dataset['columns']
+    dictionaries = dataset['dictionaries']
+    term_ordinals = [term_ordinal(term) for term in dictionaries['term']]
+    buckets = [get_course_bucket(title) for title in dictionaries['title']]
+    latest_years = sorted({x // TERMS_PER_YEAR for x in term_ordinals if x is not None}, reverse=True)
+    recent_start = latest_years[:RECENT_YEARS][-1] * TERMS_PER_YEAR if latest_years else None
+
+    scores = composite_scores(dataset, weights or DEFAULT_WEIGHTS)
+    sums = {}
+    for index in range(dataset['size']):
+        title = columns['title'][index]
+        bucket = buckets[title]
+        x = term_ordinals[columns['term'][index]]
+        if bucket not in BUCKETS or x is None:
+            continue
+
+        respondents = columns['respondentCount'][index]
+        w = respondents if respondents > 0 else 1
+        windows = [x, 'all'] + (['recent'] if x >= recent_start else [])
+        for scope in (bucket, 'global'):
+            for window in windows:
+                group = sums.setdefault((scope, window, title), [0.0, 0.0])
+                group[0] += w
+                group[1] += w * scores[index]
+
+    tables = {}
+    for (scope, window, title), (sw, swy) in sums.items():
+        tables.setdefault(scope, {}).setdefault(window, {})[dictionaries['title'][title]] = swy / sw
+    return tables
+
+def compare(first, second):
+    """Rank agreement of two {title: score} tables over the titles they share"""
+    common = sorted(first.keys() & second.keys())
+    if len(common) < MIN_COMMON:
+        return None
+    x = [first[title] for title in common]
+    y = [second[title] for title in common]
+    return {'titles': len(common), 'kendall_tau': kendall_tau(x, y), 'spearman_rho': spearman_rho(x, y)}
+
+def mean_of(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+def stability_report(dataset, weights=None):
+    """Term-to-term and all-vs-recent rank agreement for every bucket and globally"""
+    tables = title_score_tables(dataset, weights)
+    ordinal_terms = {term_ordinal(term): term for term in dataset['dictionaries']['term']}
+
+    report = {}
+    for scope in BUCKETS + ['global']:
+        windows = tables.get(scope, {})
+        terms = sorted(window for window in windows if window not in ('all', 'recent'))
+        consecutive = []
+        for before, after in zip(terms, terms[1:]):
+            result = compare(windows[before], windows[after])
+            if result is not None:
+                result.update({'from': ordinal_terms[before], 'to': ordinal_terms[after]})
+                consecutive.append(result)
+
+        report[scope] = {
+            'term_to_term': consecutive,
+            'mean_term_tau': mean_of(result['kendall_tau'] for result in consecutive),
+            'mean_term_rho': mean_of(result['spearman_rho'] for result in consecutive),
+            'all_vs_recent': compare(windows.get('all', {}), windows.get('recent', {}))
+        }
+    return report
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    parser = argparse.ArgumentParser(description='Measure how stable each bucket ranking is across terms and windows')
+    parser.add_argument('source', nargs='?', default='course_data.js')
+    parser.add_argument('--output', help='write the full report to a JSON file')
+    args = parser.parse_args()
+
+    dataset = build_columnar_dataset(load_course_data_from_js(args.source))
+    report = stability_report(dataset)
+
+    def show(value):
+        return '   n/a' if value is None else f"{value:+.3f}"
+
+    print(f"{'Scope':12} {'term tau':>9} {'term rho':>9} {'all/recent tau':>15} {'rho':>7} {'titles':>7}")
+    for scope, result in report.items():
+        window = result['all_vs_recent'] or {}
+        print(f"{scope:12} {show(result['mean_term_tau']):>9} {show(result['mean_term_rho']):>9} "
+              f"{show(window.get('kendall_tau')):>15} {show(window.get('spearman_rho')):>7} {window.get('titles', 0):>7}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"\nWrote {args.output}")
+
+if __name__ == "__main__":
+    main()
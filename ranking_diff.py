@@ -0,0 +1,192 @@
+import argparse
+import glob
+import html
+import json
+import os
+from datetime import datetime
+
+from course_dataset import METRIC_FIELDS, COUNT_FIELDS, dataset_to_courses
+from course_db import row_hash, row_keys
+from complete_workflow import calculate_course_score, get_course_bucket
+from ranking_query import ranking_key
+
+FLMBE_BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
+
+# Depth of the published rankings whose entries and exits are reported
+TOP_K = 15
+
+# Number of largest rank moves reported per bucket
+MAX_MOVES = 10
+
+def load_snapshot(path):
+    """Load the rows of a build: a bucket directory, a dataset file or a course data JS file"""
+    if os.path.isdir(path):
+        courses = []
+        for bucket_file in sorted(glob.glob(os.path.join(path, '*_courses.js'))):
+            with open(bucket_file, 'r', encoding='utf-8') as file:
+                content = file.read()
+            courses.extend(json.loads(content[content.index('['):content.rindex(']') + 1]))
+        return courses
+    if path.endswith('.bin'):
+        # Imported here because dataset_file is only needed for binary snapshots
+        from dataset_file import MappedDataset
+        with MappedDataset(path) as mapped:
+            return dataset_to_courses(mapped.dataset)
+    from create_global_ranking import load_course_data_from_js
+    return load_course_data_from_js(path)
+
+def keyed_rows(courses):
+    """Map each row's course_db row key to (row hash, course)"""
+    return {key: (row_hash(course), course) for key, course in zip(row_keys(courses), courses)}
+
+def bucket_ranks(keyed):
+    """Position of every FLMBE row within its bucket, as {bucket: {row_key: rank}}"""
+    scoped = {bucket: [] for bucket in FLMBE_BUCKETS}
+    for key, (_, course) in keyed.items():
+        bucket = get_course_bucket(course['title'])
+        if bucket in scoped:
+            row = dict(course, composite_score=calculate_course_score(course))
+            scoped[bucket].append((ranking_key(row), key))
+    return {bucket: {key: rank for rank, (_, key) in enumerate(sorted(entries), 1)}
+            for bucket, entries in scoped.items()}
+
+def changed_fields(old, new):
+    """Source fields whose values differ between two versions of a row"""
+    return [field for field in ['title'] + COUNT_FIELDS + METRIC_FIELDS if old.get(field) != new.get(field)]
+
+def describe(key, course, rank=None):
+    entry = {'key': key, 'id': course['id'], 'title': course['title'],
+             'instructor': course['instructor'], 'term': course['term']}
+    if rank is not None:
+        entry['rank'] = rank
+    return entry
+
+def diff_snapshots(old_courses, new_courses, top_k=TOP_K, max_moves=MAX_MOVES):
+    """Compare two builds row by row and rank by rank
+
+    Rows are joined on their course_db row keys through dicts, so the row
+    diff is linear in the number of rows; ranks need one sort per bucket
+    and snapshot.
+    """
+    old = keyed_rows(old_courses)
+    new = keyed_rows(new_courses)
+
+    added = [describe(key, course) for key, (_, course) in new.items() if key not in old]
+    removed = [describe(key, course) for key, (_, course) in old.items() if key not in new]
+    changed = []
+    for key, (digest, course) in new.items():
+        previous = old.get(key)
+        if previous is not None and previous[0] != digest:
+            entry = describe(key, course)
+            entry['fields'] = {field: [previous[1].get(field), course.get(field)]
+                               for field in changed_fields(previous[1], course)}
+            changed.append(entry)
+
+    old_ranks = bucket_ranks(old)
+    new_ranks = bucket_ranks(new)
+    buckets = {}
+    for bucket in FLMBE_BUCKETS:
+        before, after = old_ranks[bucket], new_ranks[bucket]
+        entered = [describe(key, new[key][1], rank) for key, rank in after.items()
+                   if rank <= top_k and before.get(key, top_k + 1) > top_k]
+        left = [describe(key, old[key][1], rank) for key, rank in before.items()
+                if rank <= top_k and after.get(key, top_k + 1) > top_k]
+
+        moves = []
+        for key, rank in after.items():
+            previous = before.get(key)
+            if previous is not None and previous != rank:
+                entry = describe(key, new[key][1], rank)
+                entry['previous_rank'] = previous
+                entry['move'] = previous - rank
+                moves.append(entry)
+        moves.sort(key=lambda x: (-abs(x['move']), x['rank']))
+
+        buckets[bucket] = {
+            'sections': [len(before), len(after)],
+            'entered_top': sorted(entered, key=lambda x: x['rank']),
+            'left_top': sorted(left, key=lambda x: x['rank']),
+            'largest_moves': moves[:max_moves]
+        }
+
+    return {
+        'rows': [len(old), len(new)],
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'buckets': buckets
+    }
+
+def render_rows(heading, rows, columns):
+    """Render one table of the diff report"""
+    if not rows:
+        return f"<h3>{heading}</h3><p class=\"empty\">None</p>\n"
+    header = ''.join(f"<th>{html.escape(label)}</th>" for label, _ in columns)
+    body = ''
+    for row in rows:
+        cells = ''.join(f"<td>{html.escape(str(value(row)))}</td>" for _, value in columns)
+        body += f"<tr>{cells}</tr>\n"
+    return f"<h3>{heading}</h3>\n<table>\n<tr>{header}</tr>\n{body}</table>\n"
+
+def render_diff_html(diff, old_label, new_label):
+    """Render a diff report as a standalone HTML page"""
+    section = [('Course', lambda x: x['title']), ('ID', lambda x: x['id']),
+               ('Instructor', lambda x: x['instructor']), ('Term', lambda x: x['term'])]
+    ranked = [('Rank', lambda x: x['rank'])] + section
+    moved = [('Rank', lambda x: x['rank']), ('Was', lambda x: x['previous_rank']),
+             ('Move', lambda x: f"{x['move']:+d}")] + section
+    fields = section + [('Changed', lambda x: ', '.join(f"{field}: {old} → {new}"
+                                                        for field, (old, new) in x['fields'].items()))]
+
+    title = f"Ranking diff: {html.escape(old_label)} → {html.escape(new_label)}"
+    content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 2rem; color: #2c3e50; }}
+        table {{ border-collapse: collapse; margin-bottom: 1rem; }}
+        th, td {{ border: 1px solid #ddd; padding: 0.3rem 0.6rem; text-align: left; font-size: 0.9rem; }}
+        th {{ background: #f4f6f8; }}
+        .empty {{ color: #888; }}
+    </style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{diff['rows'][0]} rows before, {diff['rows'][1]} after: {len(diff['added'])} added,
+{len(diff['removed'])} removed, {len(diff['changed'])} changed.</p>
+"""
+    content += render_rows('Added rows', diff['added'], section)
+    content += render_rows('Removed rows', diff['removed'], section)
+    content += render_rows('Changed rows', diff['changed'], fields)
+    for bucket, report in diff['buckets'].items():
+        content += f"<h2>{bucket} ({report['sections'][0]} → {report['sections'][1]} sections)</h2>\n"
+        content += render_rows(f"Entered top {TOP_K}", report['entered_top'], ranked)
+        content += render_rows(f"Left top {TOP_K}", report['left_top'], ranked)
+        content += render_rows('Largest rank moves', report['largest_moves'], moved)
+    content += f"<p>Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>\n</body>\n</html>\n"
+    return content
+
+def main():
+    parser = argparse.ArgumentParser(description='Report what changed between two builds of the rankings')
+    parser.add_argument('old', help='bucket directory, dataset file or course data JS of the previous build')
+    parser.add_argument('new', help='the same for the new build')
+    parser.add_argument('--json', default='ranking_diff.json', help='JSON report path')
+    parser.add_argument('--html', default='ranking_diff.html', help='HTML report path')
+    args = parser.parse_args()
+
+    diff = diff_snapshots(load_snapshot(args.old), load_snapshot(args.new))
+    with open(args.json, 'w', encoding='utf-8') as file:
+        json.dump(diff, file, indent=2)
+    with open(args.html, 'w', encoding='utf-8') as file:
+        file.write(render_diff_html(diff, args.old, args.new))
+
+    print(f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed")
+    for bucket, report in diff['buckets'].items():
+        if report['entered_top'] or report['left_top']:
+            print(f"  {bucket}: {len(report['entered_top'])} entered and {len(report['left_top'])} left the top {TOP_K}")
+    print(f"Wrote {args.json} and {args.html}")
+
+if __name__ == "__main__":
+    main()
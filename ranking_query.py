@@ -0,0 +1,239 @@
+import heapq
+import json
+import sys
+
+from course_dataset import METRIC_FIELDS, build_columnar_dataset, column_values, composite_scores, get_value, term_ordinal
+from complete_workflow import DEFAULT_WEIGHTS, get_course_bucket
+
+FLMBE_BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
+
+# Columns that get a value -> row bitmap index
+BITMAP_FIELDS = ['title', 'instructor', 'term', 'bucket', 'hoursPerWeek', 'respondentCount']
+
+# Keys accepted in a query spec
+QUERY_KEYS = {'from', 'to', 'buckets', 'instructor', 'min_respondents', 'min_hours', 'max_hours',
+              'title_contains', 'weights', 'group_by', 'top_k'}
+
+GROUP_FIELDS = ['row', 'title', 'instructor']
+
+class QueryError(ValueError):
+    """Raised when a query spec is malformed"""
+
+def ranking_key(course):
+    """Sort key for ranked rows: best score first, ties broken by row identity"""
+    return (-course['composite_score'], course['id'], course['term'], course['instructor'])
+
+def _bitmap(rows, size):
+    """Pack a list of row indices into an int bitmap"""
+    bits = bytearray((size + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, 'little')
+
+def _rows(mask):
+    """Unpack an int bitmap into ascending row indices"""
+    bits = bin(mask)[:1:-1]
+    rows = []
+    position = bits.find('1')
+    while position != -1:
+        rows.append(position)
+        position = bits.find('1', position + 1)
+    return rows
+
+class QueryIndex:
+    """Bitmap indexes over a columnar dataset
+
+    Every distinct value of an indexed column maps to an int bitmap of the
+    rows holding it. A filter is first evaluated against the (small) set of
+    distinct values, the matching bitmaps are OR-ed together, and the
+    per-column masks are AND-ed, so the per-row work is done by big-int
+    operations rather than a Python loop over every row.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.size = dataset['size']
+        self.all_rows = (1 << self.size) - 1
+
+        columns = dataset['columns']
+        dictionaries = dataset['dictionaries']
+        title_buckets = [get_course_bucket(title) for title in dictionaries['title']]
+        values = {
+            'title': [dictionaries['title'][c] for c in columns['title']],
+            'instructor': [dictionaries['instructor'][c] for c in columns['instructor']],
+            'term': [dictionaries['term'][c] for c in columns['term']],
+            'bucket': [title_buckets[c] for c in columns['title']],
+            'hoursPerWeek': column_values(dataset, 'hoursPerWeek'),
+            'respondentCount': list(columns['respondentCount'])
+        }
+
+        self.bitmaps = {}
+        for field in BITMAP_FIELDS:
+            rows_by_value = {}
+            for row, value in enumerate(values[field]):
+                rows_by_value.setdefault(value, []).append(row)
+            self.bitmaps[field] = {value: _bitmap(rows, self.size) for value, rows in rows_by_value.items()}
+
+        self.terms = sorted((t for t in self.bitmaps['term'] if term_ordinal(t) is not None), key=term_ordinal)
+        self.row_buckets = values['bucket']
+
+    def match(self, field, predicate):
+        """OR together the bitmaps of every distinct value the predicate accepts"""
+        mask = 0
+        for value, bitmap in self.bitmaps[field].items():
+            if predicate(value):
+                mask |= bitmap
+        return mask
+
+def compile_query(index, spec):
+    """Compile a declarative filter spec into a row bitmap"""
+    unknown = set(spec) - QUERY_KEYS
+    if unknown:
+        raise QueryError(f"Unknown query keys: {', '.join(sorted(unknown))}")
+
+    for key in ['min_respondents', 'min_hours', 'max_hours']:
+        value = spec.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise QueryError(f"'{key}' must be a number")
+    for key in ['from', 'to', 'title_contains']:
+        value = spec.get(key)
+        if value is not None and not isinstance(value, str):
+            raise QueryError(f"'{key}' must be a string")
+    for key in ['buckets', 'instructor']:
+        value = spec.get(key)
+        if value is not None and not isinstance(value, str) and not (
+                isinstance(value, list) and all(isinstance(item, str) for item in value)):
+            raise QueryError(f"'{key}' must be a string or a list of strings")
+
+    mask = index.all_rows
+
+    if spec.get('from') or spec.get('to'):
+        bounds = []
+        for key in ['from', 'to']:
+            term = spec.get(key)
+            if term and term_ordinal(term) is None:
+                raise QueryError(f"Invalid term for '{key}': {term}")
+            bounds.append(term_ordinal(term) if term else None)
+        low, high = bounds
+        mask &= index.match('term', lambda t: term_ordinal(t) is not None
+                            and (low is None or term_ordinal(t) >= low)
+                            and (high is None or term_ordinal(t) <= high))
+
+    buckets = spec.get('buckets')
+    if buckets:
+        if isinstance(buckets, str):
+            buckets = [buckets]
+        unknown = set(buckets) - set(FLMBE_BUCKETS + ['Other', 'global'])
+        if unknown:
+            raise QueryError(f"Unknown buckets: {', '.join(sorted(unknown))}")
+        if 'global' in buckets:
+            buckets = FLMBE_BUCKETS
+        mask &= index.match('bucket', lambda b: b in buckets)
+
+    instructor = spec.get('instructor')
+    if instructor:
+        instructors = {instructor} if isinstance(instructor, str) else set(instructor)
+        mask &= index.match('instructor', lambda i: i in instructors)
+
+    if spec.get('min_respondents') is not None:
+        minimum = spec['min_respondents']
+        mask &= index.match('respondentCount', lambda r: r >= minimum)
+
+    if spec.get('min_hours') is not None or spec.get('max_hours') is not None:
+        low = spec.get('min_hours')
+        high = spec.get('max_hours')
+        mask &= index.match('hoursPerWeek', lambda h: h is not None
+                            and (low is None or h >= low) and (high is None or h <= high))
+
+    if spec.get('title_contains'):
+        needle = spec['title_contains'].lower()
+        mask &= index.match('title', lambda t: needle in t.lower())
+
+    return mask
+
+def run_query(index, spec):
+    """Filter, score, group and top-k the dataset for a query spec"""
+    group_by = spec.get('group_by', 'row')
+    if group_by not in GROUP_FIELDS:
+        raise QueryError(f"group_by must be one of {', '.join(GROUP_FIELDS)}")
+    top_k = spec.get('top_k', 15)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        raise QueryError("top_k must be a positive integer")
+    weights = spec.get('weights')
+    if weights is not None:
+        if not isinstance(weights, dict) or not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in weights.values()):
+            raise QueryError("weights must map metric names to numbers")
+        # A misspelt metric would otherwise weight nothing and go unnoticed
+        unknown = set(weights) - set(METRIC_FIELDS)
+        if unknown:
+            raise QueryError(f"Unknown metrics in weights: {', '.join(sorted(unknown))}")
+
+    dataset = index.dataset
+    columns = dataset['columns']
+    dictionaries = dataset['dictionaries']
+
+    def decode(row):
+        course = {field: dictionaries[field][columns[field][row]] for field in ['id', 'title', 'instructor', 'term']}
+        course['respondentCount'] = columns['respondentCount'][row]
+        for field in METRIC_FIELDS:
+            course[field] = get_value(dataset, field, row)
+        course['bucket'] = index.row_buckets[row]
+        return course
+
+    rows = _rows(compile_query(index, spec))
+    scores = composite_scores(dataset, DEFAULT_WEIGHTS if weights is None else weights, rows)
+
+    if group_by == 'row':
+        scored = []
+        for row, score in zip(rows, scores):
+            course = decode(row)
+            course['composite_score'] = score
+            scored.append(course)
+        results = heapq.nsmallest(top_k, scored, key=ranking_key)
+    else:
+        # Group on the integer dictionary codes; names are decoded once per group
+        group_codes = columns[group_by]
+        groups = {}
+        for row, score in zip(rows, scores):
+            course = decode(row)
+            respondents = course['respondentCount']
+            weight = respondents if respondents > 0 else 1
+            code = group_codes[row]
+            group = groups.get(code)
+            if group is None:
+                group = groups[code] = {group_by: dictionaries[group_by][code], 'sections': 0,
+                                        'respondentCount': 0, '_weight': 0, '_hours_weight': 0,
+                                        'composite_score': 0.0, 'hoursPerWeek': 0.0}
+                if group_by == 'title':
+                    group['bucket'] = course['bucket']
+            group['sections'] += 1
+            group['respondentCount'] += respondents
+            group['_weight'] += weight
+            group['composite_score'] += weight * score
+            # Sections that did not report hours are left out of the hours average
+            if course['hoursPerWeek'] is not None:
+                group['hoursPerWeek'] += weight * course['hoursPerWeek']
+                group['_hours_weight'] += weight
+        for group in groups.values():
+            weight = group.pop('_weight')
+            hours_weight = group.pop('_hours_weight')
+            group['composite_score'] /= weight
+            group['hoursPerWeek'] = group['hoursPerWeek'] / hours_weight if hours_weight else None
+        results = heapq.nlargest(top_k, groups.values(), key=lambda x: x['composite_score'])
+
+    return {'matched': len(rows), 'results': results}
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    if len(sys.argv) < 2:
+        print('Usage: python ranking_query.py \'{"buckets": ["Finance"], "group_by": "title", "top_k": 5}\'')
+        return
+
+    spec = json.loads(sys.argv[1])
+    index = QueryIndex(build_columnar_dataset(load_course_data_from_js('course_data.js')))
+    print(json.dumps(run_query(index, spec), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,609 @@
+import argparse
+import hashlib
+import json
+import os
+import signal
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import course_db
+from bucket_rankings import BucketRankings
+from course_dataset import COUNT_FIELDS, METRIC_FIELDS, STRING_FIELDS, build_columnar_dataset, get_value, term_ordinal
+from complete_workflow import DEFAULT_WEIGHTS, get_course_bucket, render_html_rankings, render_index_page
+from dataset_file import MappedDataset
+from materialized_views import load_materialized_views, lookup_view, validate_views
+from ranking_query import QueryError, QueryIndex, run_query
+
+BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
+
+ROW_FIELDS = STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS
+
+# Largest /api/query body accepted; real query specs are a few hundred bytes
+MAX_QUERY_BYTES = 64 * 1024
+
+class RankingIndex:
+    """Immutable snapshot of a columnar course dataset and its indexes
+
+    The dataset may be an in-process build or a read-only mapping of a
+    dataset file; rows are decoded on demand rather than kept as dicts.
+    source keeps the backing mapping (if any) alive for as long as a
+    request still holds this snapshot.
+    """
+
+    def __init__(self, dataset, version=None, source=None, rankings=None):
+        self.dataset = dataset
+        self.version = version
+        self.source = source
+        self.query_index = QueryIndex(self.dataset)
+        term_dictionary = self.dataset['dictionaries']['term']
+
+        self.terms = sorted({t for t in term_dictionary if term_ordinal(t) is not None}, key=term_ordinal)
+        self.term_positions = {term: i for i, term in enumerate(self.terms)}
+        positions_by_code = [self.term_positions.get(term) for term in term_dictionary]
+        self.row_positions = [positions_by_code[code] for code in self.dataset['columns']['term']]
+
+        buckets_by_code = [get_course_bucket(title) for title in self.dataset['dictionaries']['title']]
+        self.bucket_rows = {bucket: [] for bucket in BUCKETS + ['Other']}
+        for index, code in enumerate(self.dataset['columns']['title']):
+            self.bucket_rows[buckets_by_code[code]].append(index)
+
+        self.views = {}
+        # Default-weight rankings over every term; rows are keyed by position
+        # unless the source maintains the rankings itself
+        if rankings is None:
+            rankings = BucketRankings.from_dataset(dataset, self.decode_row)
+        self.rankings = rankings
+
+    def decode_row(self, index):
+        """Decode one row of the dataset into a course dict"""
+        return {field: get_value(self.dataset, field, index) for field in ROW_FIELDS}
+
+    def attach_views(self, view_dirs):
+        """Load materialized views for the all/recent windows that match this dataset"""
+        for window, directory in view_dirs.items():
+            start, end = self.recent_window() if window == 'recent' else (0, len(self.terms) - 1)
+            views = validate_views(load_materialized_views(directory), self.window_buckets(start, end))
+            self.views[window] = views
+
+    def resolve_window(self, start_term=None, end_term=None):
+        """Convert an inclusive term range into (start, end) positions"""
+        for term in [start_term, end_term]:
+            if term and term not in self.term_positions:
+                raise QueryError(f"Unknown term: {term}")
+        start = self.term_positions[start_term] if start_term else 0
+        end = self.term_positions[end_term] if end_term else len(self.terms) - 1
+        if start > end:
+            raise QueryError(f"Window starts after it ends: {start_term} > {end_term}")
+        return start, end
+
+    def recent_window(self, years=2):
+        """Return the window covering the most recent calendar years"""
+        recent_years = sorted({term_ordinal(term) // 4 for term in self.terms}, reverse=True)[:years]
+        start = next(i for i, term in enumerate(self.terms) if term_ordinal(term) // 4 >= min(recent_years))
+        return start, len(self.terms) - 1
+
+    def window_buckets(self, start, end):
+        """Copy the rows inside a term window, grouped by bucket"""
+        buckets = {}
+        for bucket, rows in self.bucket_rows.items():
+            buckets[bucket] = [self.decode_row(i) for i in rows
+                               if self.row_positions[i] is not None and start <= self.row_positions[i] <= end]
+        return buckets
+
+    def rank(self, bucket=None, start=None, end=None, weights=None, top_k=15):
+        """Rank a bucket (or all FLMBE buckets) over a term window"""
+        if bucket is not None and bucket not in self.bucket_rows:
+            raise QueryError(f"Unknown bucket: {bucket}")
+        spec = {'buckets': [bucket] if bucket else ['global'], 'weights': weights, 'top_k': top_k}
+        if start is not None:
+            spec['from'] = self.terms[start]
+            spec['to'] = self.terms[end]
+        return run_query(self.query_index, spec)['results']
+
+class ResponseCache:
+    """Thread-safe LRU cache of rendered responses keyed by normalised query"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, content_type, body):
+        entry = {
+            'content_type': content_type,
+            'body': body,
+            'etag': '"' + hashlib.sha1(body).hexdigest() + '"'
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+def load_weight_presets(path):
+    """Load {user: {preset: weights}} presets; '*' holds presets shared by everyone"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def parse_weights(params, presets):
+    """Resolve weights from a preset and/or an explicit weights=metric:value,... list"""
+    weights = None
+    preset = params.get('preset')
+    if preset:
+        user_presets = presets.get(params.get('user', ''), {})
+        weights = user_presets.get(preset) or presets.get('*', {}).get(preset)
+        if weights is None:
+            raise QueryError(f"Unknown weight preset: {preset}")
+        weights = dict(weights)
+
+    if params.get('weights'):
+        weights = dict(weights or {})
+        for item in params['weights'].split(','):
+            metric, _, value = item.partition(':')
+            if metric not in DEFAULT_WEIGHTS:
+                raise QueryError(f"Unknown metric in weights: {metric}")
+            try:
+                weights[metric] = float(value)
+            except ValueError:
+                raise QueryError(f"Invalid weight for {metric}: {value}")
+    return weights
+
+def parse_top_k(params, default=15):
+    """Read the top-k parameter"""
+    try:
+        top_k = int(params.get('k', default))
+    except ValueError:
+        raise QueryError(f"Invalid k: {params['k']}")
+    if top_k < 1:
+        raise QueryError("k must be positive")
+    return top_k
+
+class RankingRequestHandler(BaseHTTPRequestHandler):
+    """Serve ranking pages and JSON queries from the in-memory index"""
+
+    # Set on the server class by make_server()
+    snapshots = None
+    cache = None
+    presets = {}
+
+    # Cleared for HEAD requests, which get the headers of the matching GET
+    write_body = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        cache_key = url.path + '?' + '&'.join(f"{k}={params[k]}" for k in sorted(params))
+        self.respond(cache_key, url.path, params)
+
+    def do_HEAD(self):
+        self.write_body = False
+        self.do_GET()
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/api/query':
+            self.send_json(404, {'error': f"Not found: {url.path}"})
+            return
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_json(411, {'error': 'Content-Length is required'})
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_json(400, {'error': 'Content-Length must be a non-negative integer'})
+            return
+        if length > MAX_QUERY_BYTES:
+            self.send_json(413, {'error': f"Query body is larger than {MAX_QUERY_BYTES} bytes"})
+            return
+        try:
+            body = self.rfile.read(length).decode('utf-8')
+        except UnicodeDecodeError:
+            self.send_json(400, {'error': 'Query body must be UTF-8'})
+            return
+        self.respond(self.canonical_query_key(body), url.path, {'q': body})
+
+    @staticmethod
+    def canonical_query_key(body):
+        """Cache key for a JSON query that ignores key order and whitespace"""
+        try:
+            return '/api/query?q=' + json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            return '/api/query?q=' + body
+
+    @staticmethod
+    def etag_matches(if_none_match, etag):
+        """True if an If-None-Match header lists etag or is '*'
+
+        Tags are compared weakly, as RFC 9110 requires for If-None-Match,
+        so a W/ prefix is ignored.
+        """
+        if if_none_match is None:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in tags)
+
+    def respond(self, cache_key, path, params):
+        """Serve a response from the cache, rendering it on a miss
+
+        The snapshot is read once per request, so a reload that lands
+        mid-request does not mix data from two versions.
+        """
+        index = self.snapshots.current
+        cache_key = f"{index.version}:{cache_key}"
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            try:
+                rendered = self.render(index, path, params)
+            except QueryError as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            if rendered is None:
+                self.send_json(404, {'error': f"Not found: {path}"})
+                return
+            entry = self.cache.put(cache_key, *rendered)
+
+        if self.etag_matches(self.headers.get('If-None-Match'), entry['etag']):
+            self.send_response(304)
+            self.send_header('ETag', entry['etag'])
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', entry['content_type'])
+        self.send_header('Content-Length', str(len(entry['body'])))
+        self.send_header('ETag', entry['etag'])
+        self.end_headers()
+        if self.write_body:
+            self.wfile.write(entry['body'])
+
+    def render(self, index, path, params):
+        """Build (content_type, body) for a path, or None if it does not exist"""
+        if path in ('/', '/index.html'):
+            return 'text/html; charset=utf-8', render_index_page().encode('utf-8')
+
+        if path in ('/all.html', '/recent.html', '/rankings.html'):
+            if path == '/recent.html':
+                start, end = index.recent_window()
+                title = 'FLMBE Course Rankings - Recent Data'
+                subtitle = 'Based on student evaluations from the most recent 2 years'
+            else:
+                start, end = index.resolve_window(params.get('from'), params.get('to'))
+                title = 'FLMBE Course Rankings'
+                subtitle = f"Based on student evaluations from {index.terms[start]} to {index.terms[end]}"
+            weights = parse_weights(params, self.presets)
+            html = render_html_rankings(index.window_buckets(start, end), title, subtitle, weights=weights)
+            return 'text/html; charset=utf-8', html.encode('utf-8')
+
+        if path == '/api/terms':
+            return self.json_body({'terms': index.terms})
+
+        if path == '/api/rankings':
+            window = params.get('window')
+            if window not in (None, 'all', 'recent'):
+                raise QueryError(f"Unknown window: {window}")
+            if window and (params.get('from') or params.get('to')):
+                raise QueryError("window cannot be combined with from/to")
+            bucket = params.get('bucket')
+            if bucket == 'global':
+                bucket = None
+            if bucket is not None and bucket not in index.bucket_rows:
+                raise QueryError(f"Unknown bucket: {bucket}")
+
+            if window == 'recent':
+                start, end = index.recent_window()
+            else:
+                window = 'all' if not params.get('from') and not params.get('to') else None
+                start, end = index.resolve_window(params.get('from'), params.get('to'))
+            weights = parse_weights(params, self.presets)
+            top_k = parse_top_k(params)
+
+            ranked = None
+            # The maintained rankings cover the FLMBE buckets only; 'Other' goes through index.rank
+            if (window == 'all' and (weights is None or weights == DEFAULT_WEIGHTS)
+                    and (bucket or 'global') in index.rankings.rankings):
+                ranked = index.rankings.top(bucket or 'global', top_k)
+            elif window:
+                ranked = lookup_view(index.views.get(window, {}), bucket or 'global', top_k, weights)
+            if ranked is None:
+                ranked = index.rank(bucket, start, end, weights, top_k)
+            return self.json_body({
+                'bucket': bucket or 'global',
+                'from': index.terms[start],
+                'to': index.terms[end],
+                'results': ranked
+            })
+
+        if path == '/api/query':
+            try:
+                spec = json.loads(params.get('q', '{}'))
+            except ValueError as e:
+                raise QueryError(f"Query is not valid JSON: {e}")
+            if not isinstance(spec, dict):
+                raise QueryError("Query must be a JSON object")
+            return self.json_body(run_query(index.query_index, spec))
+
+        return None
+
+    @staticmethod
+    def json_body(payload):
+        return 'application/json', json.dumps(payload).encode('utf-8')
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.write_body:
+            self.wfile.write(body)
+
+class DatasetSource:
+    """A dataset on disk (dataset file, course database or course_data.js) that can be reloaded"""
+
+    def __init__(self, kind, path, quantized=False):
+        self.kind = kind
+        self.path = path
+        self.quantized = quantized
+        self.signature = None
+        # Row cache for database sources, so a reload only reads changed rows from disk
+        self.rows = {}
+        self.hashes = {}
+        self.rankings = None
+
+    def stat_signature(self):
+        """Identify the current contents of the source files, or None if missing"""
+        paths = [self.path, self.path + '-wal'] if self.kind == 'db' else [self.path]
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if path == self.path:
+                    return None
+                continue
+            signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def changed(self):
+        """True if the source has been modified since it was last loaded"""
+        signature = self.stat_signature()
+        return signature is not None and signature != self.signature
+
+    def load(self):
+        """Read the source into a new snapshot
+
+        Every load builds a new columnar dataset and query index over all
+        rows; only a database source's bucket rankings are patched from the
+        previous load.
+
+        The signature is taken before reading, so a write that lands during
+        the load is picked up by the next check, but only recorded once the
+        snapshot has been built: a failed load is retried.
+        """
+        from create_global_ranking import load_course_data_from_js
+
+        signature = self.stat_signature()
+        if self.kind == 'file':
+            mapped = MappedDataset(self.path)
+            index = RankingIndex(mapped.dataset, mapped.version, mapped)
+        elif self.kind == 'db':
+            courses, version, rankings = self.load_db_rows()
+            index = RankingIndex(build_columnar_dataset(courses, self.quantized), version, rankings=rankings)
+        else:
+            courses = load_course_data_from_js(self.path)
+            version = hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()
+            index = RankingIndex(build_columnar_dataset(courses, self.quantized), version)
+        self.signature = signature
+        return index
+
+    def load_db_rows(self):
+        """Read the database's sections, fetching only rows whose hash changed since the last load
+
+        Returns every row, since the caller rebuilds the dataset from
+        scratch, plus BucketRankings updated with just the changed rows.
+        """
+        conn = course_db.connect(self.path)
+        hashes = {key: digest for key, (_, _, digest) in course_db.fetch_row_hashes(conn).items()}
+        if self.rows:
+            fetched = course_db.fetch_courses_by_key(conn, [key for key, digest in hashes.items()
+                                                            if self.hashes.get(key) != digest])
+        else:
+            fetched = course_db.fetch_courses_by_key(conn)
+        conn.close()
+
+        if self.rankings is None:
+            rankings = BucketRankings(fetched.items())
+        else:
+            # Update a copy so the snapshot still being served keeps its own rankings
+            rankings = self.rankings.copy()
+            for key in self.hashes.keys() - hashes.keys():
+                rankings.remove(key)
+            for key, course in fetched.items():
+                rankings.upsert(key, course)
+
+        self.rows = {key: fetched[key] if key in fetched else self.rows[key] for key in hashes}
+        self.hashes = hashes
+        self.rankings = rankings
+        version = hashlib.sha1(''.join(hashes.values()).encode('utf-8')).hexdigest()
+        return list(self.rows.values()), version, rankings
+
+class SnapshotManager:
+    """Hold the current snapshot and swap in a rebuilt one when the source changes
+
+    Requests pick up self.current once and keep using it, so in-flight
+    requests finish against the old snapshot while new ones see the new
+    one. Rebuilding happens on a background thread; the swap itself is a
+    single reference assignment.
+    """
+
+    def __init__(self, source, cache, view_dirs=None):
+        self.source = source
+        self.cache = cache
+        self.view_dirs = view_dirs
+        self.wake = threading.Event()
+        self.current = self.build()
+
+    def build(self):
+        """Load the source and build every index for a new snapshot"""
+        index = self.source.load()
+        if self.view_dirs:
+            index.attach_views(self.view_dirs)
+        return index
+
+    def reload_if_changed(self):
+        """Rebuild and swap if the source changed; returns True on a swap"""
+        if not self.source.changed():
+            return False
+        previous = self.current
+        self.current = self.build()
+        if self.current.version == previous.version:
+            return False
+        # Entries are keyed by version, so this only frees memory early
+        self.cache.clear()
+        print(f"Reloaded {self.source.path}: {self.current.dataset['size']} courses"
+              f" (version {str(self.current.version)[:12]})")
+        return True
+
+    def watch(self, interval=5.0):
+        """Poll the source on a daemon thread; wake.set() forces an immediate check"""
+        def run():
+            while True:
+                self.wake.wait(interval)
+                self.wake.clear()
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    # Keep serving the current snapshot if the new data is unreadable
+                    print(f"Reload of {self.source.path} failed: {e}")
+
+        thread = threading.Thread(target=run, name='dataset-reloader', daemon=True)
+        thread.start()
+        return thread
+
+def make_server(source, host='127.0.0.1', port=8000, presets=None, cache_size=256, view_dirs=None):
+    """Build a threaded HTTP server around a freshly loaded snapshot"""
+    cache = ResponseCache(cache_size)
+    handler = type('Handler', (RankingRequestHandler,), {
+        'snapshots': SnapshotManager(source, cache, view_dirs),
+        'cache': cache,
+        'presets': presets or {}
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve(server, reload_interval=None):
+    """Serve forever, watching the dataset source if a reload interval is given"""
+    if reload_interval:
+        snapshots = server.RequestHandlerClass.snapshots
+        snapshots.watch(reload_interval)
+        signal.signal(signal.SIGHUP, lambda signum, frame: snapshots.wake.set())
+    server.serve_forever()
+
+def serve_preforked(server, workers, reload_interval=None):
+    """Fork worker processes that all accept on the server's listening socket
+
+    Workers inherit the index and the dataset mapping from the parent, so a
+    file-backed dataset is shared through the page cache instead of copied.
+    SIGHUP sent to the parent is forwarded to every worker, each of which
+    reloads its own snapshot.
+    """
+    parent = os.getpid()
+    children = []
+
+    def forward_hangup(signum, frame):
+        # Workers inherit this handler until serve() replaces it; only the parent forwards
+        if os.getpid() != parent:
+            return
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    # Installed before forking so the default action never kills the parent or a new worker
+    signal.signal(signal.SIGHUP, forward_hangup)
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(server, reload_interval)
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # Treat SIGTERM like Ctrl-C so the workers are not left orphaned
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            os.waitpid(pid, 0)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve FLMBE rankings over HTTP')
+    parser.add_argument('--data', default='course_data.js')
+    parser.add_argument('--db', help='read sections from a course database instead of --data')
+    parser.add_argument('--dataset-file', help='memory-map a dataset file written by dataset_file.py instead of --data')
+    parser.add_argument('--workers', type=int, default=1, help='number of pre-forked server processes')
+    parser.add_argument('--quantized', action='store_true',
+                        help='keep metrics as integer tenths when loading --data or --db')
+    parser.add_argument('--reload-interval', type=float, default=5.0,
+                        help='seconds between checks for a changed dataset (0 disables hot reload)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--presets', default='weight_presets.json')
+    parser.add_argument('--cache-size', type=int, default=256)
+    args = parser.parse_args()
+
+    if args.dataset_file:
+        source = DatasetSource('file', args.dataset_file)
+    elif args.db:
+        source = DatasetSource('db', args.db, args.quantized)
+    else:
+        source = DatasetSource('js', args.data, args.quantized)
+    server = make_server(source, args.host, args.port, load_weight_presets(args.presets), args.cache_size,
+                         {'all': 'buckets_all', 'recent': 'buckets_recent'})
+    size = server.RequestHandlerClass.snapshots.current.dataset['size']
+    print(f"Serving {size} courses on http://{args.host}:{args.port}/"
+          + (f" with {args.workers} workers" if args.workers > 1 else ""))
+    try:
+        if args.workers > 1:
+            serve_preforked(server, args.workers, args.reload_interval)
+        else:
+            serve(server, args.reload_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
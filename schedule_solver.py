@@ -0,0 +1,180 @@
+import heapq
+import json
+import sys
+
+from complete_workflow import calculate_course_score
+
+def build_course_lookup(courses):
+    """Average score and hours per (title, instructor) and per title
+
+    Hours are averaged over the sections that reported them, and are None
+    when none did.
+    """
+    totals = {}
+    for course in courses:
+        respondents = course.get('respondentCount', 0)
+        weight = respondents if respondents > 0 else 1
+        score = calculate_course_score(course)
+        hours = course.get('hoursPerWeek')
+        for key in [(course['title'], course['instructor']), (course['title'], None)]:
+            entry = totals.setdefault(key, [0, 0.0, 0.0, 0])
+            entry[0] += weight
+            entry[1] += weight * score
+            if hours is not None:
+                entry[2] += weight * hours
+                entry[3] += weight
+
+    return {
+        key: {'composite_score': score / weight,
+              'hoursPerWeek': round(hours / hours_weight, 1) if hours_weight else None}
+        for key, (weight, score, hours, hours_weight) in totals.items()
+    }
+
+def _section_slots(section):
+    """Return the set of time slots a section meets in"""
+    slots = section.get('time_slots')
+    if slots is None:
+        slots = [section['time_slot']] if section.get('time_slot') else []
+    return frozenset(slots)
+
+def build_variables(request, lookup):
+    """Turn desired courses and required categories into solver variables
+
+    Each variable has a domain of candidate sections, already restricted to
+    the student's preferred time slots. Desired courses are optional;
+    required categories must be filled by exactly one of their courses.
+    """
+    sections_by_title = {}
+    for section in request.get('sections', []):
+        stats = lookup.get((section['title'], section.get('instructor')))
+        if stats is None:
+            stats = lookup.get((section['title'], None))
+        if stats is None:
+            continue
+        hours = stats['hoursPerWeek']
+        if hours is None:
+            # The instructor's sections reported no hours; use the title's
+            hours = lookup[(section['title'], None)]['hoursPerWeek']
+        # A section whose hours are unknown cannot be checked against the budget
+        if hours is None:
+            continue
+        sections_by_title.setdefault(section['title'], []).append({
+            'title': section['title'],
+            'section': section.get('section', ''),
+            'instructor': section.get('instructor', ''),
+            'slots': _section_slots(section),
+            'composite_score': stats['composite_score'],
+            'hoursPerWeek': hours
+        })
+
+    def domain_for(entries):
+        domain = []
+        for entry in entries:
+            preferred = entry.get('time_slots')
+            for section in sections_by_title.get(entry['title'], []):
+                if not preferred or section['slots'] <= set(preferred):
+                    domain.append(section)
+        return sorted(domain, key=lambda x: x['composite_score'], reverse=True)
+
+    variables = []
+    for entry in request.get('desired', []):
+        variables.append({'name': entry['title'], 'required': False, 'domain': domain_for([entry])})
+    for category, entries in request.get('required', {}).items():
+        variables.append({'name': category, 'required': True, 'domain': domain_for(entries)})
+    return variables
+
+def solve_schedules(variables, max_hours, k=3):
+    """Find the k highest-scoring conflict-free schedules within max_hours
+
+    Backtracking search with forward checking: choosing a section removes
+    every section that shares a time slot or title from the remaining
+    domains, and a branch dies as soon as a required category is left with
+    no options. The most constrained variable is expanded first, and
+    branches are cut when the best remaining scores cannot beat the k-th
+    schedule or the lightest required options break the hours budget.
+    """
+    best = []
+    counter = 0
+
+    def bounds(pending):
+        score = 0.0
+        hours = 0.0
+        for variable, domain in pending:
+            if domain:
+                score += domain[0]['composite_score']
+            if variable['required']:
+                hours += min(section['hoursPerWeek'] for section in domain)
+        return score, hours
+
+    def record(score, hours, chosen):
+        nonlocal counter
+        counter += 1
+        entry = (score, counter, hours, list(chosen))
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        else:
+            heapq.heappushpop(best, entry)
+
+    def search(pending, chosen, score, hours):
+        if any(variable['required'] and not domain for variable, domain in pending):
+            return
+        if not pending:
+            record(score, hours, chosen)
+            return
+
+        optimistic_score, required_hours = bounds(pending)
+        if hours + required_hours > max_hours + 1e-9:
+            return
+        if len(best) == k and score + optimistic_score <= best[0][0]:
+            return
+
+        # Most constrained variable first, required before optional on ties
+        pending = sorted(pending, key=lambda item: (len(item[1]), not item[0]['required']))
+        (variable, domain), rest = pending[0], pending[1:]
+
+        for section in domain:
+            new_hours = hours + section['hoursPerWeek']
+            if new_hours > max_hours + 1e-9:
+                continue
+            pruned = [
+                (other, [s for s in other_domain
+                         if not (s['slots'] & section['slots']) and s['title'] != section['title']])
+                for other, other_domain in rest
+            ]
+            chosen.append((variable['name'], section))
+            search(pruned, chosen, score + section['composite_score'], new_hours)
+            chosen.pop()
+
+        if not variable['required']:
+            search(rest, chosen, score, hours)
+
+    search([(variable, variable['domain']) for variable in variables], [], 0.0, 0.0)
+
+    schedules = []
+    for score, _, hours, chosen in sorted(best, reverse=True):
+        schedules.append({
+            'total_score': score,
+            'total_hours': round(hours, 1),
+            'courses': [dict(section, slots=sorted(section['slots']), slot_for=name)
+                        for name, section in chosen]
+        })
+    return schedules
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    if len(sys.argv) < 2:
+        print("Usage: python schedule_solver.py <planner_request.json>")
+        return
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as file:
+        request = json.load(file)
+
+    lookup = build_course_lookup(load_course_data_from_js(request.get('data', 'course_data.js')))
+    variables = build_variables(request, lookup)
+    schedules = solve_schedules(variables, request.get('max_hours', 40), request.get('k', 3))
+
+    print(json.dumps(schedules, indent=2))
+
+if __name__ == "__main__":
+    main()
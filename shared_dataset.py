@@ -0,0 +1,103 @@
+from array import array
+from collections.abc import Sequence
+
+# Every column starts on an 8-byte boundary so memoryview casts are aligned
+ALIGNMENT = 8
+
+class SharedStringTable(Sequence):
+    """Read-only string dictionary backed by an offset table and a UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('string table index out of range')
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return bytes(self._blob[start:end]).decode('utf-8')
+
+def _align(offset):
+    """Round an offset up to the next column boundary"""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _encode_string_table(dictionary):
+    """Encode a string dictionary as (offsets, blob)"""
+    offsets = array('Q', [0])
+    encoded = []
+    for value in dictionary:
+        data = value.encode('utf-8')
+        encoded.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return offsets, b''.join(encoded)
+
+def plan_layout(dataset, indexes=None):
+    """Work out where each column, string table and index lives in one flat buffer
+
+    Returns (layout, payloads, total_size); layout entries carry offsets
+    relative to the start of the buffer.
+    """
+    segments = []
+    for field, values in dataset['columns'].items():
+        segments.append(('column', field, values.typecode, values.tobytes()))
+    for field, dictionary in dataset['dictionaries'].items():
+        offsets, blob = _encode_string_table(dictionary)
+        segments.append(('offsets', field, 'Q', offsets.tobytes()))
+        segments.append(('blob', field, 'B', blob))
+    for name, values in (indexes or {}).items():
+        segments.append(('index', name, values.typecode, values.tobytes()))
+
+    layout = []
+    position = 0
+    for kind, field, typecode, data in segments:
+        position = _align(position)
+        layout.append({
+            'kind': kind,
+            'field': field,
+            'typecode': typecode,
+            'offset': position,
+            'nbytes': len(data)
+        })
+        position += len(data)
+    return layout, [segment[3] for segment in segments], max(position, 1)
+
+def map_dataset(buffer, size, layout, views):
+    """Rebuild a dataset dict as typed memoryviews over a flat buffer
+
+    Every memoryview created is appended to views so the caller can release
+    them before closing the underlying mapping.
+    """
+    columns = {}
+    offsets = {}
+    blobs = {}
+    indexes = {}
+    for entry in layout:
+        view = buffer[entry['offset']:entry['offset'] + entry['nbytes']]
+        views.append(view)
+        if entry['typecode'] != 'B':
+            view = view.cast(entry['typecode'])
+            views.append(view)
+
+        if entry['kind'] == 'column':
+            columns[entry['field']] = view
+        elif entry['kind'] == 'offsets':
+            offsets[entry['field']] = view
+        elif entry['kind'] == 'blob':
+            blobs[entry['field']] = view
+        else:
+            indexes[entry['field']] = view
+
+    dataset = {
+        'size': size,
+        'columns': columns,
+        'dictionaries': {field: SharedStringTable(offsets[field], blobs[field]) for field in offsets}
+    }
+    if indexes:
+        dataset['indexes'] = indexes
+    return dataset
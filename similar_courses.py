@@ -0,0 +1,167 @@
+import heapq
+import math
+
+from complete_workflow import get_course_bucket
+
+PROFILE_FIELDS = ['clarity', 'interest', 'usefulness', 'overall', 'recommendation', 'hoursPerWeek']
+
+BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing', 'Other']
+
+# Leaves hold at most this many points before the tree splits them
+LEAF_SIZE = 8
+
+def build_course_profiles(courses):
+    """Average each course title's metrics into one profile
+
+    Each metric is averaged over the sections that answered it, weighted
+    by respondents; a title with no answers for a metric gets None.
+    """
+    totals = {}
+    for course in courses:
+        respondents = course.get('respondentCount', 0)
+        weight = respondents if respondents > 0 else 1
+        entry = totals.get(course['title'])
+        if entry is None:
+            # [weighted sum, weight] per profile field
+            entry = totals[course['title']] = [[0.0, 0] for _ in PROFILE_FIELDS]
+        for sums, field in zip(entry, PROFILE_FIELDS):
+            value = course.get(field)
+            if value is not None:
+                sums[0] += weight * value
+                sums[1] += weight
+
+    profiles = []
+    for title, entry in totals.items():
+        profile = {'title': title, 'bucket': get_course_bucket(title)}
+        for (total, weight), field in zip(entry, PROFILE_FIELDS):
+            profile[field] = total / weight if weight else None
+        profiles.append(profile)
+    return profiles
+
+def profile_vectors(profiles, bucket_weight=0.0):
+    """Standardise profiles into feature vectors, optionally one-hot bucketed
+
+    A missing profile value is placed at the field's mean, so it adds no
+    distance along that dimension.
+    """
+    vectors = [[] for _ in profiles]
+    for field in PROFILE_FIELDS:
+        present = [profile[field] for profile in profiles if profile[field] is not None]
+        mean = sum(present) / len(present) if present else 0.0
+        values = [mean if profile[field] is None else profile[field] for profile in profiles]
+        spread = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)) or 1.0
+        for vector, value in zip(vectors, values):
+            vector.append((value - mean) / spread)
+
+    if bucket_weight:
+        for vector, profile in zip(vectors, profiles):
+            vector.extend(bucket_weight if profile['bucket'] == bucket else 0.0 for bucket in BUCKETS)
+    return vectors
+
+class KDTree:
+    """k-d tree over feature vectors with bounding-box pruning"""
+
+    def __init__(self, vectors, hours):
+        self.vectors = vectors
+        self.hours = hours
+        self.dimensions = len(vectors[0]) if vectors else 0
+        self.root = self._build(list(range(len(vectors)))) if vectors else None
+
+    def _build(self, indices):
+        """Recursively split points on the widest dimension"""
+        lows = [min(self.vectors[i][d] for i in indices) for d in range(self.dimensions)]
+        highs = [max(self.vectors[i][d] for i in indices) for d in range(self.dimensions)]
+        node = {
+            'lows': lows,
+            'highs': highs,
+            'min_hours': min(self.hours[i] for i in indices),
+            'indices': None,
+            'children': None
+        }
+        if len(indices) <= LEAF_SIZE:
+            node['indices'] = indices
+            return node
+
+        dimension = max(range(self.dimensions), key=lambda d: highs[d] - lows[d])
+        indices.sort(key=lambda i: self.vectors[i][dimension])
+        middle = len(indices) // 2
+        node['children'] = [self._build(indices[:middle]), self._build(indices[middle:])]
+        return node
+
+    @staticmethod
+    def _box_distance(node, point):
+        """Squared distance from a point to a node's bounding box"""
+        total = 0.0
+        for value, low, high in zip(point, node['lows'], node['highs']):
+            if value < low:
+                total += (low - value) ** 2
+            elif value > high:
+                total += (value - high) ** 2
+        return total
+
+    def query(self, point, k, exclude=None, max_hours=None):
+        """Return [(distance, index)] of the k nearest points
+
+        With max_hours set, only points with strictly fewer hours qualify,
+        and whole subtrees whose lightest point is too heavy are skipped.
+        """
+        best = []
+
+        def visit(node):
+            if max_hours is not None and node['min_hours'] >= max_hours:
+                return
+            if len(best) == k and self._box_distance(node, point) >= -best[0][0]:
+                return
+
+            if node['indices'] is not None:
+                for i in node['indices']:
+                    if i == exclude or (max_hours is not None and self.hours[i] >= max_hours):
+                        continue
+                    distance = sum((a - b) ** 2 for a, b in zip(point, self.vectors[i]))
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, i))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, i))
+                return
+
+            # Visit the closer child first so the bound tightens sooner
+            children = sorted(node['children'], key=lambda child: self._box_distance(child, point))
+            for child in children:
+                visit(child)
+
+        if self.root is not None:
+            visit(self.root)
+        return sorted((math.sqrt(-d), i) for d, i in best)
+
+def precompute_similar_courses(courses, k=3, bucket_weight=0.0):
+    """Find the k most similar courses, and the k most similar lighter ones, for every course"""
+    profiles = build_course_profiles(courses)
+    if not profiles:
+        return {}
+    vectors = profile_vectors(profiles, bucket_weight)
+    # A title with no reported hours is never offered as the lighter option
+    hours = [math.inf if profile['hoursPerWeek'] is None else profile['hoursPerWeek'] for profile in profiles]
+    tree = KDTree(vectors, hours)
+
+    similar = {}
+    for i, profile in enumerate(profiles):
+        nearest = tree.query(vectors[i], k, exclude=i)
+        lighter = tree.query(vectors[i], k, exclude=i, max_hours=hours[i]) if hours[i] != math.inf else []
+        similar[profile['title']] = {
+            'similar': [profiles[j]['title'] for _, j in nearest],
+            'fewer_hours': [profiles[j]['title'] for _, j in lighter]
+        }
+    return similar
+
+def main():
+    import json
+    import sys
+    from create_global_ranking import load_course_data_from_js
+
+    similar = precompute_similar_courses(load_course_data_from_js('course_data.js'), k=5)
+    titles = sys.argv[1:] or sorted(similar)[:5]
+    for title in titles:
+        print(json.dumps({title: similar.get(title)}, indent=2))
+
+if __name__ == "__main__":
+    main()
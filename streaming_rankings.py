@@ -0,0 +1,264 @@
+import argparse
+import heapq
+import json
+import os
+from multiprocessing import Pool
+
+from course_dataset import COUNT_FIELDS, METRIC_FIELDS, STRING_FIELDS, term_ordinal
+from complete_workflow import calculate_course_score, get_course_bucket, iter_course_csv
+from multi_source import expand_sources
+from quantile_sketch import KLLSketch
+from ranking_query import ranking_key
+
+FLMBE_BUCKETS = ['Society', 'Economy', 'Strategy', 'People', 'Decisions', 'Operations', 'Finance', 'Marketing']
+
+# Calendar years in the recent window, as in course_db.fetch_recent_courses
+RECENT_YEARS = 2
+
+class _Worse:
+    """Sort key wrapper that inverts ordering, so a min-heap keeps the worst kept row on top"""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+class BoundedTopK:
+    """The k best rows by ranking_key seen so far, in O(k) memory
+
+    Ties on ranking_key go to the row seen first, matching a stable sort
+    of the rows in input order.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def push(self, row, sequence):
+        entry = (_Worse((ranking_key(row), sequence)), row)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[0].key < self.heap[0][0].key:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other):
+        for entry in other.heap:
+            self.push(entry[1], entry[0].key[1])
+
+    def results(self):
+        return [row for _, row in sorted(self.heap, key=lambda entry: entry[0].key)]
+
+class StreamingRankings:
+    """Single-pass rankings and aggregates over a stream of course rows
+
+    Nothing is kept per row. Memory is bounded by the top-k heaps and score
+    sketches (one per bucket for all terms, plus one per bucket and
+    calendar year, since the recent window is only known once the newest
+    term has been seen) and by one running sum per (title, year) group.
+
+    Instances built over separate inputs merge into the rankings of the
+    concatenated input; source orders rows from different inputs for
+    tie-breaking.
+    """
+
+    def __init__(self, k=15, source=0):
+        self.k = k
+        self.source = source
+        self.rows = 0
+        self.years = set()
+        self.all_terms = self._heaps()
+        self.all_sketches = self._sketches()
+        self.by_year = {}
+        self.sketches_by_year = {}
+        self.groups = {}
+        self.title_buckets = {}
+
+    def _heaps(self):
+        return {scope: BoundedTopK(self.k) for scope in FLMBE_BUCKETS + ['global']}
+
+    def _sketches(self):
+        return {scope: KLLSketch() for scope in FLMBE_BUCKETS + ['global']}
+
+    def add(self, course):
+        """Fold one course row into every heap, sketch and aggregate it belongs to"""
+        sequence = (self.source, self.rows)
+        self.rows += 1
+
+        title = course['title']
+        bucket = self.title_buckets.get(title)
+        if bucket is None:
+            bucket = self.title_buckets[title] = get_course_bucket(title)
+
+        ordinal = term_ordinal(course['term'])
+        year = ordinal // 4 if ordinal is not None else None
+        if year is not None:
+            self.years.add(year)
+
+        score = calculate_course_score(course)
+        respondents = course.get('respondentCount') or 0
+        weight = respondents if respondents > 0 else 1
+        # [sections, respondents, weight, weighted score, weighted hours, weight reporting hours]
+        sums = self.groups.get((title, year))
+        if sums is None:
+            sums = self.groups[(title, year)] = [0, 0, 0, 0.0, 0.0, 0]
+        sums[0] += 1
+        sums[1] += respondents
+        sums[2] += weight
+        sums[3] += weight * score
+        if course.get('hoursPerWeek') is not None:
+            sums[4] += weight * course['hoursPerWeek']
+            sums[5] += weight
+
+        if bucket not in FLMBE_BUCKETS:
+            return
+        row = {field: course.get(field) for field in STRING_FIELDS + COUNT_FIELDS + METRIC_FIELDS}
+        row['bucket'] = bucket
+        row['composite_score'] = score
+
+        heaps = [self.all_terms]
+        sketches = [self.all_sketches]
+        if year is not None:
+            if year not in self.by_year:
+                self.by_year[year] = self._heaps()
+                self.sketches_by_year[year] = self._sketches()
+            heaps.append(self.by_year[year])
+            sketches.append(self.sketches_by_year[year])
+        for scoped in heaps:
+            scoped[bucket].push(row, sequence)
+            scoped['global'].push(row, sequence)
+        for scoped in sketches:
+            scoped[bucket].update(score)
+            scoped['global'].update(score)
+
+    def merge(self, other):
+        """Fold in the rankings of another input, as if its rows had followed this one's"""
+        self.rows += other.rows
+        self.years |= other.years
+        self.title_buckets.update(other.title_buckets)
+        for scope in FLMBE_BUCKETS + ['global']:
+            self.all_terms[scope].merge(other.all_terms[scope])
+            self.all_sketches[scope].merge(other.all_sketches[scope])
+        for year in other.by_year:
+            if year not in self.by_year:
+                self.by_year[year] = self._heaps()
+                self.sketches_by_year[year] = self._sketches()
+            for scope in FLMBE_BUCKETS + ['global']:
+                self.by_year[year][scope].merge(other.by_year[year][scope])
+                self.sketches_by_year[year][scope].merge(other.sketches_by_year[year][scope])
+        for group, sums in other.groups.items():
+            entry = self.groups.setdefault(group, [0, 0, 0, 0.0, 0.0, 0])
+            for i, value in enumerate(sums):
+                entry[i] += value
+        return self
+
+    def recent_years(self):
+        return sorted(self.years, reverse=True)[:RECENT_YEARS]
+
+    def top(self, window='all'):
+        """Top-k rows per bucket and globally for the 'all' or 'recent' window
+
+        Each row carries its estimated percentile within its bucket and
+        across all FLMBE buckets for that window.
+        """
+        if window == 'all':
+            heaps, sketches = self.all_terms, self.all_sketches
+        else:
+            heaps, sketches = self._heaps(), self._sketches()
+            for year in self.recent_years():
+                if year not in self.by_year:
+                    continue
+                for scope in FLMBE_BUCKETS + ['global']:
+                    heaps[scope].merge(self.by_year[year][scope])
+                    sketches[scope].merge(self.sketches_by_year[year][scope])
+
+        results = {}
+        for scope, heap in heaps.items():
+            results[scope] = [dict(row,
+                                   bucket_percentile=sketches[row['bucket']].percentile(row['composite_score']),
+                                   global_percentile=sketches['global'].percentile(row['composite_score']))
+                              for row in heap.results()]
+        return results
+
+    def title_summary(self, window='all'):
+        """Respondent-weighted score and hours per title, best first"""
+        years = None if window == 'all' else set(self.recent_years())
+        totals = {}
+        for (title, year), sums in self.groups.items():
+            if years is not None and year not in years:
+                continue
+            entry = totals.setdefault(title, [0, 0, 0, 0.0, 0.0, 0])
+            for i, value in enumerate(sums):
+                entry[i] += value
+
+        summary = []
+        for title, (sections, respondents, weight, score, hours, hours_weight) in totals.items():
+            summary.append({
+                'title': title,
+                'bucket': self.title_buckets[title],
+                'sections': sections,
+                'respondentCount': respondents,
+                'composite_score': score / weight,
+                'hoursPerWeek': hours / hours_weight if hours_weight else None
+            })
+        summary.sort(key=lambda x: x['composite_score'], reverse=True)
+        return summary
+
+def stream_file(task):
+    """Stream one CSV into its own StreamingRankings (runs in a worker process)"""
+    source, csv_file, k = task
+    rankings = StreamingRankings(k, source)
+    for course in iter_course_csv(csv_file):
+        rankings.add(course)
+    return rankings
+
+def stream_rankings(patterns, k=15, processes=None):
+    """Stream every matching CSV, one worker per file, and merge the results in file order
+
+    Unlike multi_source.read_sources, rows repeated across overlapping
+    exports are not dropped, since that would need a key per row.
+    """
+    tasks = [(source, path, k) for source, path in enumerate(expand_sources(patterns))]
+    if len(tasks) == 1:
+        parts = [stream_file(tasks[0])]
+    else:
+        with Pool(min(processes or os.cpu_count() or 1, len(tasks))) as pool:
+            parts = pool.map(stream_file, tasks)
+
+    rankings = parts[0]
+    for part in parts[1:]:
+        rankings.merge(part)
+    return rankings
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank courses in a single constant-memory pass over CSV exports')
+    parser.add_argument('csv_files', nargs='*', default=['booth_course_evals.csv'],
+                        help='CSV exports, directories or globs of them')
+    parser.add_argument('--k', type=int, default=15)
+    parser.add_argument('--processes', type=int, help='worker processes when streaming several files')
+    parser.add_argument('--output', help='write the rankings to a JSON file')
+    args = parser.parse_args()
+
+    rankings = stream_rankings(args.csv_files, args.k, args.processes)
+    windows = {window: rankings.top(window) for window in ['all', 'recent']}
+    print(f"Streamed {rankings.rows} rows into {len(rankings.groups)} title/year groups")
+    print(f"Recent window: {', '.join(str(year) for year in sorted(rankings.recent_years()))}")
+
+    for window, scopes in windows.items():
+        print(f"\nTop 3 per bucket ({window}):")
+        for scope in FLMBE_BUCKETS:
+            names = '; '.join(f"{row['title']} ({row['composite_score']:.2f}, p{row['bucket_percentile']:.0f})"
+                              for row in scopes[scope][:3])
+            print(f"  {scope:10} {names}")
+
+    if args.output:
+        payload = {window: {'top_k': scopes, 'titles': rankings.title_summary(window)}
+                   for window, scopes in windows.items()}
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(payload, file, indent=2)
+        print(f"\nWrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import bisect
+import json
+import os
+from array import array
+
+from course_dataset import METRIC_FIELDS, build_columnar_dataset, column_values, term_ordinal
+from complete_workflow import calculate_course_score
+
+# Weight of the rows that answered each metric, the denominator of its mean
+METRIC_WEIGHTS = {field: field + '_weight' for field in METRIC_FIELDS}
+
+# Cumulative measures kept per group; metric sums are respondent-weighted
+SUM_FIELDS = ['sections', 'respondents', 'weight'] + METRIC_FIELDS + list(METRIC_WEIGHTS.values()) + ['composite_score']
+
+# Written by the full build and patched by incremental_ingest
+DEFAULT_AGGREGATES_FILE = 'term_aggregates.json'
+
+def build_term_index(dataset):
+    """Return the dataset's terms in chronological order"""
+    terms = [term for term in dataset['dictionaries']['term'] if term_ordinal(term) is not None]
+    return sorted(set(terms), key=term_ordinal)
+
+def _row_contribution(row):
+    """Amounts one row adds to each cumulative measure"""
+    respondents = row.get('respondentCount') or 0
+    # Older exports carry no respondent counts; fall back to one vote per section
+    weight = respondents if respondents > 0 else 1
+
+    contribution = {'sections': 1, 'respondents': respondents, 'weight': weight}
+    for field in METRIC_FIELDS:
+        # A missing metric adds to neither its sum nor its weight, so it does not pull the mean down
+        value = row.get(field)
+        present = value is not None
+        contribution[field] = value * weight if present else 0
+        contribution[METRIC_WEIGHTS[field]] = weight if present else 0
+    contribution['composite_score'] = calculate_course_score(row) * weight
+    return contribution
+
+def build_prefix_aggregates(dataset, group_field='title'):
+    """Build per-group cumulative sums indexed by term position
+
+    For group g and measure m, prefix[g][m][t] holds the total over all terms
+    before position t, so any contiguous window [start, end] is
+    prefix[end + 1] - prefix[start].
+    """
+    terms = build_term_index(dataset)
+    positions = {term: i for i, term in enumerate(terms)}
+    term_dictionary = dataset['dictionaries']['term']
+    term_positions = [positions.get(term) for term in term_dictionary]
+
+    columns = dataset['columns']
+    group_codes = columns[group_field]
+    group_names = dataset['dictionaries'][group_field]
+    width = len(terms) + 1
+
+    metric_values = {field: column_values(dataset, field) for field in METRIC_FIELDS + ['respondentCount']}
+
+    prefix = {}
+    for index in range(dataset['size']):
+        position = term_positions[columns['term'][index]]
+        if position is None:
+            continue
+
+        group = group_names[group_codes[index]]
+        sums = prefix.get(group)
+        if sums is None:
+            sums = {field: array('d', bytes(8 * width)) for field in SUM_FIELDS}
+            prefix[group] = sums
+
+        row = {field: values[index] for field, values in metric_values.items()}
+        slot = position + 1
+        for field, value in _row_contribution(row).items():
+            sums[field][slot] += value
+
+    # Turn per-term totals into running totals
+    for sums in prefix.values():
+        for values in sums.values():
+            for slot in range(1, width):
+                values[slot] += values[slot - 1]
+
+    return {
+        'group_field': group_field,
+        'terms': terms,
+        'positions': positions,
+        'prefix': prefix
+    }
+
+def update_prefix_aggregates(aggregates, removed=(), added=()):
+    """Apply a row delta (course dicts) to prefix aggregates in place
+
+    Terms not seen before are spliced into every group's arrays; after that
+    each row only touches its own group from its term onwards, so the cost
+    follows the size of the delta rather than the size of the dataset.
+    """
+    terms = aggregates['terms']
+    group_field = aggregates['group_field']
+    prefix = aggregates['prefix']
+
+    new_terms = sorted({row['term'] for row in added if term_ordinal(row['term']) is not None} - set(terms),
+                       key=term_ordinal)
+    for term in new_terms:
+        position = bisect.bisect([term_ordinal(t) for t in terms], term_ordinal(term))
+        terms.insert(position, term)
+        # The new term is empty, so the running total just repeats across it
+        for sums in prefix.values():
+            for values in sums.values():
+                values.insert(position + 1, values[position])
+    if new_terms:
+        aggregates['positions'] = {term: i for i, term in enumerate(terms)}
+
+    width = len(terms) + 1
+    for sign, rows in ((-1, removed), (1, added)):
+        for row in rows:
+            position = aggregates['positions'].get(row['term'])
+            if position is None:
+                continue
+            sums = prefix.get(row[group_field])
+            if sums is None:
+                sums = {field: array('d', bytes(8 * width)) for field in SUM_FIELDS}
+                prefix[row[group_field]] = sums
+            for field, value in _row_contribution(row).items():
+                values = sums[field]
+                for slot in range(position + 1, width):
+                    values[slot] += sign * value
+
+    # Drop groups and terms the removed rows emptied, as a full rebuild would not have them
+    emptied = {row[group_field] for row in removed}
+    for group in emptied:
+        sums = prefix.get(group)
+        if sums is not None and sums['sections'][-1] == 0:
+            del prefix[group]
+    emptied_terms = {row['term'] for row in removed if row['term'] in aggregates['positions']}
+    for term in sorted(emptied_terms, key=aggregates['positions'].get, reverse=True):
+        position = aggregates['positions'][term]
+        if any(sums['sections'][position + 1] != sums['sections'][position] for sums in prefix.values()):
+            continue
+        del terms[position]
+        for sums in prefix.values():
+            for values in sums.values():
+                del values[position + 1]
+    if emptied_terms:
+        aggregates['positions'] = {term: i for i, term in enumerate(terms)}
+    return aggregates
+
+def save_prefix_aggregates(aggregates, path=DEFAULT_AGGREGATES_FILE):
+    """Write prefix aggregates to a JSON file"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({
+            'group_field': aggregates['group_field'],
+            'terms': aggregates['terms'],
+            'prefix': {group: {field: list(values) for field, values in sums.items()}
+                       for group, sums in aggregates['prefix'].items()}
+        }, file)
+
+def load_prefix_aggregates(path=DEFAULT_AGGREGATES_FILE):
+    """Read prefix aggregates written by save_prefix_aggregates"""
+    with open(path, 'r', encoding='utf-8') as file:
+        payload = json.load(file)
+    return {
+        'group_field': payload['group_field'],
+        'terms': payload['terms'],
+        'positions': {term: i for i, term in enumerate(payload['terms'])},
+        'prefix': {group: {field: array('d', values) for field, values in sums.items()}
+                   for group, sums in payload['prefix'].items()}
+    }
+
+def resolve_window(aggregates, start_term=None, end_term=None):
+    """Convert an inclusive term range into (start, end) positions"""
+    positions = aggregates['positions']
+    start = positions[start_term] if start_term else 0
+    end = positions[end_term] if end_term else len(aggregates['terms']) - 1
+    if start > end:
+        raise ValueError(f"Window starts after it ends: {start_term} > {end_term}")
+    return start, end
+
+def window_for_recent_years(aggregates, years=2):
+    """Return the term window covering the most recent calendar years"""
+    terms = aggregates['terms']
+    recent_years = sorted({term_ordinal(term) // 4 for term in terms}, reverse=True)[:years]
+    first_year = min(recent_years)
+    start = next(i for i, term in enumerate(terms) if term_ordinal(term) // 4 >= first_year)
+    return start, len(terms) - 1
+
+def window_aggregate(aggregates, group, start, end):
+    """Aggregate one group over term positions start..end in O(1)"""
+    sums = aggregates['prefix'].get(group)
+    if sums is None:
+        return None
+
+    totals = {field: sums[field][end + 1] - sums[field][start] for field in SUM_FIELDS}
+    if totals['sections'] == 0:
+        return None
+
+    result = {
+        aggregates['group_field']: group,
+        'sections': int(totals['sections']),
+        'respondentCount': int(totals['respondents'])
+    }
+    for field in METRIC_FIELDS:
+        weight = totals[METRIC_WEIGHTS[field]]
+        result[field] = totals[field] / weight if weight else None
+    # The composite counts a missing metric as 0, as calculate_course_score does
+    result['composite_score'] = totals['composite_score'] / totals['weight']
+    return result
+
+def rank_window(aggregates, start, end, groups=None, top_k=None):
+    """Rank groups by weighted composite score over a term window"""
+    if groups is None:
+        groups = aggregates['prefix'].keys()
+    results = []
+    for group in groups:
+        result = window_aggregate(aggregates, group, start, end)
+        if result:
+            results.append(result)
+    results.sort(key=lambda x: x['composite_score'], reverse=True)
+    return results[:top_k] if top_k else results
+
+def main():
+    from create_global_ranking import load_course_data_from_js
+
+    if os.path.exists(DEFAULT_AGGREGATES_FILE):
+        aggregates = load_prefix_aggregates(DEFAULT_AGGREGATES_FILE)
+    else:
+        dataset = build_columnar_dataset(load_course_data_from_js('course_data.js'))
+        aggregates = build_prefix_aggregates(dataset, 'title')
+    terms = aggregates['terms']
+    print(f"Built prefix aggregates for {len(aggregates['prefix'])} courses over {len(terms)} terms")
+
+    start, end = window_for_recent_years(aggregates, 2)
+    print(f"\nTop 10 courses from {terms[start]} to {terms[end]}:")
+    for i, result in enumerate(rank_window(aggregates, start, end, top_k=10), 1):
+        print(f"  {i}. {result['title']} ({result['composite_score']:.2f}, {result['sections']} sections)")
+
+if __name__ == "__main__":
+    main()
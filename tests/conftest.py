@@ -0,0 +1,45 @@
+import csv
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+MASTER_CSV = os.path.join(REPO_ROOT, 'booth_course_evals.csv')
+
+def csv_row(code, title, first, last, term, respondents, hours, clarity, interest, usefulness, overall,
+            recommendation):
+    """One evaluation export row; pass '' for a blank cell"""
+    invited = max(int(respondents or 0) * 2, 1)
+    return [code, title, first, last, term, invited, respondents, 50.0, hours, clarity, interest, usefulness,
+            overall, recommendation, '']
+
+def sample_rows():
+    """A handful of FLMBE sections over two years, one with an unanswered 'overall' question"""
+    return [
+        csv_row('35200 01', 'Corporation Finance', 'Ann', 'Lee', 'Autumn 2023', 40, 6.1, 4.5, 4.4, 4.6, 4.5, 4.4),
+        csv_row('35200 02', 'Corporation Finance', 'Bo', 'Chen', 'Winter 2024', 35, 5.8, 4.2, 4.1, 4.3, '', 4.0),
+        csv_row('37000 01', 'Marketing Strategy', 'Cy', 'Diaz', 'Spring 2024', 50, 4.2, 4.8, 4.7, 4.6, 4.7, 4.8),
+        csv_row('38001 01', 'Managing in Organizations', 'Di', 'Eng', 'Autumn 2024', 20, 3.9, 4.0, 4.1, 4.2,
+                4.1, 4.0),
+        csv_row('33001 01', 'Money and Banking', 'Ed', 'Fox', 'Winter 2025', 25, 7.0, 4.3, 4.5, 4.4, 4.4, 4.3),
+    ]
+
+def write_csv(path, rows):
+    """Write rows under the master export's header"""
+    with open(MASTER_CSV, 'r', encoding='utf-8') as file:
+        header = next(csv.reader(file))
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """An empty working directory with the docs/ folder the workflow writes pages into"""
+    os.makedirs(tmp_path / 'docs')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,37 @@
+import pytest
+
+from bucket_rankings import FLMBE_BUCKETS, BucketRankings
+from conftest import sample_rows, write_csv
+from course_dataset import build_columnar_dataset, dataset_to_courses, get_value
+from multi_source import read_sources
+from ranking_server import ROW_FIELDS
+
+@pytest.mark.parametrize('quantized', [False, True])
+def test_dataset_rankings_decode_rows_only_when_served(tmp_path, quantized):
+    courses = dataset_to_courses(read_sources([write_csv(tmp_path / 'master.csv', sample_rows())]))
+    dataset = build_columnar_dataset(courses, quantized)
+    decoded = []
+
+    def decode_row(index):
+        decoded.append(index)
+        return {field: get_value(dataset, field, index) for field in ROW_FIELDS}
+
+    lazy = BucketRankings.from_dataset(dataset, decode_row)
+    assert decoded == []
+    assert all(isinstance(row, int) for row in lazy.rankings['global']._rows.values())
+
+    eager = BucketRankings((i, decode_row(i)) for i in range(dataset['size']))
+    for scope in FLMBE_BUCKETS + ['global']:
+        assert lazy.top(scope, 3) == eager.top(scope, 3)
+    assert lazy.copy().top('global', 10) == eager.top('global', 10)
+
+def test_dataset_rankings_reject_upserts(tmp_path):
+    courses = dataset_to_courses(read_sources([write_csv(tmp_path / 'master.csv', sample_rows())]))
+    dataset = build_columnar_dataset(courses)
+    rankings = BucketRankings.from_dataset(dataset, lambda index: courses[index])
+    before = rankings.top('global', 15)
+    with pytest.raises(ValueError):
+        rankings.upsert(0, courses[1])
+    with pytest.raises(ValueError):
+        rankings.copy().upsert(len(courses), courses[0])
+    assert rankings.top('global', 15) == before
@@ -0,0 +1,31 @@
+import json
+import os
+
+import complete_workflow
+import create_global_ranking
+from complete_workflow import get_course_bucket
+
+def write_aliases(path, aliases, mtime):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'aliases': aliases}, file)
+    os.utime(path, ns=(mtime, mtime))
+
+def test_aliases_resolve_outside_the_repo_directory(workdir):
+    assert os.getcwd() == str(workdir)
+    assert get_course_bucket('Culture (And Why it Matters)') == 'Society'
+    assert create_global_ranking.get_course_bucket('Culture (And Why it Matters)') == 'Society'
+
+def test_alias_table_is_reread_when_the_file_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'aliases.json')
+    monkeypatch.setattr(complete_workflow, 'CATALOG_ALIASES_FILE', path)
+    assert get_course_bucket('Investments (Evening)') == 'Other'
+
+    write_aliases(path, {'Investments (Evening)': 'Investments'}, 1_000_000_000)
+    assert get_course_bucket('Investments (Evening)') == 'Finance'
+
+    write_aliases(path, {'Game Theory (Weekend)': 'Game Theory'}, 2_000_000_000)
+    assert get_course_bucket('Investments (Evening)') == 'Other'
+    assert get_course_bucket('Game Theory (Weekend)') == 'Strategy'
+
+    os.remove(path)
+    assert get_course_bucket('Game Theory (Weekend)') == 'Other'
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from catalog_reconcile import AMBIGUITY_MARGIN, TrigramIndex, numerals, reconcile, trigrams
+
+WORDS = ['Asset', 'Pricing', 'Corporate', 'Finance', 'Strategy', 'Marketing', 'Analytics', 'Data', 'Managerial',
+         'Decision', 'Models', 'Theory', 'Game', 'Labor', 'Economics', 'Policy', 'Advanced', 'Topics']
+
+def jaccard(a, b):
+    first, second = trigrams(a), trigrams(b)
+    return len(first & second) / len(first | second)
+
+def random_title(rng):
+    title = ' '.join(rng.sample(WORDS, rng.randrange(1, 4)))
+    return title + rng.choice(['', '', ' I', ' II', ' III', ' 2'])
+
+def variant(rng, title):
+    """The kind of drift seen between exports: case, punctuation, a suffix or a dropped word"""
+    change = rng.randrange(4)
+    if change == 0:
+        return title.upper().replace(' ', ' - ', 1)
+    if change == 1:
+        return title + rng.choice([' (Evening)', ': Lab', ' Weekend'])
+    if change == 2 and ' ' in title:
+        words = title.split()
+        del words[rng.randrange(len(words))]
+        return ' '.join(words)
+    return title + ' ' + rng.choice(WORDS)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_search_matches_brute_force_jaccard(seed):
+    rng = random.Random(seed)
+    titles = [random_title(rng) for _ in range(150)]
+    titles += [variant(rng, rng.choice(titles)) for _ in range(100)]
+    index = TrigramIndex(titles)
+    for _ in range(40):
+        query = rng.choice([random_title(rng), variant(rng, rng.choice(titles))])
+        threshold = rng.choice([0.3, 0.5, 0.8])
+        expected = sorted(((jaccard(query, title), title) for title in titles), key=lambda x: (-x[0], x[1]))
+        expected = [(score, title) for score, title in expected if score >= threshold]
+        got = index.search(query, threshold)
+        assert [title for _, title in got] == [title for _, title in expected]
+        assert [score for score, _ in got] == pytest.approx([score for score, _ in expected])
+
+def brute_force_reconcile(catalog, titles, threshold, accept):
+    """reconcile() with every similarity computed directly instead of through the index"""
+    catalog_titles = {title: bucket for bucket, entries in catalog.items() for title in entries}
+    aliases, ambiguous, review = {}, set(), set()
+    for title in set(titles) - set(catalog_titles):
+        candidates = sorted(((jaccard(c, title), c) for c in catalog_titles if jaccard(c, title) >= threshold),
+                            key=lambda x: (-x[0], x[1]))
+        if not candidates:
+            continue
+        best = candidates[0]
+        if any(best[0] - score <= AMBIGUITY_MARGIN for score, _ in candidates[1:]):
+            ambiguous.add(title)
+        elif best[0] >= accept and numerals(title) == numerals(best[1]):
+            aliases[title] = best[1]
+        else:
+            review.add(title)
+    matched = set(titles) | set(aliases.values())
+    missing = [title for entries in catalog.values() for title in entries if title not in matched]
+    return aliases, ambiguous, review, missing
+
+@pytest.mark.parametrize('seed', range(5))
+def test_reconcile_matches_brute_force(seed):
+    rng = random.Random(100 + seed)
+    catalog_titles = list(dict.fromkeys(random_title(rng) for _ in range(40)))
+    catalog = {bucket: catalog_titles[i::4] for i, bucket in enumerate(['Finance', 'Strategy', 'People', 'Economy'])}
+    titles = rng.sample(catalog_titles, 25) + [variant(rng, rng.choice(catalog_titles)) for _ in range(60)]
+    titles += [random_title(rng) for _ in range(30)]
+
+    result = reconcile(catalog, titles, 0.5, 0.7)
+    aliases, ambiguous, review, missing = brute_force_reconcile(catalog, titles, 0.5, 0.7)
+    assert result['aliases'] == aliases
+    assert {entry['title'] for entry in result['ambiguous']} == ambiguous
+    assert {entry['title'] for entry in result['review']} == review
+    assert [entry['catalog_title'] for entry in result['missing']] == missing
+    assert result['exact'] == len(set(titles) & set(catalog_titles))
+
+def test_sequence_numbers_must_agree():
+    catalog = {'Finance': ['Asset Pricing II']}
+    result = reconcile(catalog, ['Asset Pricing III', 'ASSET PRICING - II'], 0.5, 0.6)
+    assert result['aliases'] == {'ASSET PRICING - II': 'Asset Pricing II'}
+    assert [entry['title'] for entry in result['review']] == ['Asset Pricing III']
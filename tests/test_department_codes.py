@@ -0,0 +1,110 @@
+import random
+import string
+
+import pytest
+
+import course_db
+from complete_workflow import calculate_course_score
+from course_dataset import MISSING_CODE, METRIC_FIELDS, build_columnar_dataset, parse_course_code
+from department_stats import course_number_rollups, department_aggregates
+
+def naive_parse(code):
+    """Parse an id by splitting it, without regular expressions"""
+    parts = code.split()
+    if len(parts) != 2:
+        return None
+    number, section = parts
+    digits = set(string.digits)
+    if len(number) != 5 or not set(number) <= digits or not 1 <= len(section) <= 4 or not set(section) <= digits:
+        return None
+    return int(number[:2]), int(number), int(section)
+
+def random_code(rng):
+    """Mostly well-formed ids, with the malformed shapes seen in exports mixed in"""
+    number = ''.join(rng.choice(string.digits) for _ in range(rng.choice([5, 5, 5, 4, 6])))
+    section = ''.join(rng.choice(string.digits) for _ in range(rng.choice([2, 2, 1, 3, 4, 5])))
+    shape = rng.randrange(8)
+    if shape == 0:
+        return f"{number}{section}"
+    if shape == 1:
+        return f"  {number}\t{section} "
+    if shape == 2:
+        return f"{number} {section}{rng.choice('ABx-')}"
+    if shape == 3:
+        return f"{number[:2]}{rng.choice('ABC')}{number[3:]} {section}"
+    if shape == 4:
+        return rng.choice(['', ' ', 'TBA', f"{number} {section} {section}", f"{number}-{section}"])
+    return f"{number} {section}"
+
+def test_parse_matches_naive_split():
+    rng = random.Random(49)
+    for _ in range(3000):
+        code = random_code(rng)
+        assert parse_course_code(code) == naive_parse(code), code
+    assert parse_course_code('33501 02') == (33, 33501, 2)
+    assert parse_course_code(None) is None
+    # Non-ASCII digits are not course codes
+    assert parse_course_code('٣٣٥٠١ ٠٢') is None
+
+def test_overlong_section_is_unparsed_rather_than_overflowing():
+    course = {'id': '33501 123456', 'title': 'Investments', 'instructor': 'A B', 'term': 'Spring 2024',
+              'respondentCount': 3, **{field: 4.0 for field in METRIC_FIELDS}}
+    dataset = build_columnar_dataset([course])
+    assert [dataset['columns'][field][0] for field in ['department', 'courseNumber', 'section']] == [MISSING_CODE] * 3
+
+def random_courses(rng, count):
+    courses = []
+    for _ in range(count):
+        course = {'id': random_code(rng), 'title': rng.choice(['Investments', 'Game Theory', 'Cost Analysis']),
+                  'instructor': rng.choice(['A B', 'C D']), 'term': 'Spring 2024',
+                  'respondentCount': rng.choice([0, 7, 30])}
+        for field in METRIC_FIELDS:
+            course[field] = None if rng.random() < 0.1 else round(rng.uniform(2, 5), 1)
+        courses.append(course)
+    return courses
+
+@pytest.mark.parametrize('quantized', [False, True])
+def test_department_aggregates_match_brute_force(quantized):
+    courses = random_courses(random.Random(5), 400)
+    dataset = build_columnar_dataset(courses, quantized)
+    parsed = [naive_parse(course['id']) for course in courses]
+    assert list(dataset['columns']['section']) == [p[2] if p else MISSING_CODE for p in parsed]
+
+    aggregates = {row['department']: row for row in department_aggregates(dataset)}
+    departments = {p[0] for p in parsed if p and p[0] != MISSING_CODE}
+    assert aggregates.keys() == departments
+    for department, row in aggregates.items():
+        rows = [(c, p) for c, p in zip(courses, parsed) if p and p[0] == department]
+        weights = [max(c['respondentCount'], 1) for c, _ in rows]
+        assert row['sections'] == len(rows)
+        assert row['courseNumbers'] == len({p[1] for _, p in rows})
+        assert row['respondentCount'] == sum(c['respondentCount'] for c, _ in rows)
+        assert row['composite_score'] == pytest.approx(
+            sum(w * calculate_course_score(c) for w, (c, _) in zip(weights, rows)) / sum(weights))
+
+    rollups = course_number_rollups(dataset)
+    numbers = sorted({p[1] for p in parsed if p and p[1] != MISSING_CODE})
+    assert [row['courseNumber'] for row in rollups] == numbers
+    for row in rollups:
+        rows = [(c, p) for c, p in zip(courses, parsed) if p and p[1] == row['courseNumber']]
+        assert row['sections'] == len(rows)
+        assert row['sectionNumbers'] == len({p[2] for _, p in rows})
+        assert set(row['titles']) == {c['title'] for c, _ in rows}
+
+def test_database_department_summary_matches_brute_force(tmp_path):
+    courses = random_courses(random.Random(6), 300)
+    conn = course_db.connect(str(tmp_path / 'courses.db'))
+    course_db.load_courses(conn, courses)
+    summary = course_db.fetch_department_summary(conn)
+    by_department = {}
+    for course in courses:
+        department = (naive_parse(course['id']) or (MISSING_CODE,))[0]
+        by_department.setdefault(department, []).append(course)
+    assert [row['department'] for row in summary] == sorted(by_department)
+    for row in summary:
+        rows = by_department[row['department']]
+        assert row['sections'] == len(rows)
+        assert row['respondentCount'] == sum(c['respondentCount'] for c in rows)
+        assert sorted(c['id'] for c in course_db.fetch_courses_by_department(conn, row['department'])) == \
+               sorted(c['id'] for c in rows)
+    conn.close()
@@ -0,0 +1,24 @@
+import pytest
+
+from conftest import MASTER_CSV
+from fixed_effects import fit_fixed_effects
+from multi_source import read_sources
+
+@pytest.fixture(scope='module')
+def master_dataset():
+    return read_sources([MASTER_CSV])
+
+def test_fit_converges_on_real_weights(master_dataset):
+    model = fit_fixed_effects(master_dataset)
+    assert model['converged']
+
+    # A far tighter fit moves no effect by more than a rounding digit of the published scores
+    reference = fit_fixed_effects(master_dataset, max_iterations=20000, tolerance=1e-12)
+    assert reference['converged']
+    for key in ('instructor_effects', 'course_effects'):
+        assert max(abs(model[key][name] - effect) for name, effect in reference[key].items()) < 1e-3
+
+def test_fit_reports_running_out_of_iterations(master_dataset):
+    model = fit_fixed_effects(master_dataset, max_iterations=5)
+    assert model['iterations'] == 5
+    assert not model['converged']
@@ -0,0 +1,67 @@
+import itertools
+import random
+
+import pytest
+
+from complete_workflow import FLMBE_CATALOG, calculate_course_score
+from course_dataset import METRIC_FIELDS
+from flmbe_optimizer import build_candidates, optimize_plan
+
+BUCKETS = ['Finance', 'Strategy', 'People']
+TERMS = ['Autumn 2023', 'Winter 2024', 'Spring 2024']
+
+def random_courses(rng, per_bucket):
+    """Sections of a few catalog titles per bucket, with hours sometimes unreported"""
+    courses = []
+    for bucket in BUCKETS:
+        for title in FLMBE_CATALOG[bucket][:per_bucket]:
+            for _ in range(rng.randrange(1, 4)):
+                course = {'id': f"{rng.randrange(30000, 40000)} 01", 'title': title,
+                          'instructor': rng.choice(['A B', 'C D']), 'term': rng.choice(TERMS),
+                          'respondentCount': rng.choice([0, 4, 15, 30])}
+                for field in METRIC_FIELDS:
+                    course[field] = round(rng.uniform(2.5, 5), 1)
+                course['hoursPerWeek'] = None if rng.random() < 0.15 else rng.choice([2.0, 3.5, 5.0, rng.uniform(1, 10)])
+                courses.append(course)
+    return courses
+
+def brute_force_options(courses, bucket, excluded_terms):
+    """Every (title, instructor) of a bucket with its mean score and hours, no pruning"""
+    groups = {}
+    for course in courses:
+        if course['title'] in FLMBE_CATALOG[bucket] and course['term'] not in excluded_terms:
+            groups.setdefault((course['title'], course['instructor']), []).append(course)
+    options = []
+    for rows in groups.values():
+        weights = [max(row['respondentCount'], 1) for row in rows]
+        answered = [(w, row['hoursPerWeek']) for w, row in zip(weights, rows) if row['hoursPerWeek'] is not None]
+        if not answered:
+            continue
+        options.append({'composite_score': sum(w * calculate_course_score(row) for w, row in zip(weights, rows)) / sum(weights),
+                        'hoursPerWeek': round(sum(w * h for w, h in answered) / sum(w for w, _ in answered), 1)})
+    return options
+
+def brute_force_plans(courses, max_hours, k, excluded_terms=()):
+    """Top-k plan scores over every one-per-bucket combination within the budget"""
+    options = [brute_force_options(courses, bucket, set(excluded_terms)) for bucket in BUCKETS]
+    totals = [sum(c['composite_score'] for c in plan) for plan in itertools.product(*options)
+              if sum(c['hoursPerWeek'] for c in plan) <= max_hours + 1e-9]
+    return sorted(totals, reverse=True)[:k]
+
+@pytest.mark.parametrize('seed', range(6))
+def test_plans_match_exhaustive_search(seed):
+    rng = random.Random(seed)
+    courses = random_courses(rng, 6)
+    candidates = build_candidates(courses)
+    for max_hours, k, excluded_terms in [(9.0, 5, ()), (14.0, 3, ()), (30.0, 8, ()), (12.0, 4, ('Autumn 2023',))]:
+        plans = optimize_plan(candidates, BUCKETS, max_hours, k, excluded_terms=excluded_terms)
+        assert [plan['total_score'] for plan in plans] == \
+               pytest.approx(brute_force_plans(courses, max_hours, k, excluded_terms))
+        for plan in plans:
+            assert [course['bucket'] for course in plan['courses']] == BUCKETS
+            assert sum(course['hoursPerWeek'] for course in plan['courses']) <= max_hours + 1e-9
+            assert sum(course['composite_score'] for course in plan['courses']) == pytest.approx(plan['total_score'])
+
+def test_budget_below_every_plan_has_no_plans():
+    courses = random_courses(random.Random(9), 4)
+    assert optimize_plan(build_candidates(courses), BUCKETS, 0.5) == []
@@ -0,0 +1,66 @@
+import pytest
+
+import course_db
+from conftest import csv_row, sample_rows, write_csv
+from course_dataset import build_columnar_dataset, dataset_to_courses
+from incremental_ingest import ingest, update_aggregates
+from multi_source import read_sources
+from term_aggregates import build_prefix_aggregates, load_prefix_aggregates, save_prefix_aggregates
+
+def read_rows(path, rows):
+    return dataset_to_courses(read_sources([write_csv(path, rows)]))
+
+def assert_same_aggregates(patched, rebuilt):
+    assert patched['terms'] == rebuilt['terms']
+    assert patched['positions'] == rebuilt['positions']
+    assert patched['prefix'].keys() == rebuilt['prefix'].keys()
+    for group, sums in rebuilt['prefix'].items():
+        for field, values in sums.items():
+            assert list(patched['prefix'][group][field]) == pytest.approx(list(values)), (group, field)
+
+@pytest.mark.parametrize('mode, incoming', [
+    # A new term plus a corrected row of an existing term
+    ('append', lambda rows: [
+        csv_row('37000 01', 'Marketing Strategy', 'Cy', 'Diaz', 'Spring 2024', 52, 4.2, 4.8, 4.7, 4.6, 4.9, 4.8),
+        csv_row('34101 01', 'Competitive Strategy', 'Fay', 'Gu', 'Spring 2025', 30, 5.0, 4.6, 4.6, 4.5, 4.6, 4.5)]),
+    # The master CSV with one term dropped entirely
+    ('full', lambda rows: [row for row in rows if row[4] != 'Winter 2024']),
+])
+def test_incremental_aggregates_match_full_rebuild(workdir, mode, incoming):
+    rows = sample_rows()
+    conn = course_db.connect(str(workdir / 'courses.db'))
+    course_db.load_courses(conn, read_rows(workdir / 'master.csv', rows))
+    save_prefix_aggregates(build_prefix_aggregates(build_columnar_dataset(course_db.fetch_courses(conn))),
+                           str(workdir / 'aggregates.json'))
+
+    delta, touched = ingest(conn, read_rows(workdir / 'incoming.csv', incoming(rows)), mode)
+    assert touched
+    patched = update_aggregates(delta, str(workdir / 'aggregates.json'))
+
+    rebuilt = build_prefix_aggregates(build_columnar_dataset(course_db.fetch_courses(conn)))
+    conn.close()
+    assert_same_aggregates(patched, rebuilt)
+    assert_same_aggregates(load_prefix_aggregates(str(workdir / 'aggregates.json')), rebuilt)
+
+def test_append_keeps_other_exports_of_the_same_term(workdir):
+    conn = course_db.connect(str(workdir / 'courses.db'))
+    course_db.load_courses(conn, read_rows(workdir / 'master.csv', sample_rows()))
+    booth = [
+        csv_row('34101 01', 'Competitive Strategy', 'Fay', 'Gu', 'Spring 2025', 30, 5.0, 4.6, 4.6, 4.5, 4.6, 4.5),
+        csv_row('34101 02', 'Competitive Strategy', 'Hal', 'Im', 'Spring 2025', 28, 5.2, 4.4, 4.5, 4.4, 4.5, 4.4),
+    ]
+    harris = [
+        csv_row('33001 81', 'Money and Banking', 'Ivy', 'Jo', 'Spring 2025', 18, 6.0, 4.1, 4.2, 4.0, 4.1, 4.0),
+    ]
+
+    ingest(conn, read_rows(workdir / 'booth_spring.csv', booth))
+    delta, _ = ingest(conn, read_rows(workdir / 'harris_spring.csv', harris))
+    assert delta['deleted'] == []
+    assert len(course_db.fetch_courses(conn, "t.name = 'Spring 2025'")) == 3
+
+    # A corrected export of one program still drops the rows it no longer lists
+    delta, _ = ingest(conn, read_rows(workdir / 'booth_spring.csv', booth[:1]))
+    codes = sorted(course['id'] for course in course_db.fetch_courses(conn, "t.name = 'Spring 2025'"))
+    conn.close()
+    assert len(delta['deleted']) == 1
+    assert codes == ['33001 81', '34101 01']
@@ -0,0 +1,39 @@
+import sqlite3
+import sys
+
+import complete_workflow
+from conftest import sample_rows, write_csv
+from course_dataset import column_values, dataset_from_json, dataset_to_courses, dataset_to_json, get_value
+from create_global_ranking import load_course_data_from_js
+from dataset_file import MappedDataset
+from multi_source import merge_sources, parse_source
+
+def blank_row(courses):
+    return next(course for course in courses if course['id'] == '35200 02')
+
+def test_merge_sources_keeps_blank_metric_missing(tmp_path):
+    dataset = merge_sources([parse_source(write_csv(tmp_path / 'evals.csv', sample_rows()))])
+    courses = dataset_to_courses(dataset)
+    row = courses.index(blank_row(courses))
+
+    assert blank_row(courses)['overall'] is None
+    assert blank_row(courses)['clarity'] == 4.2
+    assert get_value(dataset, 'overall', row) is None
+    assert column_values(dataset, 'overall')[row] is None
+    assert column_values(dataset, 'overall', 0.0)[row] == 0.0
+    assert blank_row(dataset_to_courses(dataset_from_json(dataset_to_json(dataset))))['overall'] is None
+
+def test_workflow_exports_blank_metric_as_missing(workdir, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['complete_workflow.py', write_csv(workdir / 'evals.csv', sample_rows())])
+    complete_workflow.main()
+
+    conn = sqlite3.connect('course_rankings.db')
+    overall = conn.execute("SELECT overall FROM sections WHERE code = '35200 02'").fetchone()[0]
+    conn.close()
+    assert overall is None
+
+    assert blank_row(load_course_data_from_js('course_data.js'))['overall'] is None
+    assert blank_row(load_course_data_from_js('cleaned_course_data.js'))['overall'] is None
+    with MappedDataset('course_data.bin') as mapped:
+        assert blank_row(dataset_to_courses(mapped.dataset))['overall'] is None
+    assert 'Corporation Finance' in open('docs/all.html', encoding='utf-8').read()
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from pareto_frontier import pareto_frontier, pareto_layers
+
+def dominates(a, b):
+    """a is at least as good on both axes and strictly better on one"""
+    return (a['composite_score'] >= b['composite_score'] and a['hoursPerWeek'] <= b['hoursPerWeek']
+            and (a['composite_score'] > b['composite_score'] or a['hoursPerWeek'] < b['hoursPerWeek']))
+
+def brute_force_layers(courses):
+    """Peel off the non-dominated courses one layer at a time, O(n^2) per layer"""
+    remaining = [c for c in courses if (c['hoursPerWeek'] or 0) > 0]
+    layers = []
+    while remaining:
+        layer = [c for c in remaining if not any(dominates(other, c) for other in remaining)]
+        layers.append(layer)
+        remaining = [c for c in remaining if c not in layer]
+    return layers
+
+def random_courses(rng, count, levels):
+    """Scores and hours on a coarse grid so equal and collinear points are common"""
+    return [{'id': i,
+             'composite_score': rng.randrange(levels) / 4,
+             'hoursPerWeek': rng.choice([None, 0.0]) if rng.random() < 0.05 else rng.randrange(1, levels + 1) / 2}
+            for i in range(count)]
+
+@pytest.mark.parametrize('count, levels', [(1, 3), (5, 2), (40, 4), (200, 10), (500, 200)])
+def test_layers_match_repeated_dominance_peeling(count, levels):
+    rng = random.Random(count + levels)
+    for _ in range(5):
+        courses = random_courses(rng, count, levels)
+        layers = pareto_layers(courses)
+        expected = brute_force_layers(courses)
+        assert [sorted(c['id'] for c in layer) for layer in layers] == \
+               [sorted(c['id'] for c in layer) for layer in expected]
+        for layer in layers:
+            assert [c['hoursPerWeek'] for c in layer] == sorted(c['hoursPerWeek'] for c in layer)
+        assert pareto_frontier(courses) == (layers[0] if layers else [])
+
+def test_custom_keys():
+    rng = random.Random(2)
+    courses = [{'id': i, 'score': rng.random(), 'hours': rng.uniform(1, 9)} for i in range(100)]
+    renamed = [{'id': c['id'], 'composite_score': c['score'], 'hoursPerWeek': c['hours']} for c in courses]
+    assert [c['id'] for c in pareto_frontier(courses, 'score', 'hours')] == \
+           [c['id'] for c in pareto_frontier(renamed)]
@@ -0,0 +1,75 @@
+import bisect
+import random
+
+import pytest
+
+from quantile_sketch import KLLSketch, percentile_rank
+
+# 1.7 / k is the typical rank error; the worst case over a stream is a little higher
+ERROR_FACTOR = 2.5
+
+def random_stream(rng, kind, n):
+    """Scores in several arrival orders, some with heavy ties"""
+    if kind == 'ties':
+        return [round(rng.gauss(3.5, 0.8), 1) for _ in range(n)]
+    values = [rng.uniform(0, 5) for _ in range(n)]
+    if kind == 'sorted':
+        values.sort()
+    elif kind == 'reversed':
+        values.sort(reverse=True)
+    return values
+
+def max_rank_error(sketch, values):
+    """Largest |estimated - exact| rank over the distinct values, as a share of the stream"""
+    ordered = sorted(values)
+    return max(abs(sketch.rank(v) - bisect.bisect_right(ordered, v)) for v in set(ordered)) / len(ordered)
+
+@pytest.mark.parametrize('kind', ['uniform', 'ties', 'sorted', 'reversed'])
+@pytest.mark.parametrize('k', [50, 200])
+def test_rank_error_within_bound(kind, k):
+    rng = random.Random(k)
+    values = random_stream(rng, kind, 20000)
+    sketch = KLLSketch(k, seed=3)
+    for value in values:
+        sketch.update(value)
+    assert len(sketch) == len(values)
+    assert sketch.rank(float('inf')) == len(values)
+    assert sketch.retained < 3 * k + 10 * len(sketch.levels)
+    assert max_rank_error(sketch, values) <= ERROR_FACTOR / k
+
+def test_merged_sketches_keep_the_bound():
+    rng = random.Random(21)
+    values = random_stream(rng, 'uniform', 30000)
+    parts = [KLLSketch(100, seed=i) for i in range(5)]
+    for i, value in enumerate(values):
+        parts[i % 5].update(value)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert len(merged) == len(values)
+    assert merged.rank(float('inf')) == len(values)
+    assert max_rank_error(merged, values) <= ERROR_FACTOR / 100
+
+def test_small_stream_is_exact():
+    rng = random.Random(4)
+    values = random_stream(rng, 'ties', 150)
+    sketch = KLLSketch(200)
+    for value in values:
+        sketch.update(value)
+    ordered = sorted(values)
+    for value in set(values) | {0.0, 9.9}:
+        assert sketch.percentile(value) == pytest.approx(percentile_rank(ordered, value))
+
+@pytest.mark.parametrize('q', [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+def test_quantile_lands_within_bound_of_q(q):
+    rng = random.Random(8)
+    values = random_stream(rng, 'ties', 20000)
+    sketch = KLLSketch(200, seed=1)
+    for value in values:
+        sketch.update(value)
+    ordered = sorted(values)
+    estimate = sketch.quantile(q)
+    slack = ERROR_FACTOR / 200 * len(ordered)
+    # With ties the estimate covers a range of ranks; q must fall within it
+    assert bisect.bisect_left(ordered, estimate) - slack <= q * len(ordered)
+    assert bisect.bisect_right(ordered, estimate) + slack >= q * len(ordered)
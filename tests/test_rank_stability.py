@@ -0,0 +1,68 @@
+import math
+import random
+
+import pytest
+
+from rank_stability import average_ranks, kendall_tau, spearman_rho
+
+def brute_force_tau_b(x, y):
+    """Kendall's tau-b from every pair, O(n^2)"""
+    concordant = discordant = x_only = y_only = 0
+    for i in range(len(x)):
+        for j in range(i + 1, len(x)):
+            dx = (x[i] > x[j]) - (x[i] < x[j])
+            dy = (y[i] > y[j]) - (y[i] < y[j])
+            if dx and dy:
+                if dx == dy:
+                    concordant += 1
+                else:
+                    discordant += 1
+            elif dx:
+                x_only += 1
+            elif dy:
+                y_only += 1
+    denominator = math.sqrt((concordant + discordant + x_only) * (concordant + discordant + y_only))
+    return (concordant - discordant) / denominator if denominator else None
+
+def brute_force_ranks(values):
+    """Average 1-based rank of each value: values below it, plus the middle of its tie group"""
+    return [sum(v < value for v in values) + (sum(v == value for v in values) + 1) / 2 for value in values]
+
+def brute_force_rho(x, y):
+    rx, ry = brute_force_ranks(x), brute_force_ranks(y)
+    mx, my = sum(rx) / len(rx), sum(ry) / len(ry)
+    sxy = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    sxx = sum((a - mx) ** 2 for a in rx)
+    syy = sum((b - my) ** 2 for b in ry)
+    return sxy / math.sqrt(sxx * syy) if sxx and syy else None
+
+def random_pairs(rng, n, levels):
+    """Paired scores drawn from a few levels, so ties in x, in y and in both are common"""
+    x = [rng.randrange(levels) / 10 for _ in range(n)]
+    y = [value + rng.randrange(levels) / 10 if rng.random() < 0.7 else rng.randrange(levels) / 10 for value in x]
+    return x, y
+
+@pytest.mark.parametrize('n, levels', [(2, 3), (7, 2), (30, 4), (120, 6), (257, 40), (400, 1000)])
+def test_kendall_tau_matches_pairwise_count(n, levels):
+    rng = random.Random(n * levels)
+    for _ in range(5):
+        x, y = random_pairs(rng, n, levels)
+        expected = brute_force_tau_b(x, y)
+        got = kendall_tau(x, y)
+        assert got == (None if expected is None else pytest.approx(expected))
+
+@pytest.mark.parametrize('n, levels', [(2, 3), (7, 2), (30, 4), (120, 6), (400, 1000)])
+def test_spearman_rho_matches_brute_force(n, levels):
+    rng = random.Random(n + levels)
+    for _ in range(5):
+        x, y = random_pairs(rng, n, levels)
+        assert average_ranks(x) == pytest.approx(brute_force_ranks(x))
+        expected = brute_force_rho(x, y)
+        got = spearman_rho(x, y)
+        assert got == (None if expected is None else pytest.approx(expected))
+
+def test_constant_side_has_no_correlation():
+    assert kendall_tau([1, 2, 3], [4, 4, 4]) is None
+    assert spearman_rho([2, 2, 2], [1, 2, 3]) is None
+    assert kendall_tau([1, 2, 3, 4], [1, 2, 3, 4]) == pytest.approx(1.0)
+    assert kendall_tau([1, 2, 3, 4], [4, 3, 2, 1]) == pytest.approx(-1.0)
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from complete_workflow import FLMBE_CATALOG, calculate_course_score
+from course_dataset import METRIC_FIELDS
+from ranking_diff import FLMBE_BUCKETS, diff_snapshots
+
+def random_section(rng, titles):
+    course = {'id': f"{rng.randrange(30000, 30040)} 0{rng.randrange(1, 3)}", 'title': rng.choice(titles),
+              'instructor': rng.choice(['A B', 'C D', 'E F']), 'term': rng.choice(['Autumn 2023', 'Spring 2024']),
+              'respondentCount': rng.choice([0, 6, 18])}
+    for field in METRIC_FIELDS:
+        # Coarse values, so composite scores tie and the id/term/instructor tie-break matters
+        course[field] = None if rng.random() < 0.1 else rng.choice([3.5, 4.0, 4.5])
+    return course
+
+def random_snapshots(rng, count):
+    """An old build and a new one with rows dropped, added, corrected and repeated verbatim"""
+    titles = [title for bucket in FLMBE_BUCKETS for title in FLMBE_CATALOG[bucket][:3]] + ['Not In Catalog']
+    old = [random_section(rng, titles) for _ in range(count)]
+    old += [dict(rng.choice(old)) for _ in range(count // 10)]
+    new = []
+    for course in old:
+        roll = rng.random()
+        if roll < 0.1:
+            continue
+        course = dict(course)
+        if roll < 0.3:
+            course[rng.choice(METRIC_FIELDS)] = rng.choice([None, 2.5, 5.0])
+        new.append(course)
+    new += [random_section(rng, titles) for _ in range(count // 5)]
+    return old, new
+
+def naive_keys(courses):
+    """Row keys by counting earlier rows with the same id, term and instructor"""
+    keys = []
+    for i, course in enumerate(courses):
+        same = [c for c in courses[:i] if (c['id'], c['term'], c['instructor']) == (course['id'], course['term'], course['instructor'])]
+        keys.append(f"{course['id']}|{course['term']}|{course['instructor']}|{len(same)}")
+    return keys
+
+def naive_ranks(courses, bucket):
+    """Rank of each row in a bucket: one plus the rows that sort ahead of it"""
+    keys = naive_keys(courses)
+    rows = [(-calculate_course_score(c), c['id'], c['term'], c['instructor'], key)
+            for key, c in zip(keys, courses) if c['title'] in FLMBE_CATALOG[bucket]]
+    return {row[4]: 1 + sum(other < row for other in rows) for row in rows}
+
+@pytest.mark.parametrize('seed, top_k', [(0, 3), (1, 5), (2, 15), (3, 1)])
+def test_diff_matches_naive_join_and_ranks(seed, top_k):
+    rng = random.Random(seed)
+    old, new = random_snapshots(rng, 150)
+    diff = diff_snapshots(old, new, top_k=top_k, max_moves=1000)
+
+    old_rows = dict(zip(naive_keys(old), old))
+    new_rows = dict(zip(naive_keys(new), new))
+    assert sorted(entry['key'] for entry in diff['added']) == sorted(new_rows.keys() - old_rows.keys())
+    assert sorted(entry['key'] for entry in diff['removed']) == sorted(old_rows.keys() - new_rows.keys())
+    changed = {key for key in old_rows.keys() & new_rows.keys() if old_rows[key] != new_rows[key]}
+    assert {entry['key'] for entry in diff['changed']} == changed
+    for entry in diff['changed']:
+        before, after = old_rows[entry['key']], new_rows[entry['key']]
+        assert entry['fields'] == {field: [before[field], after[field]]
+                                   for field in before if before[field] != after[field]}
+
+    for bucket in FLMBE_BUCKETS:
+        before, after = naive_ranks(old, bucket), naive_ranks(new, bucket)
+        report = diff['buckets'][bucket]
+        assert report['sections'] == [len(before), len(after)]
+        assert {(e['key'], e['rank']) for e in report['entered_top']} == \
+               {(key, rank) for key, rank in after.items() if rank <= top_k and before.get(key, top_k + 1) > top_k}
+        assert {(e['key'], e['rank']) for e in report['left_top']} == \
+               {(key, rank) for key, rank in before.items() if rank <= top_k and after.get(key, top_k + 1) > top_k}
+        assert {(e['key'], e['previous_rank'], e['rank']) for e in report['largest_moves']} == \
+               {(key, before[key], rank) for key, rank in after.items() if key in before and before[key] != rank}
+        moves = [abs(e['move']) for e in report['largest_moves']]
+        assert moves == sorted(moves, reverse=True)
+
+def test_largest_moves_are_capped():
+    rng = random.Random(7)
+    old, new = random_snapshots(rng, 200)
+    full = diff_snapshots(old, new, max_moves=1000)
+    capped = diff_snapshots(old, new, max_moves=2)
+    for bucket in FLMBE_BUCKETS:
+        assert capped['buckets'][bucket]['largest_moves'] == full['buckets'][bucket]['largest_moves'][:2]
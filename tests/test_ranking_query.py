@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from complete_workflow import DEFAULT_WEIGHTS, FLMBE_CATALOG, calculate_course_score, get_course_bucket
+from course_dataset import METRIC_FIELDS, build_columnar_dataset, term_ordinal
+from ranking_query import FLMBE_BUCKETS, QueryIndex, run_query
+
+TERMS = [f"{season} {year}" for year in (2022, 2023, 2024) for season in ('Winter', 'Spring', 'Autumn')]
+INSTRUCTORS = ['Ann Lee', 'Bo Chen', 'Cy Diaz', 'Di Evans']
+
+def random_courses(rng, count):
+    titles = [titles[0] for titles in FLMBE_CATALOG.values()] + ['Improvisational Theater']
+    courses = []
+    for i in range(count):
+        course = {'id': f"3{rng.randrange(1000, 1050)} 0{i % 3 + 1}", 'title': rng.choice(titles),
+                  'instructor': rng.choice(INSTRUCTORS), 'term': rng.choice(TERMS),
+                  'respondentCount': rng.choice([0, 3, 10, 25, 60])}
+        for field in METRIC_FIELDS:
+            course[field] = None if rng.random() < 0.15 else rng.choice([2.0, 3.5, 4.0, 4.5, 6.5])
+        courses.append(course)
+    return courses
+
+def random_spec(rng):
+    spec = {}
+    if rng.random() < 0.4:
+        spec['from'] = rng.choice(TERMS)
+    if rng.random() < 0.4:
+        spec['to'] = rng.choice(TERMS)
+    if rng.random() < 0.4:
+        spec['buckets'] = rng.sample(FLMBE_BUCKETS + ['Other'], rng.randrange(1, 4))
+    if rng.random() < 0.3:
+        spec['instructor'] = rng.choice([rng.choice(INSTRUCTORS), rng.sample(INSTRUCTORS, 2)])
+    if rng.random() < 0.3:
+        spec['min_respondents'] = rng.choice([1, 10, 25])
+    if rng.random() < 0.3:
+        spec['min_hours'] = rng.choice([2.0, 3.5])
+    if rng.random() < 0.3:
+        spec['max_hours'] = rng.choice([4.0, 6.5])
+    if rng.random() < 0.2:
+        spec['title_contains'] = rng.choice(['an', 'STRAT', 'e'])
+    if rng.random() < 0.3:
+        spec['weights'] = {'overall': 1, 'clarity': rng.choice([0.5, 2])}
+    spec['top_k'] = rng.choice([1, 5, 50])
+    return spec
+
+def brute_force_matches(courses, spec):
+    """The rows a spec selects, checked one predicate at a time"""
+    def keep(course):
+        x = term_ordinal(course['term'])
+        hours = course['hoursPerWeek']
+        instructors = spec.get('instructor')
+        instructors = [instructors] if isinstance(instructors, str) else instructors
+        return ((not spec.get('from') or x >= term_ordinal(spec['from']))
+                and (not spec.get('to') or x <= term_ordinal(spec['to']))
+                and (not spec.get('buckets') or get_course_bucket(course['title']) in spec['buckets'])
+                and (not instructors or course['instructor'] in instructors)
+                and course['respondentCount'] >= spec.get('min_respondents', 0)
+                and (('min_hours' not in spec and 'max_hours' not in spec) or (
+                    hours is not None and hours >= spec.get('min_hours', 0) and hours <= spec.get('max_hours', 99)))
+                and spec.get('title_contains', '').lower() in course['title'].lower())
+    return [course for course in courses if keep(course)]
+
+@pytest.mark.parametrize('quantized', [False, True])
+def test_row_queries_match_brute_force_filter(quantized):
+    rng = random.Random(35)
+    courses = random_courses(rng, 500)
+    index = QueryIndex(build_columnar_dataset(courses, quantized))
+    for _ in range(150):
+        spec = random_spec(rng)
+        matches = brute_force_matches(courses, spec)
+        weights = spec.get('weights', DEFAULT_WEIGHTS)
+        expected = sorted(((-calculate_course_score(c, weights), c['id'], c['term'], c['instructor']) for c in matches))
+        result = run_query(index, spec)
+        assert result['matched'] == len(matches), spec
+        got = [(-row['composite_score'], row['id'], row['term'], row['instructor']) for row in result['results']]
+        assert [row[1:] for row in got] == [row[1:] for row in expected[:spec['top_k']]], spec
+        assert [row[0] for row in got] == pytest.approx([row[0] for row in expected[:spec['top_k']]])
+
+def test_grouped_queries_match_brute_force_groups():
+    rng = random.Random(36)
+    courses = random_courses(rng, 400)
+    index = QueryIndex(build_columnar_dataset(courses))
+    for _ in range(60):
+        spec = dict(random_spec(rng), group_by=rng.choice(['title', 'instructor']), top_k=50)
+        weights = spec.get('weights', DEFAULT_WEIGHTS)
+        groups = {}
+        for course in brute_force_matches(courses, spec):
+            groups.setdefault(course[spec['group_by']], []).append(course)
+        result = {row[spec['group_by']]: row for row in run_query(index, spec)['results']}
+        assert result.keys() == groups.keys()
+        for name, rows in groups.items():
+            weight = [max(c['respondentCount'], 1) for c in rows]
+            assert result[name]['sections'] == len(rows)
+            assert result[name]['respondentCount'] == sum(c['respondentCount'] for c in rows)
+            assert result[name]['composite_score'] == pytest.approx(
+                sum(w * calculate_course_score(c, weights) for w, c in zip(weight, rows)) / sum(weight))
@@ -0,0 +1,235 @@
+import json
+import os
+import queue
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from complete_workflow import write_course_data_js
+from conftest import REPO_ROOT, csv_row, sample_rows, write_csv
+from course_dataset import dataset_to_courses
+from multi_source import read_sources
+from ranking_server import MAX_QUERY_BYTES, DatasetSource, ResponseCache, SnapshotManager, make_server
+
+def fetch(url, method='GET', headers=None):
+    """Return (status, headers, body) without raising on error statuses"""
+    request = urllib.request.Request(url, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+@pytest.fixture
+def server_url(workdir):
+    """A ranking server on a free port over the sample rows plus one section outside FLMBE"""
+    rows = sample_rows() + [
+        csv_row('99001 01', 'Improvisational Theater', 'Gil', 'Ho', 'Spring 2024', 12, 3.0, 4.9, 4.9, 4.8, 4.9, 4.9)
+    ]
+    courses = dataset_to_courses(read_sources([write_csv(workdir / 'master.csv', rows)]))
+    write_course_data_js(courses, 'course_data.js')
+
+    server = make_server(DatasetSource('js', 'course_data.js'), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_rankings_for_other_bucket_fall_back_to_query(server_url):
+    status, _, body = fetch(server_url + '/api/rankings?bucket=Other')
+    assert status == 200
+    assert [row['title'] for row in json.loads(body)['results']] == ['Improvisational Theater']
+
+    status, _, body = fetch(server_url + '/api/rankings?bucket=Finance')
+    assert status == 200
+    assert {row['bucket'] for row in json.loads(body)['results']} == {'Finance'}
+
+def test_failed_reload_is_retried(workdir):
+    courses = dataset_to_courses(read_sources([write_csv(workdir / 'master.csv', sample_rows())]))
+    write_course_data_js(courses, 'course_data.js')
+    snapshots = SnapshotManager(DatasetSource('js', 'course_data.js'), ResponseCache())
+
+    # A half-written file fails to load and the current snapshot keeps serving
+    with open('course_data.js', 'w', encoding='utf-8') as file:
+        file.write('const courseData = [{"id": ')
+    with pytest.raises(ValueError):
+        snapshots.reload_if_changed()
+    assert snapshots.current.dataset['size'] == len(courses)
+    assert snapshots.source.changed()
+
+    write_course_data_js(courses[:3], 'course_data.js')
+    assert snapshots.reload_if_changed()
+    assert snapshots.current.dataset['size'] == 3
+
+@pytest.mark.parametrize('if_none_match, status', [
+    ('{etag}', 304),
+    ('"0000", {etag}', 304),
+    ('W/{etag}', 304),
+    ('*', 304),
+    ('"0000", W/"1111"', 200),
+])
+def test_if_none_match_lists(server_url, if_none_match, status):
+    _, headers, _ = fetch(server_url + '/api/terms')
+    etag = headers['ETag']
+    got, headers, body = fetch(server_url + '/api/terms', headers={'If-None-Match': if_none_match.format(etag=etag)})
+    assert got == status
+    assert headers['ETag'] == etag
+    assert (body == b'') == (status == 304)
+
+def test_head_sends_headers_only(server_url):
+    _, get_headers, get_body = fetch(server_url + '/api/rankings?bucket=Finance')
+    status, headers, body = fetch(server_url + '/api/rankings?bucket=Finance', method='HEAD')
+    assert status == 200
+    assert body == b''
+    assert headers['ETag'] == get_headers['ETag']
+    assert headers['Content-Length'] == str(len(get_body))
+
+    status, _, body = fetch(server_url + '/missing', method='HEAD')
+    assert status == 404
+    assert body == b''
+
+@pytest.mark.parametrize('query', [
+    'bucket=Finanse',
+    'bucket=Finanse&window=recent',
+    'bucket=Finanse&weights=overall:1',
+    'from=Autumn%202019',
+    'to=Sometime',
+    'window=latest',
+    'window=recent&from=Autumn%202023',
+])
+def test_rankings_reject_unknown_buckets_terms_and_windows(server_url, query):
+    status, _, body = fetch(server_url + '/api/rankings?' + query)
+    assert status == 400
+    assert 'error' in json.loads(body)
+
+def test_query_rejects_unknown_buckets(server_url):
+    request = urllib.request.Request(server_url + '/api/query', method='POST',
+                                     data=json.dumps({'buckets': ['Finance', 'Finanse']}).encode('utf-8'))
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+    assert error.value.code == 400
+    assert json.loads(error.value.read()) == {'error': 'Unknown buckets: Finanse'}
+
+@pytest.mark.parametrize('spec', [
+    {'instructor': 5},
+    {'instructor': ['Ann Lee', 5]},
+    {'title_contains': ['Finance']},
+    {'title_contains': 3},
+    {'from': 2024},
+    {'to': ['Winter 2025']},
+    {'buckets': {'Finance': True}},
+])
+def test_query_rejects_fields_of_the_wrong_type(server_url, spec):
+    request = urllib.request.Request(server_url + '/api/query', method='POST', data=json.dumps(spec).encode('utf-8'))
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request)
+    assert error.value.code == 400
+    assert 'must be' in json.loads(error.value.read())['error']
+
+@pytest.mark.parametrize('spec, error', [
+    ({'top_k': True}, 'top_k must be a positive integer'),
+    ({'weights': {'overall': True}}, 'weights must map metric names to numbers'),
+    ({'weights': {'title': 1}}, 'Unknown metrics in weights: title'),
+    ({'weights': {'overal': 1, 'clarity': 0.5}}, 'Unknown metrics in weights: overal'),
+])
+def test_query_rejects_bool_top_k_and_unknown_weights(server_url, spec, error):
+    request = urllib.request.Request(server_url + '/api/query', method='POST', data=json.dumps(spec).encode('utf-8'))
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        urllib.request.urlopen(request)
+    assert raised.value.code == 400
+    assert json.loads(raised.value.read()) == {'error': error}
+
+def test_query_accepts_metric_weights(server_url):
+    spec = {'weights': {'hoursPerWeek': -1}, 'top_k': 1}
+    request = urllib.request.Request(server_url + '/api/query', method='POST', data=json.dumps(spec).encode('utf-8'))
+    with urllib.request.urlopen(request) as response:
+        assert len(json.loads(response.read())['results']) == 1
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def read_until(output, predicate, timeout=30):
+    """Collect output lines from a queue until predicate(lines) holds"""
+    lines = []
+    deadline = time.monotonic() + timeout
+    while not predicate(lines):
+        try:
+            lines.append(output.get(timeout=max(deadline - time.monotonic(), 0)))
+        except queue.Empty:
+            raise AssertionError(f"Timed out waiting for server output: {lines}")
+    return lines
+
+def test_sighup_to_preforked_parent_reloads_every_worker(workdir):
+    courses = dataset_to_courses(read_sources([write_csv(workdir / 'master.csv', sample_rows())]))
+    write_course_data_js(courses, 'course_data.js')
+    port = free_port()
+    # Poll rarely, so only the signal can explain a reload
+    process = subprocess.Popen([sys.executable, '-u', os.path.join(REPO_ROOT, 'ranking_server.py'),
+                                '--workers', '2', '--port', str(port), '--reload-interval', '3600'],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    # Workers share the parent's stdout, so read it on a thread that cannot block the test
+    output = queue.Queue()
+
+    def pump():
+        for line in process.stdout:
+            output.put(line)
+
+    threading.Thread(target=pump, daemon=True).start()
+    try:
+        read_until(output, lambda lines: any('Serving' in line for line in lines))
+        status, _, _ = fetch(f"http://127.0.0.1:{port}/api/terms")
+        assert status == 200
+
+        write_course_data_js(courses[:3], 'course_data.js')
+        process.send_signal(signal.SIGHUP)
+        read_until(output, lambda lines: ''.join(lines).count('Reloaded') == 2)
+        assert process.poll() is None
+        status, _, _ = fetch(f"http://127.0.0.1:{port}/api/rankings?bucket=Finance")
+        assert status == 200
+    finally:
+        process.terminate()
+        process.wait(10)
+
+def post_raw(server_url, headers, body=b''):
+    """POST to /api/query with exactly the given headers, returning (status, payload)"""
+    host, port = server_url[len('http://'):].split(':')
+    with socket.create_connection((host, int(port))) as sock:
+        request = 'POST /api/query HTTP/1.1\r\nHost: localhost\r\n'
+        request += ''.join(f"{name}: {value}\r\n" for name, value in headers.items()) + '\r\n'
+        sock.sendall(request.encode('ascii') + body)
+        response = sock.makefile('rb').read()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 411),
+    ({'Content-Length': 'ten'}, 400),
+    ({'Content-Length': '-5'}, 400),
+    ({'Content-Length': str(MAX_QUERY_BYTES + 1)}, 413),
+])
+def test_query_rejects_bad_content_length(server_url, headers, status):
+    got, payload = post_raw(server_url, headers)
+    assert got == status
+    assert 'error' in payload
+
+def test_query_accepts_body_up_to_the_limit(server_url):
+    body = json.dumps({'top_k': 1}).encode('utf-8')
+    body += b' ' * (MAX_QUERY_BYTES - len(body))
+    got, payload = post_raw(server_url, {'Content-Length': str(len(body))}, body)
+    assert got == 200
+    assert len(payload['results']) == 1
+
+def test_query_rejects_body_that_is_not_utf8(server_url):
+    got, payload = post_raw(server_url, {'Content-Length': '2'}, b'\xff\xfe')
+    assert got == 400
+    assert payload == {'error': 'Query body must be UTF-8'}
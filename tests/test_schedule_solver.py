@@ -0,0 +1,82 @@
+import itertools
+import random
+
+import pytest
+
+from schedule_solver import build_course_lookup, build_variables, solve_schedules
+
+def section_row(title, instructor, respondents, hours, overall=4.0):
+    return {'id': '30000 01', 'title': title, 'instructor': instructor, 'term': 'Spring 2024',
+            'respondentCount': respondents, 'hoursPerWeek': hours, 'clarity': overall, 'interest': overall,
+            'usefulness': overall, 'overall': overall, 'recommendation': overall}
+
+def test_lookup_averages_hours_over_sections_that_reported_them():
+    lookup = build_course_lookup([
+        section_row('Investments', 'A B', 10, 6.0),
+        section_row('Investments', 'A B', 30, None),
+        section_row('Investments', 'C D', 20, None),
+        section_row('Game Theory', 'E F', 5, None),
+    ])
+    assert lookup[('Investments', 'A B')]['hoursPerWeek'] == 6.0
+    assert lookup[('Investments', None)]['hoursPerWeek'] == 6.0
+    assert lookup[('Investments', 'C D')]['hoursPerWeek'] is None
+    assert lookup[('Game Theory', None)]['hoursPerWeek'] is None
+
+    variables = build_variables({
+        'sections': [{'title': 'Investments', 'instructor': 'C D', 'time_slot': 'Mon 9'},
+                     {'title': 'Game Theory', 'instructor': 'E F', 'time_slot': 'Tue 9'}],
+        'desired': [{'title': 'Investments'}, {'title': 'Game Theory'}]
+    }, lookup)
+    # C D's sections borrow the title's hours; Game Theory has none to check against a budget
+    assert [section['hoursPerWeek'] for section in variables[0]['domain']] == [6.0]
+    assert variables[1]['domain'] == []
+
+SLOTS = ['Mon 9', 'Mon 13', 'Tue 9', 'Tue 13', 'Wed 9', 'Wed 13']
+
+def random_request(rng):
+    """Sections of eight titles in random slots, a few desired titles and required categories"""
+    titles = [f"Course {i}" for i in range(8)]
+    rows = [section_row(title, rng.choice(['A B', 'C D']), rng.choice([0, 8, 25]),
+                        rng.choice([2.0, 3.5, 5.0, 6.5]), round(rng.uniform(2.5, 5), 1))
+            for title in titles for _ in range(2)]
+    sections = [{'title': title, 'instructor': rng.choice(['A B', 'C D']), 'section': str(n),
+                 'time_slots': rng.sample(SLOTS, rng.choice([1, 1, 2]))}
+                for title in titles for n in range(rng.randrange(1, 4))]
+    shuffled = rng.sample(titles, len(titles))
+    desired = [{'title': title, 'time_slots': rng.sample(SLOTS, 4)} if rng.random() < 0.3 else {'title': title}
+               for title in shuffled[:3]]
+    required = {'Finance': [{'title': title} for title in shuffled[3:5]],
+                'Strategy': [{'title': title} for title in shuffled[5:8]]}
+    return rows, {'sections': sections, 'desired': desired, 'required': required}
+
+def brute_force_scores(variables, max_hours, k):
+    """Top-k schedule scores from every assignment of a section (or nothing, if optional) to each variable"""
+    choices = [variable['domain'] + ([] if variable['required'] else [None]) for variable in variables]
+    totals = []
+    for assignment in itertools.product(*choices):
+        chosen = [section for section in assignment if section is not None]
+        titles = [section['title'] for section in chosen]
+        slots = [slot for section in chosen for slot in section['slots']]
+        if len(set(titles)) < len(titles) or len(set(slots)) < len(slots):
+            continue
+        if sum(section['hoursPerWeek'] for section in chosen) > max_hours + 1e-9:
+            continue
+        totals.append(sum(section['composite_score'] for section in chosen))
+    return sorted(totals, reverse=True)[:k]
+
+@pytest.mark.parametrize('seed', range(10))
+def test_schedules_match_exhaustive_search(seed):
+    rng = random.Random(seed)
+    rows, request = random_request(rng)
+    variables = build_variables(request, build_course_lookup(rows))
+    for max_hours, k in [(8.0, 3), (14.0, 5), (40.0, 10)]:
+        schedules = solve_schedules(variables, max_hours, k)
+        assert [schedule['total_score'] for schedule in schedules] == \
+               pytest.approx(brute_force_scores(variables, max_hours, k))
+        for schedule in schedules:
+            courses = schedule['courses']
+            slots = [slot for course in courses for slot in course['slots']]
+            assert len(set(slots)) == len(slots)
+            assert len({course['title'] for course in courses}) == len(courses)
+            assert {'Finance', 'Strategy'} <= {course['slot_for'] for course in courses}
+            assert sum(course['hoursPerWeek'] for course in courses) <= max_hours + 1e-9
@@ -0,0 +1,99 @@
+import math
+import random
+
+import pytest
+
+from course_dataset import build_columnar_dataset
+from ranking_query import QueryIndex, run_query
+from similar_courses import (PROFILE_FIELDS, KDTree, build_course_profiles, precompute_similar_courses,
+                             profile_vectors)
+
+TITLES = ['Investments', 'Game Theory', 'Pricing Strategies', 'Negotiations', 'Cost Analysis']
+
+def random_courses(rng, count):
+    """Sections over a few titles, with every metric sometimes unanswered"""
+    courses = []
+    for i in range(count):
+        course = {'id': f"3{rng.randrange(1000, 1010)} 0{i % 3 + 1}", 'title': rng.choice(TITLES),
+                  'instructor': rng.choice(['A B', 'C D', 'E F']), 'term': 'Spring 2024',
+                  'respondentCount': rng.choice([0, 3, 12, 40])}
+        for field in PROFILE_FIELDS:
+            course[field] = None if rng.random() < 0.3 else round(rng.uniform(1, 5), 1)
+        courses.append(course)
+    return courses
+
+def answered_mean(rows, field):
+    """Respondent-weighted mean of a field over the rows that answered it"""
+    answered = [(max(row['respondentCount'], 1), row[field]) for row in rows if row[field] is not None]
+    total = sum(weight for weight, _ in answered)
+    return sum(weight * value for weight, value in answered) / total if total else None
+
+def test_profiles_average_only_answered_metrics():
+    courses = random_courses(random.Random(5), 150)
+    for profile in build_course_profiles(courses):
+        rows = [course for course in courses if course['title'] == profile['title']]
+        for field in PROFILE_FIELDS:
+            assert profile[field] == pytest.approx(answered_mean(rows, field)), (profile['title'], field)
+
+def test_title_without_reported_hours_is_never_lighter():
+    courses = random_courses(random.Random(9), 60)
+    for course in courses:
+        if course['title'] == 'Negotiations':
+            course['hoursPerWeek'] = None
+    similar = precompute_similar_courses(courses, k=4)
+    assert similar['Negotiations']['fewer_hours'] == []
+    assert all('Negotiations' not in entry['fewer_hours'] for entry in similar.values())
+    assert len(similar['Negotiations']['similar']) == 4
+
+def test_grouped_hours_average_only_answered_rows():
+    courses = random_courses(random.Random(13), 150)
+    results = run_query(QueryIndex(build_columnar_dataset(courses)), {'group_by': 'title', 'top_k': len(TITLES)})['results']
+    assert len(results) == len(TITLES)
+    for group in results:
+        rows = [course for course in courses if course['title'] == group['title']]
+        assert group['hoursPerWeek'] == pytest.approx(answered_mean(rows, 'hoursPerWeek'))
+
+def linear_scan(vectors, hours, point, k, exclude=None, max_hours=None):
+    """The k nearest points by checking every one"""
+    candidates = [(math.sqrt(sum((a - b) ** 2 for a, b in zip(point, vector))), i)
+                  for i, vector in enumerate(vectors)
+                  if i != exclude and (max_hours is None or hours[i] < max_hours)]
+    return sorted(candidates)[:k]
+
+@pytest.mark.parametrize('size, dimensions', [(1, 2), (9, 3), (60, 6), (400, 6), (300, 14)])
+def test_kdtree_matches_linear_scan(size, dimensions):
+    rng = random.Random(size * dimensions)
+    # Coarse coordinates put many points at equal distances
+    vectors = [[rng.randrange(-6, 7) / 2 for _ in range(dimensions)] for _ in range(size)]
+    hours = [rng.choice([2.0, 3.5, 5.0, 7.5, rng.uniform(1, 12)]) for _ in range(size)]
+    tree = KDTree(vectors, hours)
+    for _ in range(25):
+        point = [rng.uniform(-3, 3) for _ in range(dimensions)]
+        k = rng.choice([1, 3, 10])
+        exclude = rng.randrange(size)
+        max_hours = rng.choice([None, 3.5, rng.uniform(1, 12)])
+        got = tree.query(point, k, exclude=exclude, max_hours=max_hours)
+        expected = linear_scan(vectors, hours, point, k, exclude, max_hours)
+        # Ties may be broken either way, so compare distances, then check each point qualifies
+        assert [d for d, _ in got] == pytest.approx([d for d, _ in expected])
+        for distance, i in got:
+            assert i != exclude
+            assert max_hours is None or hours[i] < max_hours
+            assert math.dist(point, vectors[i]) == pytest.approx(distance)
+
+def test_similar_courses_match_brute_force_neighbours():
+    courses = random_courses(random.Random(17), 200)
+    for course in courses:
+        course['title'] = f"{course['title']} {course['id'][:5]}"
+    profiles = build_course_profiles(courses)
+    vectors = profile_vectors(profiles)
+    hours = [math.inf if profile['hoursPerWeek'] is None else profile['hoursPerWeek'] for profile in profiles]
+    position = {profile['title']: i for i, profile in enumerate(profiles)}
+    similar = precompute_similar_courses(courses, k=3)
+    for i, profile in enumerate(profiles):
+        entry = similar[profile['title']]
+        for key, max_hours in [('similar', None), ('fewer_hours', hours[i])]:
+            got = [math.dist(vectors[i], vectors[position[title]]) for title in entry[key]]
+            # A title with unknown hours has no lighter alternatives
+            expected = [] if max_hours == math.inf else linear_scan(vectors, hours, vectors[i], 3, i, max_hours)
+            assert got == pytest.approx([d for d, _ in expected]), (profile['title'], key)
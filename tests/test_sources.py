@@ -0,0 +1,49 @@
+import course_db
+from conftest import csv_row, sample_rows, write_csv
+from course_dataset import dataset_to_courses
+from incremental_ingest import ingest
+from multi_source import read_sources
+
+def test_source_export_is_stored_per_section(workdir):
+    rows = sample_rows()
+    first = write_csv(workdir / 'autumn_winter.csv', rows[:2])
+    second = write_csv(workdir / 'later.csv', rows[2:])
+    courses = dataset_to_courses(read_sources([first, second]))
+    assert [course['source'] for course in courses] == [first] * 2 + [second] * 3
+
+    conn = course_db.connect(str(workdir / 'courses.db'))
+    course_db.load_courses(conn, courses)
+    assert course_db.fetch_source_summary(conn) == [{'source': first, 'sections': 2},
+                                                    {'source': second, 'sections': 3}]
+    # The exported course dicts keep their shape
+    assert 'source' not in course_db.fetch_courses(conn)[0]
+
+    # A corrected row takes the correcting export as its source; a repeated one keeps its own
+    correction = write_csv(workdir / 'correction.csv', [
+        rows[0],
+        csv_row('37000 01', 'Marketing Strategy', 'Cy', 'Diaz', 'Spring 2024', 52, 4.2, 4.8, 4.7, 4.6, 4.9, 4.8)
+    ])
+    ingest(conn, dataset_to_courses(read_sources([correction])))
+    sources = dict(conn.execute("SELECT code, source FROM sections"))
+    conn.close()
+    assert sources['35200 01'] == first
+    assert sources['37000 01'] == correction
+
+def test_same_file_names_in_different_folders_are_different_sources(workdir, monkeypatch):
+    (workdir / 'booth').mkdir()
+    (workdir / 'harris').mkdir()
+    booth = write_csv(workdir / 'booth' / '2025.csv', [
+        csv_row('34101 01', 'Competitive Strategy', 'Fay', 'Gu', 'Spring 2025', 30, 5.0, 4.6, 4.6, 4.5, 4.6, 4.5)])
+    harris = write_csv(workdir / 'harris' / '2025.csv', [
+        csv_row('33001 81', 'Money and Banking', 'Ivy', 'Jo', 'Spring 2025', 18, 6.0, 4.1, 4.2, 4.0, 4.1, 4.0)])
+    assert {course['source'] for course in dataset_to_courses(read_sources([booth, harris]))} == {booth, harris}
+
+    conn = course_db.connect(str(workdir / 'courses.db'))
+    course_db.load_courses(conn, dataset_to_courses(read_sources([booth])))
+    # Run from inside the folder, as a per-program job would be
+    monkeypatch.chdir(workdir / 'harris')
+    delta, _ = ingest(conn, dataset_to_courses(read_sources(['2025.csv'])))
+    summary = course_db.fetch_source_summary(conn)
+    conn.close()
+    assert delta['deleted'] == []
+    assert summary == [{'source': booth, 'sections': 1}, {'source': harris, 'sections': 1}]
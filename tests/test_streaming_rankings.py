@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from complete_workflow import FLMBE_CATALOG, calculate_course_score
+from course_dataset import METRIC_FIELDS
+from streaming_rankings import StreamingRankings
+
+def random_courses(rng, count):
+    """Sections of a few catalog titles over three years, with metrics sometimes unanswered"""
+    titles = [titles[0] for titles in FLMBE_CATALOG.values()][:4]
+    courses = []
+    for i in range(count):
+        course = {'id': f"3{rng.randrange(1000, 1010)} 0{i % 3 + 1}", 'title': rng.choice(titles),
+                  'instructor': rng.choice(['A B', 'C D']),
+                  'term': f"{rng.choice(['Winter', 'Spring', 'Autumn'])} {rng.choice([2022, 2023, 2024])}",
+                  'respondentCount': rng.choice([0, 5, 20])}
+        for field in METRIC_FIELDS:
+            course[field] = None if rng.random() < 0.3 else round(rng.uniform(1, 5), 1)
+        courses.append(course)
+    return courses
+
+def test_title_summary_matches_brute_force_means():
+    courses = random_courses(random.Random(3), 300)
+    # Two inputs merged must summarise the same as one
+    first, second = StreamingRankings(5, 0), StreamingRankings(5, 1)
+    for i, course in enumerate(courses):
+        (first if i < 120 else second).add(course)
+    summary = {row['title']: row for row in first.merge(second).title_summary()}
+
+    for title, row in summary.items():
+        rows = [course for course in courses if course['title'] == title]
+        weights = [max(course['respondentCount'], 1) for course in rows]
+        answered = [(w, course['hoursPerWeek']) for w, course in zip(weights, rows) if course['hoursPerWeek'] is not None]
+        assert row['sections'] == len(rows)
+        assert row['respondentCount'] == sum(course['respondentCount'] for course in rows)
+        assert row['composite_score'] == pytest.approx(
+            sum(w * calculate_course_score(course) for w, course in zip(weights, rows)) / sum(weights))
+        assert row['hoursPerWeek'] == pytest.approx(sum(w * h for w, h in answered) / sum(w for w, _ in answered))
+
+def test_title_without_reported_hours_has_no_hours():
+    rankings = StreamingRankings()
+    for course in random_courses(random.Random(4), 10):
+        course['hoursPerWeek'] = None
+        rankings.add(course)
+    assert all(row['hoursPerWeek'] is None for row in rankings.title_summary())
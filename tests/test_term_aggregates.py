@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from complete_workflow import calculate_course_score
+from course_dataset import METRIC_FIELDS, build_columnar_dataset
+from term_aggregates import build_prefix_aggregates, update_prefix_aggregates, window_aggregate
+
+TERMS = [f"{season} {year}" for year in (2022, 2023, 2024) for season in ('Winter', 'Spring', 'Autumn')]
+
+def random_courses(rng, count):
+    """Sections over a few titles and terms, with every metric sometimes unanswered"""
+    courses = []
+    for i in range(count):
+        course = {
+            'id': f"3{rng.randrange(1000, 1010)} 0{i % 3 + 1}",
+            'title': rng.choice(['Investments', 'Game Theory', 'Pricing Strategies']),
+            'instructor': rng.choice(['A B', 'C D', 'E F']),
+            'term': rng.choice(TERMS),
+            'respondentCount': rng.choice([0, 3, 12, 40])
+        }
+        for field in METRIC_FIELDS:
+            course[field] = None if rng.random() < 0.3 else round(rng.uniform(1, 5), 1)
+        courses.append(course)
+    return courses
+
+def brute_force_window(courses, title, terms):
+    """Weighted means over the answered rows of one title in a set of terms"""
+    rows = [c for c in courses if c['title'] == title and c['term'] in terms]
+    if not rows:
+        return None
+    weight = [c['respondentCount'] if c['respondentCount'] > 0 else 1 for c in rows]
+    result = {'sections': len(rows), 'respondentCount': sum(c['respondentCount'] for c in rows)}
+    for field in METRIC_FIELDS:
+        answered = [(w, c[field]) for w, c in zip(weight, rows) if c[field] is not None]
+        total = sum(w for w, _ in answered)
+        result[field] = sum(w * v for w, v in answered) / total if total else None
+    result['composite_score'] = sum(w * calculate_course_score(c) for w, c in zip(weight, rows)) / sum(weight)
+    return result
+
+def assert_matches(aggregate, expected):
+    if expected is None:
+        assert aggregate is None
+        return
+    for field, value in expected.items():
+        assert aggregate[field] == (None if value is None else pytest.approx(value)), field
+
+@pytest.mark.parametrize('quantized', [False, True])
+def test_window_means_skip_missing_metrics(quantized):
+    rng = random.Random(7)
+    courses = random_courses(rng, 120)
+    aggregates = build_prefix_aggregates(build_columnar_dataset(courses, quantized))
+    terms = aggregates['terms']
+    for start in range(len(terms)):
+        for end in range(start, len(terms)):
+            for title in ['Investments', 'Game Theory', 'Pricing Strategies']:
+                assert_matches(window_aggregate(aggregates, title, start, end),
+                               brute_force_window(courses, title, set(terms[start:end + 1])))
+
+def test_metric_missing_across_a_whole_window_has_no_mean():
+    course = {'id': '34101 01', 'title': 'Game Theory', 'instructor': 'A B', 'term': 'Spring 2024',
+              'respondentCount': 10, 'hoursPerWeek': None, 'clarity': 4.0, 'interest': 4.0,
+              'usefulness': 4.0, 'overall': 4.0, 'recommendation': 4.0}
+    aggregates = build_prefix_aggregates(build_columnar_dataset([course]))
+    result = window_aggregate(aggregates, 'Game Theory', 0, 0)
+    assert result['hoursPerWeek'] is None
+    assert result['clarity'] == 4.0
+
+def test_updates_match_the_brute_force_means():
+    rng = random.Random(11)
+    courses = random_courses(rng, 80)
+    aggregates = build_prefix_aggregates(build_columnar_dataset(courses[:60]))
+    update_prefix_aggregates(aggregates, removed=courses[:10], added=courses[60:])
+    kept = courses[10:]
+    terms = aggregates['terms']
+    for title in ['Investments', 'Game Theory', 'Pricing Strategies']:
+        assert_matches(window_aggregate(aggregates, title, 0, len(terms) - 1),
+                       brute_force_window(kept, title, set(terms)))
@@ -0,0 +1,22 @@
+import json
+import sys
+
+import complete_workflow
+from conftest import sample_rows, write_csv
+from create_global_ranking import load_course_data_from_js
+
+def read_js_payload(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    return json.loads(content[len('const courseData = '):-1])
+
+def test_course_data_js_stays_a_plain_array(workdir, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['complete_workflow.py', write_csv(workdir / 'evals.csv', sample_rows())])
+    complete_workflow.main()
+
+    courses = read_js_payload('course_data.js')
+    assert isinstance(courses, list)
+    assert [course['id'] for course in courses] == [row[0] for row in sample_rows()]
+
+    assert isinstance(read_js_payload(complete_workflow.ENCODED_COURSE_DATA_FILE), dict)
+    assert load_course_data_from_js(complete_workflow.ENCODED_COURSE_DATA_FILE) == courses